@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # Imported lazily through CaptureKarma.utils.lazy_imports, so not found by analysis
+    hiddenimports=['numpy', 'cv2', 'mss', 'PIL.Image', 'pyautogui', 'pygetwindow'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
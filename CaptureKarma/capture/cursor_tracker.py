@@ -0,0 +1,84 @@
+"""
+Cursor tracking for the CaptureKarma Screen Capture Tool
+"""
+import collections
+import time
+
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+try:
+    from pynput import mouse
+    PYNPUT_AVAILABLE = True
+except ImportError:
+    PYNPUT_AVAILABLE = False
+
+pyautogui = lazy_import("pyautogui")
+
+
+class CursorTracker:
+    """
+    Reports the cursor position and recent clicks
+
+    The position is read on demand, so a caller polling once per frame gets
+    one cheap system call per frame. Clicks are collected by a mouse listener
+    with their time on the perf_counter clock.
+    """
+    
+    def __init__(self, max_clicks=16):
+        """
+        Args:
+            max_clicks: Number of recent clicks kept
+        """
+        self.clicks = collections.deque(maxlen=max_clicks)
+        self._listener = None
+        self._controller = mouse.Controller() if PYNPUT_AVAILABLE else None
+    
+    def __deepcopy__(self, memo):
+        # Shared by every copy of an effects pipeline, so one listener serves all regions
+        return self
+    
+    @property
+    def is_running(self):
+        """Whether the click listener is active"""
+        return self._listener is not None and self._listener.is_alive()
+    
+    def start(self):
+        """Start listening for clicks (safe to call more than once)"""
+        if not PYNPUT_AVAILABLE:
+            print("WARNING: pynput not available. Install with 'pip install pynput' to highlight clicks.")
+            return
+        if self.is_running:
+            return
+        
+        self.clicks.clear()
+        self._listener = mouse.Listener(on_click=self._on_click)
+        self._listener.daemon = True
+        self._listener.start()
+    
+    def stop(self):
+        """Stop listening for clicks"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+    
+    def position(self):
+        """Get the current cursor position as (x, y) screen coordinates"""
+        if self._controller is not None:
+            return self._controller.position
+        return pyautogui.position()
+    
+    def recent_clicks(self, since):
+        """
+        Get the clicks made since a point in time
+
+        Args:
+            since: time.perf_counter() value
+
+        Returns:
+            List of (time, x, y) tuples, oldest first
+        """
+        return [click for click in list(self.clicks) if click[0] >= since]
+    
+    def _on_click(self, x, y, button, pressed):
+        if pressed:
+            self.clicks.append((time.perf_counter(), x, y))
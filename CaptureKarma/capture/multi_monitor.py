@@ -0,0 +1,157 @@
+"""
+Parallel multi-monitor capture for the CaptureKarma Screen Capture Tool
+
+Every monitor is grabbed on its own thread with its own MSS session, and the
+results are copied into one preallocated canvas covering the whole virtual
+desktop. Grabbing the monitors side by side keeps a multi-screen recording
+at full frame rate, where one large grab on a single thread cannot.
+"""
+import threading
+import time
+
+from CaptureKarma.utils.frame_analysis import mss_to_array
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+
+np = lazy_import("numpy")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+
+class MultiMonitorCapture:
+    """Captures all monitors in parallel into a single BGRA canvas"""
+    
+    def __init__(self, timeout=2.0):
+        """
+        Args:
+            timeout: Seconds to wait for a monitor thread before the capture is considered broken
+        """
+        if not MSS_AVAILABLE:
+            raise ImportError("mss is required for multi-monitor capture. Install with 'pip install mss'")
+        
+        self.timeout = timeout
+        
+        # Monitor layout; index 0 in MSS is the bounding box of all monitors
+        with mss.mss() as sct:
+            virtual = sct.monitors[0]
+            self.monitors = [dict(monitor) for monitor in sct.monitors[1:]]
+        self.bounds = (virtual["left"], virtual["top"], virtual["width"], virtual["height"])
+        
+        # Preallocated canvas; areas not covered by any monitor stay black
+        self.canvas = np.zeros((virtual["height"], virtual["width"], 4), dtype=np.uint8)
+        
+        # Grab durations per monitor, in seconds
+        self.timings = [[] for _ in self.monitors]
+        
+        self._threads = []
+        self._running = False
+        self._start_barrier = None
+        self._done_barrier = None
+    
+    def start(self):
+        """Start one capture thread per monitor"""
+        if self._running:
+            return
+        
+        # The caller takes part in both barriers, so every grab() is one synchronized round
+        parties = len(self.monitors) + 1
+        self._start_barrier = threading.Barrier(parties, timeout=self.timeout)
+        self._done_barrier = threading.Barrier(parties, timeout=self.timeout)
+        self.timings = [[] for _ in self.monitors]
+        self._running = True
+        
+        self._threads = []
+        for index in range(len(self.monitors)):
+            thread = threading.Thread(target=self._capture_loop, args=(index,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        print(f"Capturing {len(self.monitors)} monitors in parallel, canvas {self.bounds[2]}x{self.bounds[3]}")
+    
+    def grab(self):
+        """
+        Grab every monitor once and composite them into the canvas
+
+        Returns:
+            The BGRA canvas array; it is overwritten by the next call
+
+        Raises:
+            threading.BrokenBarrierError: If a monitor thread failed or timed out
+        """
+        self._start_barrier.wait()
+        self._done_barrier.wait()
+        return self.canvas
+    
+    def stop(self):
+        """Stop the capture threads"""
+        if not self._running:
+            return
+        
+        self._running = False
+        # Release the threads waiting for the next round so they can see the stop flag
+        self._start_barrier.abort()
+        self._done_barrier.abort()
+        for thread in self._threads:
+            thread.join(timeout=self.timeout)
+        self._threads = []
+    
+    def _capture_loop(self, index):
+        """Grab one monitor each round (runs on the monitor's own thread)"""
+        monitor = self.monitors[index]
+        offset_x = monitor["left"] - self.bounds[0]
+        offset_y = monitor["top"] - self.bounds[1]
+        target = self.canvas[offset_y:offset_y + monitor["height"], offset_x:offset_x + monitor["width"]]
+        
+        # MSS sessions must not be shared between threads
+        with mss.mss() as sct:
+            while self._running:
+                try:
+                    self._start_barrier.wait()
+                except threading.BrokenBarrierError:
+                    break
+                
+                try:
+                    grab_start = time.perf_counter()
+                    np.copyto(target, mss_to_array(sct.grab(monitor)))
+                    self.timings[index].append(time.perf_counter() - grab_start)
+                except Exception as e:
+                    print(f"Error capturing monitor {index + 1}: {str(e)}")
+                    self._done_barrier.abort()
+                    break
+                
+                try:
+                    self._done_barrier.wait()
+                except threading.BrokenBarrierError:
+                    break
+    
+    def stats(self):
+        """
+        Get grab timing statistics per monitor
+
+        Returns:
+            List of dicts with "monitor", "frames", "mean_ms", "p95_ms" and "max_ms"
+        """
+        stats = []
+        for index, timings in enumerate(self.timings):
+            durations = np.array(timings) * 1000 if timings else np.zeros(1)
+            stats.append({
+                "monitor": index + 1,
+                "frames": len(timings),
+                "mean_ms": float(durations.mean()),
+                "p95_ms": float(np.percentile(durations, 95)),
+                "max_ms": float(durations.max()),
+            })
+        return stats
+    
+    def summary(self):
+        """Get a short description of the per-monitor timings, naming the slowest monitor"""
+        stats = self.stats()
+        if not stats:
+            return "no monitors captured"
+        
+        parts = [
+            f"monitor {s['monitor']}: mean {s['mean_ms']:.1f}ms, p95 {s['p95_ms']:.1f}ms"
+            for s in stats
+        ]
+        slowest = max(stats, key=lambda s: s["p95_ms"])
+        return "; ".join(parts) + f" (slowest: monitor {slowest['monitor']})"
@@ -0,0 +1,121 @@
+"""
+Multi-region capture for the CaptureKarma Screen Capture Tool
+
+Several regions are captured with one grab per monitor and tick: the
+bounding box of all regions on a monitor is grabbed once and every region is
+sliced out of it as a zero-copy NumPy view.
+"""
+
+from CaptureKarma.utils.frame_analysis import mss_to_array
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pyautogui = lazy_import("pyautogui")
+
+
+def normalize_regions(region):
+    """
+    Get a list of regions from a single region or a list of regions
+
+    Args:
+        region: Tuple (x, y, width, height) or a list of such tuples
+
+    Returns:
+        List of (x, y, width, height) tuples
+    """
+    if not region:
+        return []
+    if isinstance(region[0], (tuple, list)):
+        return [tuple(r) for r in region]
+    return [tuple(region)]
+
+
+def union_region(regions):
+    """Get the bounding box (x, y, width, height) of a list of regions"""
+    left = min(x for x, y, width, height in regions)
+    top = min(y for x, y, width, height in regions)
+    right = max(x + width for x, y, width, height in regions)
+    bottom = max(y + height for x, y, width, height in regions)
+    return (left, top, right - left, bottom - top)
+
+
+def region_filename(filename, index, count):
+    """Add a region suffix (_r1, _r2, ...) to a filename when there is more than one region"""
+    if count <= 1:
+        return filename
+    base, extension = filename.rsplit(".", 1)
+    return f"{base}_r{index + 1}.{extension}"
+
+
+class MultiRegionGrabber:
+    """Grabs several screen regions with one grab per monitor"""
+    
+    def __init__(self, regions, monitors=None):
+        """
+        Args:
+            regions: List of (x, y, width, height) tuples
+            monitors: Optional MSS monitor dicts (sct.monitors[1:]); regions on the same
+                monitor share one grab. Without them all regions share a single grab.
+        """
+        self.regions = [tuple(r) for r in regions]
+        
+        # Assign every region to the monitor that contains its center
+        grouped = {}
+        for index, region in enumerate(self.regions):
+            grouped.setdefault(self._monitor_index(region, monitors), []).append(index)
+        
+        # One grab per group, with the offset of each region inside it
+        self.groups = []
+        for indices in grouped.values():
+            bounds = union_region([self.regions[i] for i in indices])
+            slices = [
+                (i, self.regions[i][0] - bounds[0], self.regions[i][1] - bounds[1],
+                 self.regions[i][2], self.regions[i][3])
+                for i in indices
+            ]
+            self.groups.append((bounds, slices))
+    
+    def grab(self, sct):
+        """
+        Grab all regions with MSS
+
+        Returns:
+            List of BGRA arrays, one per region in the original order. They are views
+            into the grab buffers, so no pixel data is copied.
+        """
+        views = [None] * len(self.regions)
+        for (x, y, width, height), slices in self.groups:
+            sct_img = sct.grab({"top": y, "left": x, "width": width, "height": height})
+            self._slice(mss_to_array(sct_img), slices, views)
+        return views
+    
+    def grab_with_pyautogui(self):
+        """
+        Grab all regions with PyAutoGUI
+
+        Returns:
+            List of RGB arrays, one per region in the original order
+        """
+        views = [None] * len(self.regions)
+        for bounds, slices in self.groups:
+            pixels = np.asarray(pyautogui.screenshot(region=bounds))
+            self._slice(pixels, slices, views)
+        return views
+    
+    def _slice(self, pixels, slices, views):
+        """Cut the regions of one group out of its grab"""
+        for index, offset_x, offset_y, width, height in slices:
+            views[index] = pixels[offset_y:offset_y + height, offset_x:offset_x + width]
+    
+    def _monitor_index(self, region, monitors):
+        """Get the index of the monitor containing the center of a region"""
+        if not monitors:
+            return 0
+        
+        center_x = region[0] + region[2] // 2
+        center_y = region[1] + region[3] // 2
+        for index, monitor in enumerate(monitors):
+            if (monitor["left"] <= center_x < monitor["left"] + monitor["width"] and
+                    monitor["top"] <= center_y < monitor["top"] + monitor["height"]):
+                return index
+        return 0
@@ -1,15 +1,37 @@
 """
 Region selection functionality for the CaptureKarma Screen Capture Tool
 """
-import pygetwindow as gw
+import functools
+
 from PyQt5 import QtWidgets, QtCore, QtGui
 
+from CaptureKarma.capture.thumbnails import ThumbnailRenderer, MSS_AVAILABLE
+from CaptureKarma.capture.window_index import get_window_index, PYGETWINDOW_AVAILABLE
+from CaptureKarma.utils.frame_analysis import is_frame_black, qimage_to_array
+
 
 class RegionSelector:
     """Handles the selection of screen regions for capture"""
     
     def __init__(self, parent):
         self.parent = parent
+        
+        # Whether the last selection was the "All Monitors" entry
+        self.all_monitors = False
+        
+        # Native handle of the last selected window (None for monitors)
+        self.window_handle = None
+        
+        # Windows are enumerated in the background, so the dialog opens instantly. The index is
+        # started after the first paint (or when the dialog first opens), not while the UI is built
+        self.window_index = get_window_index()
+        
+        # Thumbnails are rendered on a thread pool and cached across dialogs
+        self.thumbnails = ThumbnailRenderer()
+        # Source -> list item of the open dialog, for thumbnails that arrive later
+        self._thumbnail_items = {}
+        # Window changes that arrive after the dialog has closed are ignored
+        self._dialog_open = False
     
     def select_region(self):
         """
@@ -17,6 +39,9 @@ class RegionSelector:
         Returns the region as a tuple (x, y, width, height) or None if canceled
         """
         self.parent.parent.status_bar.showMessage("Select a window or monitor to capture")
+        self.window_index.start()
+        self.all_monitors = False
+        self.window_handle = None
         
         # Create a dialog for selecting monitor or window
         dialog = QtWidgets.QDialog(self.parent)
@@ -54,8 +79,22 @@ class RegionSelector:
         buttons.rejected.connect(dialog.reject)
         dialog_layout.addWidget(buttons)
         
+        # Windows opened or closed while the dialog is up are added to or removed from the list.
+        # The index calls back on its own thread; the signal delivers the change on the GUI thread
+        on_windows_changed = self.parent.windows_changed.emit
+        self.window_index.add_listener(on_windows_changed)
+        self._dialog_open = True
+        
         # Show dialog and process result
-        if dialog.exec_() == QtWidgets.QDialog.Accepted:
+        try:
+            result = dialog.exec_()
+        finally:
+            self._dialog_open = False
+            self.window_index.remove_listener(on_windows_changed)
+        # Thumbnails still queued are no longer needed and would delay the region preview
+        self.thumbnails.cancel_pending()
+        self._thumbnail_items = {}
+        if result == QtWidgets.QDialog.Accepted:
             try:
                 current_tab = tab_widget.currentIndex()
                 capture_region = None
@@ -63,6 +102,8 @@ class RegionSelector:
                 if current_tab == 0:  # Monitor tab
                     # Get selected monitor
                     monitor_idx = self.monitors_list.currentRow()
+                    if monitor_idx >= QtWidgets.QApplication.desktop().screenCount():
+                        return self._select_all_monitors(preview_cb.isChecked())
                     screen_geometry = QtWidgets.QApplication.desktop().screenGeometry(monitor_idx)
                     
                     # Set the capture region to the monitor dimensions
@@ -81,19 +122,16 @@ class RegionSelector:
                         f"Selected monitor {monitor_idx+1} with region: {capture_region}"
                     )
                 else:  # Window tab
-                    # Get selected window
-                    window_title = self.windows_list.currentItem().text()
-                    
-                    # Get window position and size
-                    window = gw.getWindowsWithTitle(window_title)[0]
+                    # Get selected window by its handle, so duplicate or changed titles don't matter
+                    item = self.windows_list.currentItem()
+                    handle = item.data(QtCore.Qt.UserRole)
                     
-                    # Set the capture region to the window dimensions
-                    capture_region = (
-                        window.left,
-                        window.top,
-                        window.width,
-                        window.height
-                    )
+                    # Set the capture region to the current window dimensions
+                    capture_region = self.window_index.geometry(handle, max_age=0)
+                    if capture_region is None:
+                        raise ValueError("The selected window has been closed")
+                    window_title = self.window_index.title(handle) or item.text()
+                    self.window_handle = handle
                     
                     # Generate a preview
                     self._generate_region_preview(window_title, capture_region, preview_cb.isChecked())
@@ -120,50 +158,173 @@ class RegionSelector:
         
         # Get all monitors
         self.monitors_list = QtWidgets.QListWidget()
+        self.monitors_list.setIconSize(QtCore.QSize(*self.thumbnails.size))
         screen_count = QtWidgets.QApplication.desktop().screenCount()
         
         for i in range(screen_count):
             screen_geometry = QtWidgets.QApplication.desktop().screenGeometry(i)
-            self.monitors_list.addItem(
+            item = QtWidgets.QListWidgetItem(
                 f"Monitor {i+1}: {screen_geometry.width()}x{screen_geometry.height()} "
                 f"at ({screen_geometry.x()}, {screen_geometry.y()})"
             )
+            self.monitors_list.addItem(item)
+            self._request_thumbnail(item, ("monitor", i), self._fixed_geometry(screen_geometry))
+        
+        # The whole desktop is recorded with one capture thread per monitor
+        if screen_count > 1:
+            desktop_geometry = QtWidgets.QApplication.desktop().geometry()
+            item = QtWidgets.QListWidgetItem(
+                f"All Monitors: {desktop_geometry.width()}x{desktop_geometry.height()} "
+                f"at ({desktop_geometry.x()}, {desktop_geometry.y()})"
+            )
+            self.monitors_list.addItem(item)
+            self._request_thumbnail(item, ("monitor", "all"), self._fixed_geometry(desktop_geometry))
         
         if screen_count > 0:
             self.monitors_list.setCurrentRow(0)
-            
+        
         monitor_layout.addWidget(QtWidgets.QLabel("Select a monitor to capture:"))
         monitor_layout.addWidget(self.monitors_list)
     
+    def _select_all_monitors(self, try_real_preview):
+        """Select the whole virtual desktop as the capture region"""
+        desktop_geometry = QtWidgets.QApplication.desktop().geometry()
+        capture_region = (
+            desktop_geometry.x(),
+            desktop_geometry.y(),
+            desktop_geometry.width(),
+            desktop_geometry.height()
+        )
+        self.all_monitors = True
+        
+        # Generate a preview
+        self._generate_region_preview("All Monitors", capture_region, try_real_preview)
+        
+        self.parent.parent.status_bar.showMessage(
+            f"Selected all monitors with region: {capture_region}"
+        )
+        return capture_region
+    
     def _setup_window_tab(self, tab):
         """Setup the window selection tab"""
         window_layout = QtWidgets.QVBoxLayout(tab)
         
-        # Get all window titles
+        # List the windows from the index
         self.windows_list = QtWidgets.QListWidget()
+        self.windows_list.setIconSize(QtCore.QSize(*self.thumbnails.size))
         
-        # Get all visible windows
-        try:
-            windows = gw.getAllTitles()
-            
-            for window_title in windows:
-                if window_title and len(window_title.strip()) > 0:
-                    self.windows_list.addItem(window_title)
-                    
-            if windows:
-                self.windows_list.setCurrentRow(0)
-        except ImportError:
+        if not PYGETWINDOW_AVAILABLE:
             self.windows_list.addItem("pygetwindow library not installed. Run 'pip install pygetwindow'")
             self.windows_list.setEnabled(False)
+        elif self.window_index.is_ready:
+            self._fill_windows_list()
+        else:
+            # The first enumeration is still running; fill the list as soon as it is done
+            self.windows_list.addItem("Loading windows...")
+            self.windows_list.setEnabled(False)
+            timer = QtCore.QTimer(tab)
+            timer.timeout.connect(lambda: self._fill_windows_list(timer))
+            timer.start(50)
         
         window_layout.addWidget(QtWidgets.QLabel("Select a window to capture:"))
         window_layout.addWidget(self.windows_list)
     
+    def _fill_windows_list(self, timer=None):
+        """Fill the window list from the index once it is ready"""
+        if not self.window_index.is_ready:
+            return
+        if timer is not None:
+            timer.stop()
+        
+        self.windows_list.clear()
+        self.windows_list.setEnabled(True)
+        for handle, title in self.window_index.windows():
+            item = QtWidgets.QListWidgetItem(title)
+            item.setData(QtCore.Qt.UserRole, handle)
+            self.windows_list.addItem(item)
+            # The geometry is looked up on the pool, not here
+            self._request_thumbnail(item, ("window", handle), functools.partial(self.window_index.geometry, handle))
+        
+        if self.windows_list.count() > 0:
+            self.windows_list.setCurrentRow(0)
+    
+    def update_windows_list(self, added, removed):
+        """Add new windows to and drop closed windows from the open dialog (runs on the GUI thread)"""
+        if not self._dialog_open or not self.windows_list.isEnabled():
+            # No dialog, or the list is still waiting for the first enumeration
+            return
+        windows_list = self.windows_list
+        
+        removed = set(removed)
+        for row in reversed(range(windows_list.count())):
+            handle = windows_list.item(row).data(QtCore.Qt.UserRole)
+            if handle in removed:
+                self._thumbnail_items.pop(("window", handle), None)
+                windows_list.takeItem(row)
+        
+        titles = dict(self.window_index.windows())
+        for handle in added:
+            if handle not in titles:
+                continue
+            item = QtWidgets.QListWidgetItem(titles[handle])
+            item.setData(QtCore.Qt.UserRole, handle)
+            windows_list.addItem(item)
+            self._request_thumbnail(item, ("window", handle), functools.partial(self.window_index.geometry, handle))
+        
+        if windows_list.currentRow() < 0 and windows_list.count() > 0:
+            windows_list.setCurrentRow(0)
+    
+    def _fixed_geometry(self, rect):
+        """Get a geometry function for a QRect that doesn't move"""
+        geometry = (rect.x(), rect.y(), rect.width(), rect.height())
+        return lambda: geometry
+    
+    def _request_thumbnail(self, item, source, geometry_fn):
+        """
+        Show a thumbnail on a list item as soon as it is available
+
+        The last cached thumbnail of the source is shown right away, unless the
+        capture was black; a fresh one is rendered in the background and
+        replaces it when it arrives.
+        """
+        self._thumbnail_items[source] = item
+        cached = self.thumbnails.request(source, geometry_fn, self.parent.region_thumbnail_ready.emit)
+        if cached is not None:
+            self.show_thumbnail(source, *cached)
+    
+    def show_thumbnail(self, source, qimage, is_black):
+        """Show a rendered thumbnail on its list item (runs on the GUI thread)"""
+        item = self._thumbnail_items.get(source)
+        if item is None or is_black:
+            # The dialog was closed, or the capture is blocked for this source
+            return
+        item.setIcon(QtGui.QIcon(QtGui.QPixmap.fromImage(qimage)))
+    
+    def show_region_preview(self, title, region, qimage, is_black):
+        """Show a region preview rendered in the background (runs on the GUI thread)"""
+        if is_black:
+            self._create_visual_preview(title, region)
+        else:
+            self.parent.update_preview(QtGui.QPixmap.fromImage(qimage))
+    
     def _generate_region_preview(self, title, region, try_real_preview=True):
         """Generate a preview of the selected region"""
         from CaptureKarma.utils.image_processing import ImageProcessor
         
         try:
+            if try_real_preview and MSS_AVAILABLE:
+                # Capture on the thumbnail pool, so the dialog closes without waiting for it
+                label = self.parent.preview_label
+                self.thumbnails.request(
+                    ("preview", title),
+                    lambda: region,
+                    lambda source, qimage, is_black: self.parent.region_preview_ready.emit(
+                        title, region, qimage, is_black
+                    ),
+                    size=(label.width(), label.height())
+                )
+                return
+            
             if try_real_preview:
                 # Try to capture an actual screenshot for preview
                 image_processor = ImageProcessor()
@@ -176,7 +337,7 @@ class RegionSelector:
             
             # If real preview fails or appears black, create a visual representation
             self._create_visual_preview(title, region)
-                
+        
         except Exception as e:
             print(f"Error generating preview: {str(e)}")
             import traceback
@@ -189,31 +350,15 @@ class RegionSelector:
         """Check if a pixmap is all black or empty"""
         if pixmap is None or pixmap.isNull():
             return True
-            
+        
         # Convert to image to check pixel values
         image = pixmap.toImage()
         if image.isNull():
             return True
-            
-        # Check a sample of pixels
-        sample_size = min(100, pixmap.width() * pixmap.height())
-        if sample_size == 0:
-            return True
-            
-        black_count = 0
-        step = max(1, pixmap.width() * pixmap.height() // sample_size)
-        
-        for i in range(0, pixmap.width() * pixmap.height(), step):
-            x = i % pixmap.width()
-            y = i // pixmap.width()
-            if y < pixmap.height():
-                pixel = image.pixel(x, y)
-                # Check if pixel is black or almost black
-                if QtGui.qRed(pixel) < 10 and QtGui.qGreen(pixel) < 10 and QtGui.qBlue(pixel) < 10:
-                    black_count += 1
-        
-        # If more than 95% of sampled pixels are black, consider it a black image
-        return black_count > (sample_size * 0.95)
+        
+        # Analyze a strided view of the image memory instead of reading pixels one by one
+        pixels, image = qimage_to_array(image)
+        return is_frame_black(pixels)
     
     def _create_visual_preview(self, title, region):
         """Create a visual representation of the capture region"""
@@ -1,14 +1,10 @@
 """
 Screenshot capture functionality for the CaptureKarma Screen Capture Tool
 """
-import os
-import datetime
 import threading
-import pyautogui
-from PIL import Image
 
+from CaptureKarma.engine.screenshot import ScreenshotEngine
 from CaptureKarma.utils.image_processing import ImageProcessor
-from CaptureKarma.utils.scrolling import ScrollingManager
 
 
 class ScreenshotCapture:
@@ -17,145 +13,156 @@ class ScreenshotCapture:
     def __init__(self, parent):
         self.parent = parent
         self.image_processor = ImageProcessor()
-        self.scrolling_manager = ScrollingManager()
+        
+        # The engine grabs and encodes; this class only reports to the main window
+        self.engine = ScreenshotEngine(status_callback=self._show_status)
+        
+        # State for burst and interval captures
+        self.series_stop_event = threading.Event()
+        self.series_thread = None
+    
+    @property
+    def is_capturing_series(self):
+        """Whether a burst or interval capture is in progress"""
+        return self.series_thread is not None and self.series_thread.is_alive()
     
-    def take_screenshot(self, region, output_dir, 
-                       scrolling_enabled=False, scroll_amount=0, 
-                       scroll_duration=0, scroll_step=5):
+    def take_screenshot(self, region, output_dir,
+                       scrolling_enabled=False, scroll_amount=0,
+                       scroll_duration=0, scroll_step=5, stop_at_end=False, encoder=None):
         """
         Take a screenshot of the specified region
-        
+
         Args:
-            region: Tuple (x, y, width, height) defining the region to capture
+            region: Tuple (x, y, width, height) defining the region to capture, or a list
+                of such tuples to save several regions from the same moment
             output_dir: Directory to save the screenshot
             scrolling_enabled: Whether to perform scrolling before capture
             scroll_amount: Amount to scroll (negative for down, positive for up)
             scroll_duration: Duration of scrolling in seconds
             scroll_step: Size of each scroll step (smaller = smoother)
+            stop_at_end: Stop scrolling early once the end of the page is reached
+            encoder: Optional ImageEncoder choosing the file format
         """
         if not region:
-            self.parent.parent.status_bar.showMessage("Please select a region first")
+            self._show_status("Please select a region first")
             return
         
         try:
-            # Create a timestamp for the filename
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(output_dir, f"screenshot_{timestamp}.png")
-            
             # Log what we're doing
-            self.parent.parent.status_bar.showMessage("Preparing to take screenshot...")
-            
-            # If scrolling is enabled, perform scrolling and capture
-            if scrolling_enabled:
-                self._take_screenshot_with_scrolling(
-                    region, filename, scroll_amount, scroll_duration, scroll_step
-                )
-            else:
-                # Take the screenshot without scrolling
-                self._take_screenshot_direct(region, filename)
-            
-            # Try to show a small preview thumbnail
-            self._show_thumbnail_preview(filename)
-            
-            # Open the folder so the user can check the screenshot
-            self.parent.parent.open_output_folder()
+            self._show_status("Preparing to take screenshot...")
+            
+            result = self.engine.capture(
+                region, output_dir,
+                scrolling_enabled=scrolling_enabled,
+                scroll_amount=scroll_amount,
+                scroll_duration=scroll_duration,
+                scroll_step=scroll_step,
+                stop_at_end=stop_at_end,
+                encoder=encoder
+            )
+            result.add_done_callback(self._on_screenshot_saved)
             
+            # Build the preview thumbnail from the captured pixels, off the GUI thread
+            self.engine.encode_pool.submit(self._render_thumbnail, result.pixels, result.channel_order)
+        
         except Exception as e:
-            self.parent.parent.status_bar.showMessage(f"Error taking screenshot: {str(e)}")
+            self._show_status(f"Error taking screenshot: {str(e)}")
             import traceback
             traceback.print_exc()
     
-    def _take_screenshot_direct(self, region, filename):
-        """Take a direct screenshot without scrolling"""
+    def take_burst(self, region, output_dir, count, interval, encoder=None):
+        """
+        Take a fixed number of screenshots at a fixed interval
+
+        Args:
+            region: Tuple (x, y, width, height) defining the region to capture
+            output_dir: Directory to save the screenshots
+            count: Number of screenshots to take
+            interval: Time between screenshots in seconds
+            encoder: Optional ImageEncoder choosing the file format
+        """
+        self._start_series(region, output_dir, count, interval, encoder)
+    
+    def start_interval(self, region, output_dir, interval, encoder=None):
+        """
+        Take a screenshot every interval seconds until stop_series() is called
+
+        Args:
+            region: Tuple (x, y, width, height) defining the region to capture
+            output_dir: Directory to save the screenshots
+            interval: Time between screenshots in seconds
+            encoder: Optional ImageEncoder choosing the file format
+        """
+        self._start_series(region, output_dir, None, interval, encoder)
+    
+    def stop_series(self):
+        """Stop a burst or interval capture in progress"""
+        self.series_stop_event.set()
+    
+    def _start_series(self, region, output_dir, count, interval, encoder):
+        """Start capturing a series of screenshots in a background thread"""
+        if not region:
+            self._show_status("Please select a region first")
+            return
+        if self.is_capturing_series:
+            self._show_status("A screenshot series is already running")
+            return
+        
+        self.series_stop_event.clear()
+        self.series_thread = threading.Thread(
+            target=self._capture_series,
+            args=(region, output_dir, count, interval, encoder)
+        )
+        self.series_thread.daemon = True
+        self.series_thread.start()
+    
+    def _capture_series(self, region, output_dir, count, interval, encoder):
+        """Run a series on the engine and report the result (runs on the series thread)"""
         try:
-            # Try using MSS first (better for multi-monitor setups)
-            try:
-                import mss
-                
-                with mss.mss() as sct:
-                    # Get region dimensions
-                    x, y, width, height = region
-                    
-                    # Define the region to capture
-                    monitor = {"top": y, "left": x, "width": width, "height": height}
-                    
-                    # Capture the screenshot
-                    sct_img = sct.grab(monitor)
-                    
-                    # Convert to PIL Image
-                    from PIL import Image
-                    screenshot = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                    
-                    self.parent.parent.status_bar.showMessage("Screenshot taken using MSS (Windows native API)")
-            except Exception as e:
-                print(f"MSS screenshot failed: {str(e)}, trying fallback")
-                
-                # Second attempt: Try standard pyautogui approach
-                screenshot = pyautogui.screenshot(region=region)
-                self.parent.parent.status_bar.showMessage("Screenshot taken using PyAutoGUI")
-            
-            # Save the screenshot and check if it's black
-            screenshot.save(filename)
-            
-            # Check if the screenshot is all black
-            if self.image_processor.is_image_black(screenshot):
-                self.parent.parent.status_bar.showMessage(
-                    "Warning: Screenshot appears to be all black. "
-                    "This may be due to Windows security restrictions."
-                )
-            else:
-                self.parent.parent.status_bar.showMessage(f"Screenshot saved to {filename}")
-                
-            return screenshot
-            
+            result = self.engine.capture_series(
+                region, output_dir, count, interval, encoder=encoder, cancel_event=self.series_stop_event
+            )
+            self._show_status(f"Saved {result.count} screenshots to {output_dir}")
+            self.parent.parent.open_output_folder()
         except Exception as e:
-            self.parent.parent.status_bar.showMessage(f"Error taking direct screenshot: {str(e)}")
-            raise
+            self._show_status(f"Error taking screenshot series: {str(e)}")
+            import traceback
+            traceback.print_exc()
     
-    def _take_screenshot_with_scrolling(self, region, filename, scroll_amount, scroll_duration, scroll_step):
-        """Take a screenshot after performing scrolling"""
-        self.parent.parent.status_bar.showMessage("Taking screenshot with scrolling...")
+    def _on_screenshot_saved(self, result):
+        """Report the result of a background save (runs on the encoding pool)"""
+        if result.error is not None:
+            self._show_status(f"Error saving screenshot: {str(result.error)}")
+            return
         
-        # Wait a moment to switch to target window
-        self.parent.parent.status_bar.showMessage("Switch to your target window! Taking screenshot in 3 seconds...")
+        # Check if the screenshot is all black
+        if result.is_black:
+            self._show_status(
+                "Warning: Screenshot appears to be all black. "
+                "This may be due to Windows security restrictions."
+            )
+        else:
+            self._show_status(f"Screenshot saved to {result.filenames[-1]}")
         
+        # Open the folder so the user can check the screenshot
+        self.parent.parent.open_output_folder()
+    
+    def _render_thumbnail(self, pixels, channel_order):
+        """Downscale the captured pixels and hand the thumbnail to the GUI thread"""
         try:
-            # Move mouse to capture region center to ensure scrolling works
-            x = region[0] + region[2] // 2
-            y = region[1] + region[3] // 2
-            self.scrolling_manager.smooth_move(x, y, duration=0.5)
-            pyautogui.click()
-            
-            # Perform the scroll
-            self.scrolling_manager.smooth_scroll(
-                scroll_amount,
-                scroll_duration,
-                scroll_step,
-                status_callback=lambda msg: self.parent.parent.status_bar.showMessage(msg)
-            )
-            
-            # Take final screenshot
-            self._take_screenshot_direct(region, filename)
-            
+            qimage = self.image_processor.thumbnail_qimage(pixels, 200, channel_order)
+            self.parent.thumbnail_ready.emit(qimage)
         except Exception as e:
-            self.parent.parent.status_bar.showMessage(f"Error during scrolling screenshot: {str(e)}")
-            raise
+            print(f"Error creating thumbnail: {str(e)}")
     
-    def _show_thumbnail_preview(self, filename):
-        """Show a small thumbnail preview of the captured screenshot"""
+    def show_thumbnail_preview(self, qimage):
+        """Show a small thumbnail preview of the captured screenshot (GUI thread)"""
         try:
             from PyQt5 import QtWidgets, QtCore, QtGui
             
-            # Load the image
-            image = Image.open(filename)
-            
-            # Create a small thumbnail preview
-            thumb = image.copy()
-            thumb.thumbnail((200, 200))
-            
             # Convert to QPixmap
-            pixmap = self.image_processor.pil_to_pixmap(thumb)
-            if not pixmap:
+            pixmap = QtGui.QPixmap.fromImage(qimage)
+            if pixmap.isNull():
                 return
             
             # Show a smaller thumbnail in the corner
@@ -169,4 +176,8 @@ class ScreenshotCapture:
             # Auto close after 3 seconds
             QtCore.QTimer.singleShot(3000, small_preview.close)
         except Exception as e:
-            print(f"Error showing thumbnail: {str(e)}")
\ No newline at end of file
+            print(f"Error showing thumbnail: {str(e)}")
+    
+    def _show_status(self, message):
+        """Show an engine message in the status bar"""
+        self.parent.parent.status_bar.showMessage(message)
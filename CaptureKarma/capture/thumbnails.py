@@ -0,0 +1,151 @@
+"""
+Background thumbnails for the CaptureKarma Screen Capture Tool
+
+Small previews of monitors and windows are rendered on a thread pool and
+kept in a size-bounded LRU cache keyed by source and geometry, so the region
+selection dialog can show them as they arrive and reopen instantly.
+"""
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from CaptureKarma.utils.frame_analysis import mss_to_array, is_frame_black
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+from CaptureKarma.utils.qt_conversion import array_to_qimage
+
+cv2 = lazy_import("cv2")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+
+class ThumbnailCache:
+    """Size-bounded LRU cache of thumbnails keyed by (source, geometry)
+
+    Every entry is a (QImage, is_black) tuple, so a cached thumbnail keeps its
+    black-capture warning.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        # Last geometry seen for every source, to find its most recent thumbnail
+        self._latest = {}
+        self._lock = threading.Lock()
+    
+    def get(self, source, geometry):
+        """Get the (image, is_black) entry for a source at a geometry, or None"""
+        with self._lock:
+            entry = self._entries.get((source, geometry))
+            if entry is not None:
+                self._entries.move_to_end((source, geometry))
+            return entry
+    
+    def latest(self, source):
+        """Get the most recent (image, is_black) entry of a source, whatever its geometry, or None"""
+        with self._lock:
+            geometry = self._latest.get(source)
+        return None if geometry is None else self.get(source, geometry)
+    
+    def put(self, source, geometry, image, is_black=False):
+        """Store a thumbnail, evicting the least recently used ones beyond max_entries"""
+        with self._lock:
+            self._entries[(source, geometry)] = (image, is_black)
+            self._entries.move_to_end((source, geometry))
+            self._latest[source] = geometry
+            while len(self._entries) > self.max_entries:
+                (old_source, old_geometry), _ = self._entries.popitem(last=False)
+                if self._latest.get(old_source) == old_geometry:
+                    del self._latest[old_source]
+
+
+class ThumbnailRenderer:
+    """Renders monitor and window thumbnails on a worker thread pool"""
+    
+    def __init__(self, size=(160, 90), workers=4, cache=None):
+        """
+        Args:
+            size: Maximum (width, height) of a thumbnail
+            workers: Number of rendering threads
+            cache: Optional ThumbnailCache (a new one is created by default)
+        """
+        self.size = size
+        self.cache = cache or ThumbnailCache()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        # MSS sessions can't be shared between threads; each worker opens its own
+        self._local = threading.local()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+    
+    def request(self, source, geometry_fn, callback, size=None):
+        """
+        Render a thumbnail in the background
+
+        Args:
+            source: Hashable identifier, e.g. ("window", handle) or ("monitor", index)
+            geometry_fn: Function returning the current (x, y, width, height) of the source, or None
+            callback: Called on a worker thread as callback(source, qimage, is_black)
+            size: Optional maximum (width, height), overriding the default size
+
+        Returns:
+            The most recent cached (qimage, is_black) entry of the source (possibly stale), or None
+        """
+        if MSS_AVAILABLE:
+            future = self.pool.submit(self._render, source, geometry_fn, callback, size or self.size)
+            with self._pending_lock:
+                self._pending.add(future)
+            future.add_done_callback(self._discard_pending)
+        return self.cache.latest(source)
+    
+    def cancel_pending(self):
+        """Drop the requests that haven't started rendering yet"""
+        with self._pending_lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+    
+    def shutdown(self):
+        """Stop the worker threads"""
+        self.cancel_pending()
+        self.pool.shutdown(wait=False)
+    
+    def _discard_pending(self, future):
+        """Forget a finished or cancelled request"""
+        with self._pending_lock:
+            self._pending.discard(future)
+    
+    def _render(self, source, geometry_fn, callback, size):
+        """Grab and downscale one source (runs on the pool)"""
+        try:
+            geometry = geometry_fn()
+            if geometry is None or geometry[2] <= 0 or geometry[3] <= 0:
+                return
+            
+            cache = self.cache if size == self.size else None
+            entry = cache.get(source, geometry) if cache else None
+            if entry is None:
+                x, y, width, height = geometry
+                pixels = mss_to_array(self._get_sct().grab({"top": y, "left": x, "width": width, "height": height}))
+                scale = min(size[0] / width, size[1] / height, 1.0)
+                thumb = cv2.resize(
+                    pixels, (max(1, int(width * scale)), max(1, int(height * scale))),
+                    interpolation=cv2.INTER_AREA
+                )
+                image = array_to_qimage(thumb, "BGRA").detached()
+                is_black = is_frame_black(thumb)
+                if cache:
+                    cache.put(source, geometry, image, is_black)
+            else:
+                image, is_black = entry
+            
+            callback(source, image, is_black)
+        except Exception as e:
+            print(f"Error rendering thumbnail for {source}: {str(e)}")
+    
+    def _get_sct(self):
+        """Get this worker thread's MSS session"""
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
@@ -0,0 +1,210 @@
+"""
+Window index for the CaptureKarma Screen Capture Tool
+
+Top-level windows are indexed by their native handle and kept up to date by
+a background thread. A refresh only looks up the titles of windows that
+appeared since the last one and drops those that were closed, so the region
+dialog can list hundreds of windows without enumerating on the GUI thread.
+Window geometry is cached for a short time, so repeated lookups don't hit
+the window system on every call.
+"""
+import threading
+import time
+
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+
+PYGETWINDOW_AVAILABLE = module_available("pygetwindow")
+gw = lazy_import("pygetwindow")
+
+
+class WindowIndex:
+    """Indexes top-level windows by native handle"""
+    
+    def __init__(self, refresh_interval=2.0, geometry_ttl=0.5):
+        """
+        Args:
+            refresh_interval: Seconds between background refreshes
+            geometry_ttl: Seconds a cached window geometry stays valid
+        """
+        self.refresh_interval = refresh_interval
+        self.geometry_ttl = geometry_ttl
+        
+        # handle -> (window, title), in enumeration (z) order
+        self._windows = {}
+        # handle -> (timestamp, (x, y, width, height))
+        self._geometry = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        
+        self.ready_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def is_ready(self):
+        """Whether the first refresh has completed"""
+        return self.ready_event.is_set()
+    
+    def start(self):
+        """Start refreshing the index in the background (safe to call more than once)"""
+        if not PYGETWINDOW_AVAILABLE:
+            print("WARNING: pygetwindow not available. Install with 'pip install pygetwindow' to list windows.")
+            self.ready_event.set()
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop)
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background refresh"""
+        self._stop_event.set()
+    
+    def add_listener(self, callback):
+        """
+        Register a callback for index changes
+
+        The callback receives the lists of added and removed handles and is
+        called from the refresh thread.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Remove a previously registered listener"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def refresh(self):
+        """
+        Bring the index up to date with the open windows
+
+        Only windows that are new since the last refresh have their titles read.
+
+        Returns:
+            Tuple (added, removed) with lists of handles
+        """
+        current = {}
+        for window in gw.getAllWindows():
+            handle = window_handle(window)
+            if handle is not None:
+                current[handle] = window
+        
+        with self._lock:
+            known = self._windows
+        
+        removed = [handle for handle in known if handle not in current]
+        added = []
+        windows = {}
+        for handle, window in current.items():
+            if handle in known:
+                windows[handle] = known[handle]
+                continue
+            try:
+                title = window.title
+            except Exception:
+                continue
+            if title and title.strip():
+                windows[handle] = (window, title)
+                added.append(handle)
+        
+        with self._lock:
+            self._windows = windows
+            for handle in removed:
+                self._geometry.pop(handle, None)
+            listeners = list(self._listeners)
+        
+        if added or removed:
+            for callback in listeners:
+                try:
+                    callback(added, removed)
+                except Exception as e:
+                    print(f"Error in window index listener: {str(e)}")
+        return added, removed
+    
+    def windows(self):
+        """Get a snapshot of the indexed windows as a list of (handle, title) tuples"""
+        with self._lock:
+            return [(handle, title) for handle, (window, title) in self._windows.items()]
+    
+    def get(self, handle):
+        """Get the pygetwindow object for a handle, or None if the window is not indexed"""
+        with self._lock:
+            entry = self._windows.get(handle)
+        return entry[0] if entry else None
+    
+    def title(self, handle):
+        """Get the current title of a window (read from the window system)"""
+        window = self.get(handle)
+        if window is None:
+            return None
+        try:
+            return window.title
+        except Exception:
+            return None
+    
+    def geometry(self, handle, max_age=None):
+        """
+        Get a window's geometry
+
+        Args:
+            handle: Native window handle
+            max_age: Maximum age of a cached value in seconds (defaults to geometry_ttl;
+                0 always reads the window system)
+
+        Returns:
+            Tuple (x, y, width, height), or None if the window no longer exists
+        """
+        max_age = self.geometry_ttl if max_age is None else max_age
+        now = time.monotonic()
+        
+        with self._lock:
+            cached = self._geometry.get(handle)
+        if cached is not None and now - cached[0] <= max_age:
+            return cached[1]
+        
+        window = self.get(handle)
+        if window is None:
+            return None
+        try:
+            # One window-rect query instead of one per property
+            box = window.box
+        except Exception:
+            return None
+        
+        geometry = (box.left, box.top, box.width, box.height)
+        with self._lock:
+            self._geometry[handle] = (now, geometry)
+        return geometry
+    
+    def _refresh_loop(self):
+        """Refresh the index until stopped (runs on the background thread)"""
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing window index: {str(e)}")
+            self.ready_event.set()
+            self._stop_event.wait(self.refresh_interval)
+
+
+def window_handle(window):
+    """Get the native handle of a pygetwindow window, or None if it has none"""
+    return getattr(window, "_hWnd", None)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_window_index():
+    """Get the application-wide window index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = WindowIndex()
+        return _index
@@ -0,0 +1,69 @@
+"""
+Window tracking for the CaptureKarma Screen Capture Tool
+
+A recording can follow its target window when it is moved or resized. The
+window's geometry is polled at a low rate on a background thread and
+published as a single tuple, so the capture loop picks up the new rectangle
+between frames without making any window-system calls itself.
+"""
+import threading
+
+from CaptureKarma.capture.window_index import get_window_index
+
+
+class WindowTracker:
+    """Follows the geometry of one window on a background thread"""
+    
+    def __init__(self, handle, region, rate=5.0, window_index=None):
+        """
+        Args:
+            handle: Native handle of the window to follow
+            region: Initial (x, y, width, height) of the window
+            rate: Geometry polls per second
+            window_index: Optional WindowIndex (defaults to the application-wide index)
+        """
+        self.handle = handle
+        self.rate = rate
+        self.window_index = window_index or get_window_index()
+        
+        # Replaced as a whole, so readers always see a consistent rectangle
+        self.region = tuple(region)
+        self.lost = False
+        
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start tracking the window"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._track_loop)
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        """Stop tracking the window"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+    
+    def _track_loop(self):
+        """Poll the window geometry until stopped (runs on the tracking thread)"""
+        interval = 1.0 / self.rate
+        while not self._stop_event.wait(interval):
+            geometry = self.window_index.geometry(self.handle, max_age=interval / 2)
+            
+            if geometry is None:
+                # The window was closed; keep recording the last known rectangle
+                if not self.lost:
+                    print("Tracked window is gone, keeping its last position")
+                    self.lost = True
+                continue
+            
+            # Minimized windows report an empty or off-screen rectangle
+            x, y, width, height = geometry
+            if width <= 0 or height <= 0 or x <= -32000:
+                continue
+            
+            if geometry != self.region:
+                self.region = geometry
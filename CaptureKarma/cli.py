@@ -0,0 +1,417 @@
+"""
+Command-line batch capture for the CaptureKarma Screen Capture Tool
+
+Runs a job file of screenshots, bursts and recordings back to back on one
+set of capture engines, so the MSS session, the encoding pool and the image
+encoders are set up once for the whole batch instead of once per job, and
+writes a summary with the timing of every job.
+
+A job file is JSON or TOML:
+
+    output_dir = "release-42"
+
+    [defaults]
+    format = "webp"
+
+    [[jobs]]
+    name = "pricing-page"
+    type = "screenshot"
+    region = [0, 0, 1920, 1080]
+    scroll = { amount = -2000, duration = 4, step = 5, stop_at_end = true }
+
+    [[jobs]]
+    name = "dashboard-tour"
+    type = "recording"
+    monitor = 1
+    duration = 12
+    fps = 30
+    quality = "high"
+    crop = [0, 40, 1920, 1000]
+    watermark = { image = "logo.png", position = "bottom-right", opacity = 0.8 }
+    masks = [[1500, 20, 380, 32], { rect = [200, 900, 640, 28], anchored = true }]
+    animation = { format = "gif", fps = 12, max_width = 800 }
+
+    [[jobs]]
+    name = "scroll-and-snap"
+    type = "scenario"
+    region = [0, 0, 1280, 720]
+    steps = [
+        { action = "start_recording", track = "capture" },
+        { action = "move", track = "input", x = 640, y = 360, duration = 0.5 },
+        { action = "scroll", track = "input", amount = -2000, duration = 6, delay = 0.5 },
+        { action = "screenshot", track = "capture", at = 7.5 },
+        { action = "stop_recording", track = "capture", at = 8 },
+    ]
+
+    [[jobs]]
+    name = "session-overview"
+    type = "contact_sheet"
+    folder = "release-42"
+    count = 16
+
+Every job needs a type ("screenshot", "burst", "recording", "scenario" or
+"contact_sheet") and, except for contact sheets, either a region ([x, y,
+width, height], or a list of them) or a 1-based monitor number; scenario jobs
+need a list of steps and use the region as the default for their capture
+steps. Contact sheet jobs make a poster and a contact sheet for every
+recording in a folder (the output directory by default), skipping recordings
+that haven't changed since the last run. Recording jobs can add a crop, a watermark
+and padding (with an RGB padding_color), applied to every frame while it is
+recorded, and draw the mouse pointer (cursor = true) and click ripples
+(clicks = true). Screenshot, burst and recording jobs can hide masks, given
+in screen coordinates as [x, y, width, height], or as { rect, anchored } for
+masks that scroll with the page, by pixelation (mask_mode = "pixelate") or
+blurring (mask_mode = "blur"). Masks that scroll with the page need a
+recording; screenshot jobs that scroll only take fixed masks. Recording jobs can also export each video as
+a looping animation: animation = "gif", "apng" or "webp", or a table with a
+format and any AnimationExporter option. Keys in [defaults] apply to every
+job that doesn't set them.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from CaptureKarma.engine import (
+    ScreenshotEngine, RecordingEngine, Scenario, ScenarioRunner, Crop, Padding, Watermark,
+    PrivacyMask, MaskRegion, AnimationExporter, ContactSheetGenerator
+)
+from CaptureKarma.engine.animation import FORMAT_GIF
+from CaptureKarma.engine.privacy import MASK_PIXELATE
+from CaptureKarma.utils.encoders import ImageEncoder, FORMAT_EXTENSIONS, FORMAT_PNG
+
+try:
+    import tomllib
+    TOML_AVAILABLE = True
+except ImportError:
+    try:
+        import tomli as tomllib
+        TOML_AVAILABLE = True
+    except ImportError:
+        TOML_AVAILABLE = False
+
+
+JOB_SCREENSHOT = "screenshot"
+JOB_BURST = "burst"
+JOB_RECORDING = "recording"
+JOB_SCENARIO = "scenario"
+JOB_CONTACT_SHEET = "contact_sheet"
+
+QUALITY_INDEXES = {"low": 0, "medium": 1, "high": 2}
+
+
+def load_jobs(path):
+    """
+    Load a job file
+
+    Args:
+        path: Path to a .json or .toml job file
+
+    Returns:
+        Dict with "output_dir" (or None), "defaults" and "jobs"
+    """
+    if path.lower().endswith(".toml"):
+        if not TOML_AVAILABLE:
+            raise ImportError("Reading TOML job files needs Python 3.11 or 'pip install tomli'")
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    
+    jobs = data.get("jobs")
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError(f"{path} has no jobs")
+    
+    defaults = data.get("defaults", {})
+    merged = []
+    for index, job in enumerate(jobs):
+        job = dict(defaults, **job)
+        job.setdefault("name", f"job{index + 1}")
+        if job.get("type") not in (JOB_SCREENSHOT, JOB_BURST, JOB_RECORDING, JOB_SCENARIO, JOB_CONTACT_SHEET):
+            raise ValueError(f"Job '{job['name']}' has an unknown type: {job.get('type')}")
+        if job["type"] == JOB_SCENARIO:
+            # Build the timeline now so a bad step fails before anything is captured
+            job["scenario"] = Scenario.from_steps(job.get("steps", []))
+        elif job["type"] != JOB_CONTACT_SHEET and "region" not in job and "monitor" not in job:
+            raise ValueError(f"Job '{job['name']}' needs a region or a monitor")
+        
+        # The scroll before a screenshot isn't measured, so anchored masks would land in the wrong place
+        if job["type"] == JOB_SCREENSHOT and job.get("scroll") and any(
+            isinstance(mask, dict) and mask.get("anchored") for mask in job.get("masks", [])
+        ):
+            raise ValueError(f"Job '{job['name']}' scrolls before its screenshot, so its masks can't be anchored")
+        merged.append(job)
+    
+    return {"output_dir": data.get("output_dir"), "defaults": defaults, "jobs": merged}
+
+
+class BatchRunner:
+    """Runs capture jobs back to back, sharing the engines between them"""
+    
+    def __init__(self, output_dir, countdown=0.0, status_callback=None):
+        """
+        Args:
+            output_dir: Directory the job outputs are written to
+            countdown: Seconds to wait before each recording starts
+            status_callback: Optional callback receiving progress messages
+        """
+        self.output_dir = output_dir
+        self.countdown = countdown
+        
+        # Created once for the whole batch
+        self.screenshot_engine = ScreenshotEngine(status_callback=status_callback)
+        self.recording_engine = RecordingEngine(status_callback=status_callback)
+        self._encoders = {}
+    
+    def run(self, jobs, fail_fast=False):
+        """
+        Run jobs in order
+
+        Args:
+            jobs: List of job dicts, as returned by load_jobs()
+            fail_fast: Stop at the first failed job instead of continuing
+
+        Returns:
+            List of per-job summary dicts
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        summaries = []
+        
+        for job in jobs:
+            print(f"Running {job['type']} job '{job['name']}'")
+            start = time.perf_counter()
+            try:
+                files = self.run_job(job)
+                summary = {"status": "ok", "files": files}
+            except Exception as e:
+                print(f"Job '{job['name']}' failed: {str(e)}")
+                summary = {"status": "failed", "files": [], "error": str(e)}
+            
+            summary.update(name=job["name"], type=job["type"], seconds=time.perf_counter() - start)
+            summaries.append(summary)
+            if fail_fast and summary["status"] != "ok":
+                break
+        
+        return summaries
+    
+    def run_job(self, job):
+        """
+        Run a single job
+
+        Returns:
+            List of the files the job wrote
+        """
+        if job["type"] == JOB_CONTACT_SHEET:
+            generator = ContactSheetGenerator(
+                count=job.get("count", 12), columns=job.get("columns", 4), thumb_width=job.get("thumb_width", 320),
+                status_callback=self.screenshot_engine.status_callback
+            )
+            results = generator.process_folder(job.get("folder", self.output_dir), self.output_dir)
+            failed = [result for result in results if result.error is not None]
+            if failed:
+                raise failed[0].error
+            return [filename for result in results for filename in result.filenames]
+        
+        regions = self._get_regions(job)
+        
+        if job["type"] == JOB_SCENARIO:
+            runner = ScenarioRunner(
+                self.output_dir, region=regions,
+                screenshot_engine=self.screenshot_engine,
+                recording_engine=self.recording_engine,
+                status_callback=self.screenshot_engine.status_callback
+            )
+            result = runner.run(job["scenario"])
+            if result.error is not None:
+                raise result.error
+            return result.filenames
+        
+        if job["type"] == JOB_SCREENSHOT:
+            scroll = job.get("scroll")
+            encoder = self._get_encoder(job)
+            result = self.screenshot_engine.capture(
+                regions, self.output_dir,
+                scrolling_enabled=bool(scroll),
+                scroll_amount=scroll.get("amount", 0) if scroll else 0,
+                scroll_duration=scroll.get("duration", 0) if scroll else 0,
+                scroll_step=scroll.get("step", 5) if scroll else 5,
+                stop_at_end=bool(scroll and scroll.get("stop_at_end")),
+                encoder=encoder,
+                filename=self._output_path(job, encoder.extension),
+                privacy_mask=self._get_privacy_mask(job)
+            )
+            return result.wait()
+        
+        if job["type"] == JOB_BURST:
+            result = self.screenshot_engine.capture_series(
+                regions, self.output_dir, job.get("count", 5), job.get("interval", 1.0),
+                encoder=self._get_encoder(job),
+                privacy_mask=self._get_privacy_mask(job)
+            )
+            return result.filenames
+        
+        scroll = job.get("scroll")
+        output_format = job.get("video_format", "mp4")
+        quality = job.get("quality", "high")
+        result = self.recording_engine.record(
+            regions, self.output_dir, job.get("duration", 10),
+            fps=job.get("fps", 30),
+            quality_index=QUALITY_INDEXES.get(quality, quality),
+            output_format=output_format,
+            scrolling_enabled=bool(scroll),
+            scroll_amount=scroll.get("amount", 0) if scroll else 0,
+            scroll_duration=scroll.get("duration", 0) if scroll else 0,
+            scroll_step=scroll.get("step", 5) if scroll else 5,
+            stop_at_end=bool(scroll and scroll.get("stop_at_end")),
+            macro_file=job.get("macro"),
+            countdown=job.get("countdown", self.countdown),
+            filename=self._output_path(job, output_format),
+            effects=self._get_effects(job),
+            privacy_mask=self._get_privacy_mask(job),
+            show_cursor=job.get("cursor", False),
+            show_clicks=job.get("clicks", False)
+        )
+        print(f"Recorded {result.frame_count} frames at {result.effective_fps:.1f} fps")
+        
+        files = list(result.filenames)
+        if job.get("animation"):
+            files.extend(self._export_animations(job["animation"], result.filenames))
+        return files
+    
+    def close(self):
+        """Wait for pending files and release the engines"""
+        self.screenshot_engine.close()
+    
+    def _get_regions(self, job):
+        """Get the capture region(s) of a job"""
+        if "monitor" in job:
+            return self.screenshot_engine.monitor_region(job["monitor"])
+        region = job.get("region")
+        if region is None:
+            return None
+        if region and isinstance(region[0], (list, tuple)):
+            return [tuple(r) for r in region]
+        return tuple(region)
+    
+    def _get_effects(self, job):
+        """Get the video effects of a recording job: crop, then watermark, then padding"""
+        effects = []
+        if job.get("crop"):
+            effects.append(Crop(*job["crop"]))
+        
+        watermark = job.get("watermark")
+        if watermark:
+            if isinstance(watermark, str):
+                watermark = {"image": watermark}
+            effects.append(Watermark(**watermark))
+        
+        padding = job.get("padding")
+        if padding:
+            if isinstance(padding, int):
+                padding = [padding] * 4
+            # Colors are given as RGB in job files; frames are BGR
+            red, green, blue = job.get("padding_color", (0, 0, 0))
+            effects.append(Padding(*padding, color=(blue, green, red)))
+        return effects
+    
+    def _export_animations(self, animation, videos):
+        """Export recorded videos as animations next to them"""
+        options = {"format": animation} if isinstance(animation, str) else dict(animation)
+        exporter = AnimationExporter(
+            options.pop("format", FORMAT_GIF),
+            status_callback=self.recording_engine.status_callback,
+            **options
+        )
+        return [exporter.export(video).filename for video in videos]
+    
+    def _get_privacy_mask(self, job):
+        """Get the privacy mask of a job, or None if it has no masks"""
+        masks = []
+        for mask in job.get("masks", []):
+            if isinstance(mask, dict):
+                masks.append(MaskRegion(*mask["rect"], anchored=mask.get("anchored", False)))
+            else:
+                masks.append(MaskRegion(*mask))
+        if not masks:
+            return None
+        return PrivacyMask(masks, mode=job.get("mask_mode", MASK_PIXELATE), strength=job.get("mask_strength", 12))
+    
+    def _get_encoder(self, job):
+        """Get an image encoder for the job's format settings, reusing one made for an earlier job"""
+        key = (job.get("format", FORMAT_PNG), job.get("png_compression", 6), job.get("jpeg_quality", 92))
+        if key not in self._encoders:
+            self._encoders[key] = ImageEncoder(key[0], png_compression=key[1], jpeg_quality=key[2])
+        return self._encoders[key]
+    
+    def _output_path(self, job, extension):
+        """Get the output path of a job, or None to use a timestamped name"""
+        output = job.get("output")
+        if not output:
+            return None
+        if not os.path.splitext(output)[1]:
+            output = f"{output}.{extension}"
+        return os.path.join(self.output_dir, output)
+
+
+def format_summary(summaries):
+    """Format job summaries as a plain-text table"""
+    lines = [f"{'Job':<30}{'Type':<14}{'Status':<8}{'Files':>6}{'Time (s)':>10}"]
+    for summary in summaries:
+        lines.append(
+            f"{summary['name']:<30}{summary['type']:<14}{summary['status']:<8}"
+            f"{len(summary['files']):>6}{summary['seconds']:>10.2f}"
+        )
+    total = sum(summary["seconds"] for summary in summaries)
+    lines.append(f"{len(summaries)} jobs in {total:.2f} s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Entry point of the capturekarma command"""
+    parser = argparse.ArgumentParser(
+        prog="capturekarma",
+        description="Run a batch of screenshots and recordings from a JSON or TOML job file"
+    )
+    parser.add_argument("job_file", help="Path to the job file")
+    parser.add_argument("-o", "--output-dir", help="Output directory (overrides the job file)")
+    parser.add_argument("--summary", help="Where to write the JSON summary (default: summary.json in the output directory)")
+    parser.add_argument("--countdown", type=float, default=0.0, help="Seconds to wait before each recording")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop at the first failed job")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't print progress messages")
+    args = parser.parse_args(argv)
+    
+    try:
+        batch = load_jobs(args.job_file)
+    except Exception as e:
+        print(f"Error reading {args.job_file}: {str(e)}", file=sys.stderr)
+        return 2
+    
+    output_dir = args.output_dir or batch["output_dir"] or os.path.join(
+        os.path.expanduser("~"), "Documents", "CaptureKarma"
+    )
+    unknown_formats = {job["format"] for job in batch["jobs"] if job.get("format", FORMAT_PNG) not in FORMAT_EXTENSIONS}
+    if unknown_formats:
+        print(f"Unknown image format(s): {', '.join(sorted(unknown_formats))}", file=sys.stderr)
+        return 2
+    
+    runner = BatchRunner(output_dir, countdown=args.countdown, status_callback=None if args.quiet else print)
+    start = time.perf_counter()
+    try:
+        summaries = runner.run(batch["jobs"], fail_fast=args.fail_fast)
+    finally:
+        runner.close()
+    
+    print(format_summary(summaries))
+    
+    summary_path = args.summary or os.path.join(output_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"seconds": time.perf_counter() - start, "jobs": summaries}, f, indent=2)
+    print(f"Summary written to {summary_path}")
+    
+    return 0 if all(summary["status"] == "ok" for summary in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
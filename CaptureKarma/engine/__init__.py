@@ -0,0 +1,28 @@
+"""
+Headless capture engine for the CaptureKarma Screen Capture Tool
+
+Screenshots, recordings and scrolling as plain Python APIs that report
+progress through callbacks and return result objects. Nothing in this
+package imports PyQt5, so it can be used from scripts and servers; the
+desktop UI is a thin client on top of it.
+"""
+
+from CaptureKarma.engine.results import (
+    ScreenshotResult, SeriesResult, RecordingResult, AnimationResult, ContactSheetResult, ScrollResult,
+    ScenarioResult, StepRecord
+)
+from CaptureKarma.engine.screenshot import ScreenshotEngine
+from CaptureKarma.engine.recording import RecordingEngine
+from CaptureKarma.engine.scroll import scroll_region
+from CaptureKarma.engine.scenario import Scenario, ScenarioRunner
+from CaptureKarma.engine.effects import EffectsPipeline, Crop, Padding, Watermark, CursorOverlay
+from CaptureKarma.engine.privacy import PrivacyMask, MaskRegion
+from CaptureKarma.engine.animation import AnimationExporter
+from CaptureKarma.engine.contact_sheet import ContactSheetGenerator
+
+__all__ = [
+    'ScreenshotEngine', 'RecordingEngine', 'scroll_region', 'Scenario', 'ScenarioRunner',
+    'EffectsPipeline', 'Crop', 'Padding', 'Watermark', 'CursorOverlay', 'PrivacyMask', 'MaskRegion',
+    'AnimationExporter', 'ContactSheetGenerator', 'ScreenshotResult', 'SeriesResult', 'RecordingResult',
+    'AnimationResult', 'ContactSheetResult', 'ScrollResult', 'ScenarioResult', 'StepRecord'
+]
@@ -0,0 +1,509 @@
+"""
+Animated GIF, APNG and WebP export for the CaptureKarma capture engine
+
+Recordings are turned into short looping animations for places where MP4
+isn't allowed, such as email. Frames are mapped to a palette through a
+precomputed lookup table, so quantizing a frame is one vectorized table
+lookup instead of a nearest-color search per pixel. Frames that don't
+visibly change are dropped and their delay is added to the frame before,
+and every GIF frame after the first only stores the rectangle that changed,
+with unchanged pixels inside it made transparent so they compress to long
+runs. Quantization and GIF encoding run on a process pool, each
+worker taking a contiguous chunk of frames.
+"""
+import multiprocessing
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from CaptureKarma.engine.results import AnimationResult
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+GifImagePlugin = lazy_import("PIL.GifImagePlugin")
+
+
+FORMAT_GIF = "gif"
+FORMAT_APNG = "apng"
+FORMAT_WEBP = "webp"
+
+FORMAT_EXTENSIONS = {
+    FORMAT_GIF: "gif",
+    FORMAT_APNG: "png",
+    FORMAT_WEBP: "webp",
+}
+
+# One palette for the whole clip, or one per frame built from the frame's changed rectangle (GIF only)
+PALETTE_GLOBAL = "global"
+PALETTE_ADAPTIVE = "adaptive"
+
+# GIF delays are in hundredths of a second, and most viewers slow down anything shorter than 2
+GIF_MIN_DELAY = 2
+
+# Settings shared with the worker processes, set once per worker by _init_worker()
+_worker = {}
+
+
+def build_palette(frames, colors=255, sample_frames=16, stride=2):
+    """
+    Build one palette for a set of frames
+
+    Args:
+        frames: List of RGB arrays
+        colors: Maximum number of palette colors (at most 255, leaving one index for transparency)
+        sample_frames: Number of evenly spaced frames sampled
+        stride: Only every stride-th pixel of every stride-th row is sampled
+
+    Returns:
+        Array of shape (n, 3) with n <= colors
+    """
+    step = max(1, len(frames) // sample_frames)
+    samples = [frame[::stride, ::stride] for frame in frames[::step][:sample_frames]]
+    
+    # Median cut over the stacked samples keeps the flat UI colors of screen content exact
+    mosaic = Image.fromarray(np.ascontiguousarray(np.vstack(samples)))
+    quantized = mosaic.quantize(colors=min(colors, 255), method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    used = int(np.asarray(quantized).max()) + 1
+    return np.array(quantized.getpalette()[:used * 3], dtype=np.uint8).reshape(-1, 3)
+
+
+def build_lookup(palette, bits=6):
+    """
+    Map every color to its nearest palette index
+
+    Args:
+        palette: Array of shape (n, 3)
+        bits: Bits kept per channel; the table has 2 ** (3 * bits) entries
+
+    Returns:
+        uint8 array indexed by the packed color (see quantize())
+    """
+    shift = 8 - bits
+    levels = (np.arange(1 << bits) << shift) + ((1 << shift) >> 1)
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3).astype(np.float32)
+    colors = palette.astype(np.float32)
+    
+    # |a - b|^2 = |a|^2 - 2ab + |b|^2, and |a|^2 is the same for every palette color
+    lookup = np.empty(len(grid), dtype=np.uint8)
+    offsets = (colors ** 2).sum(axis=1)
+    for start in range(0, len(grid), 65536):
+        block = grid[start:start + 65536]
+        lookup[start:start + len(block)] = (offsets - 2.0 * block @ colors.T).argmin(axis=1)
+    return lookup
+
+
+def quantize(frame, lookup, bits=6):
+    """
+    Get the palette indices of an RGB frame
+
+    Args:
+        frame: RGB array of shape (height, width, 3)
+        lookup: Table from build_lookup()
+        bits: Bits per channel the table was built with
+
+    Returns:
+        uint8 array of shape (height, width)
+    """
+    shift = 8 - bits
+    keys = (frame[:, :, 0] >> shift).astype(np.uint32) << (2 * bits)
+    keys |= (frame[:, :, 1] >> shift).astype(np.uint32) << bits
+    keys |= frame[:, :, 2] >> shift
+    return lookup[keys]
+
+
+def _bounding_box(changed):
+    """Get (left, top, right, bottom) of the True pixels of a mask, or None if there are none"""
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not rows.size:
+        return None
+    columns = np.flatnonzero(changed.any(axis=0))
+    return columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+
+
+def _init_worker(palette, lookup, bits, image_format, adaptive, colors, tolerance):
+    """Store the export settings in a worker process"""
+    _worker.update(
+        palette=palette, lookup=lookup, bits=bits, image_format=image_format,
+        adaptive=adaptive, colors=colors, tolerance=tolerance
+    )
+
+
+def _changed_pixels(frame, reference):
+    """Get the mask of pixels that differ from the reference by more than the tolerance in any channel"""
+    tolerance = _worker["tolerance"]
+    return cv2.inRange(cv2.absdiff(frame, reference), (0, 0, 0), (tolerance, tolerance, tolerance)) == 0
+
+
+def _process_chunk(previous, frames):
+    """
+    Quantize a chunk of frames, and encode them for GIF
+
+    Each chunk keeps a reference picture: a pixel only counts as changed once
+    it moves further than the tolerance from the value last shown, so the
+    compression noise of a recording doesn't show up as changes.
+
+    Args:
+        previous: The frame before the chunk, or None for the first chunk
+        frames: Consecutive RGB frames
+
+    Returns:
+        One entry per frame, None for a frame that doesn't change the picture. For GIF an
+        entry is (image data, transparent index or None); otherwise it is the index array
+        of the whole picture.
+    """
+    if _worker["adaptive"]:
+        return _encode_adaptive_chunk(previous, frames)
+    
+    lookup, bits = _worker["lookup"], _worker["bits"]
+    is_gif = _worker["image_format"] == FORMAT_GIF
+    transparent = len(_worker["palette"])
+    reference = previous.copy() if previous is not None else None
+    shown = quantize(previous, lookup, bits) if previous is not None else None
+    entries = []
+    for frame in frames:
+        indices = quantize(frame, lookup, bits)
+        if reference is None:
+            reference, shown = frame.copy(), indices
+            entries.append(_encode_gif_frame(indices, (0, 0), None) if is_gif else indices.copy())
+            continue
+        
+        # Pixels that moved past the tolerance but still map to the shown color stay as they are
+        changed = _changed_pixels(frame, reference) & (indices != shown)
+        box = _bounding_box(changed)
+        if box is None:
+            entries.append(None)
+            continue
+        cv2.copyTo(frame, changed.view(np.uint8), reference)
+        np.copyto(shown, indices, where=changed)
+        
+        if is_gif:
+            left, top, right, bottom = box
+            rectangle = indices[top:bottom, left:right].copy()
+            rectangle[~changed[top:bottom, left:right]] = transparent
+            entries.append(_encode_gif_frame(rectangle, (left, top), transparent))
+        else:
+            entries.append(shown.copy())
+    return entries
+
+
+def _encode_adaptive_chunk(previous, frames):
+    """Encode GIF frames that each carry a palette built from their changed rectangle"""
+    reference = previous.copy() if previous is not None else None
+    entries = []
+    for frame in frames:
+        if reference is None:
+            reference = frame.copy()
+            box, changed = (0, 0, frame.shape[1], frame.shape[0]), None
+        else:
+            changed = _changed_pixels(frame, reference)
+            box = _bounding_box(changed)
+            if box is None:
+                entries.append(None)
+                continue
+            cv2.copyTo(frame, changed.view(np.uint8), reference)
+        
+        left, top, right, bottom = box
+        rectangle = Image.fromarray(np.ascontiguousarray(frame[top:bottom, left:right]))
+        quantized = rectangle.quantize(
+            colors=min(_worker["colors"], 255), method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE
+        )
+        indices = np.asarray(quantized)
+        used = int(indices.max()) + 1
+        
+        # The first unused index marks pixels that didn't change
+        transparent = None
+        if changed is not None:
+            transparent = used
+            indices = indices.copy()
+            indices[~changed[top:bottom, left:right]] = transparent
+        palette = quantized.getpalette()[:used * 3] + [0, 0, 0]
+        entries.append(_encode_gif_frame(indices, (left, top), transparent, palette))
+    return entries
+
+
+def _encode_gif_frame(indices, offset, transparent, palette=None):
+    """LZW-encode one GIF image block (without its graphic control extension)"""
+    image = Image.frombytes("P", (indices.shape[1], indices.shape[0]), np.ascontiguousarray(indices).tobytes())
+    params = {}
+    if palette is not None:
+        image.putpalette(palette)
+        params["include_color_table"] = True
+    return b"".join(GifImagePlugin.getdata(image, offset=(int(offset[0]), int(offset[1])), **params)), transparent
+
+
+class AnimationExporter:
+    """Exports recordings as looping GIF, APNG or animated WebP files"""
+    
+    def __init__(self, image_format=FORMAT_GIF, fps=15, scale=1.0, max_width=None, palette=PALETTE_GLOBAL,
+                 colors=255, lookup_bits=6, tolerance=8, workers=None, loop=0, webp_method=4,
+                 status_callback=None):
+        """
+        Args:
+            image_format: FORMAT_GIF, FORMAT_APNG or FORMAT_WEBP
+            fps: Frame rate of the animation (at most the recording's; GIF allows at most 50)
+            scale: Size factor applied to every frame
+            max_width: Optional width limit in pixels, applied after scale
+            palette: PALETTE_GLOBAL, PALETTE_ADAPTIVE (GIF only), or None to keep full color
+                (APNG and WebP only)
+            colors: Maximum number of palette colors (at most 255)
+            lookup_bits: Bits per channel of the palette lookup table
+            tolerance: Largest channel difference still treated as unchanged, so the compression
+                noise of a recording isn't stored as motion (0 = exact)
+            workers: Number of worker processes (defaults to the CPU count; 0 works in this process)
+            loop: Number of times the animation plays (0 = forever)
+            webp_method: WebP encoder effort (0 = fastest, 6 = smallest)
+            status_callback: Optional callback receiving progress messages
+        """
+        if image_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown animation format: {image_format}")
+        if palette not in (PALETTE_GLOBAL, PALETTE_ADAPTIVE, None):
+            raise ValueError(f"Unknown palette mode: {palette}")
+        if palette == PALETTE_ADAPTIVE and image_format != FORMAT_GIF:
+            raise ValueError("Adaptive palettes are only supported for GIF")
+        if palette is None and image_format == FORMAT_GIF:
+            raise ValueError("GIF needs a palette")
+        if image_format == FORMAT_GIF and fps and fps > 100 / GIF_MIN_DELAY:
+            raise ValueError(f"GIF animations can't play faster than {100 // GIF_MIN_DELAY} fps")
+        
+        self.image_format = image_format
+        self.fps = fps
+        self.scale = scale
+        self.max_width = max_width
+        self.palette = palette
+        self.colors = colors
+        self.lookup_bits = lookup_bits
+        self.tolerance = tolerance
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.loop = loop
+        self.webp_method = webp_method
+        self.status_callback = status_callback
+    
+    @property
+    def extension(self):
+        """File extension (without dot) for the chosen format"""
+        return FORMAT_EXTENSIONS[self.image_format]
+    
+    def export(self, video_filename, filename=None):
+        """
+        Export a recording
+
+        Args:
+            video_filename: Recorded video file
+            filename: Output file (defaults to the video's name with the animation's extension)
+
+        Returns:
+            AnimationResult
+        """
+        filename = filename or f"{os.path.splitext(video_filename)[0]}.{self.extension}"
+        
+        start = time.perf_counter()
+        frames, timestamps, end = self._read_video(video_filename)
+        timings = {"decode": time.perf_counter() - start}
+        if not frames:
+            raise ValueError(f"No frames could be read from {video_filename}")
+        
+        durations = [following - current for current, following in zip(timestamps, timestamps[1:] + [end])]
+        return self.export_frames(frames, durations, filename, timings)
+    
+    def export_frames(self, frames, durations, filename, timings=None):
+        """
+        Export a list of frames
+
+        Args:
+            frames: RGB arrays, all the same size
+            durations: Display time of each frame in seconds
+            filename: Output file
+            timings: Optional dict of stage timings to add to
+
+        Returns:
+            AnimationResult
+        """
+        timings = dict(timings or {})
+        source_count = len(frames)
+        
+        # Repeats are dropped before anything is sent to the workers
+        frames, durations = self._merge_repeats(frames, durations)
+        
+        start = time.perf_counter()
+        palette = lookup = None
+        if self.palette == PALETTE_GLOBAL:
+            palette = build_palette(frames, self.colors)
+            lookup = build_lookup(palette, self.lookup_bits)
+        timings["palette"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        if self.palette is None:
+            entries = list(frames)
+        else:
+            self._report(f"Quantizing {len(frames)} frames...")
+            entries = self._process(frames, palette, lookup)
+        
+        # Frames that didn't change after quantization extend the frame before them
+        kept, kept_durations = [], []
+        for entry, duration in zip(entries, durations):
+            if entry is None:
+                kept_durations[-1] += duration
+            else:
+                kept.append(entry)
+                kept_durations.append(duration)
+        timings["encode"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        height, width = frames[0].shape[:2]
+        if self.image_format == FORMAT_GIF:
+            self._write_gif(filename, width, height, kept, kept_durations, palette)
+        else:
+            self._write_pillow(filename, kept, kept_durations, palette)
+        timings["write"] = time.perf_counter() - start
+        
+        result = AnimationResult(
+            filename, len(kept), source_count, sum(durations), (width, height), os.path.getsize(filename), timings
+        )
+        print(result.summary())
+        self._report(f"Animation saved to {filename}")
+        return result
+    
+    def _read_video(self, video_filename):
+        """
+        Decode the frames of a video at the export frame rate
+
+        Returns:
+            Tuple (RGB frames, start time of each frame, end time of the video)
+        """
+        capture = cv2.VideoCapture(video_filename)
+        if not capture.isOpened():
+            raise IOError(f"Could not open {video_filename}")
+        
+        source_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        interval = 1.0 / min(self.fps or source_fps, source_fps)
+        frames, timestamps = [], []
+        index = 0
+        next_time = 0.0
+        try:
+            while capture.grab():
+                timestamp = index / source_fps
+                index += 1
+                
+                # Skipped frames are only demuxed, never converted
+                if timestamp + 1e-6 < next_time:
+                    continue
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                frames.append(self._prepare_frame(frame))
+                timestamps.append(timestamp)
+                next_time += interval
+        finally:
+            capture.release()
+        
+        return frames, timestamps, index / source_fps
+    
+    def _prepare_frame(self, frame):
+        """Resize a decoded BGR frame and convert it to RGB"""
+        height, width = frame.shape[:2]
+        scale = self.scale
+        if self.max_width and width * scale > self.max_width:
+            scale = self.max_width / width
+        if scale != 1.0:
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    
+    def _merge_repeats(self, frames, durations):
+        """Drop frames within the tolerance of the one before them, adding their duration to it"""
+        kept, kept_durations = [frames[0]], [durations[0]]
+        for frame, duration in zip(frames[1:], durations[1:]):
+            if not (cv2.absdiff(frame, kept[-1]) > self.tolerance).any():
+                kept_durations[-1] += duration
+            else:
+                kept.append(frame)
+                kept_durations.append(duration)
+        return kept, kept_durations
+    
+    def _process(self, frames, palette, lookup):
+        """Quantize (and for GIF, encode) every frame, on the process pool when it has more than one worker"""
+        settings = (
+            palette, lookup, self.lookup_bits, self.image_format,
+            self.palette == PALETTE_ADAPTIVE, self.colors, self.tolerance
+        )
+        
+        # Contiguous chunks, each with the frame before it so its first frame can be compared
+        chunk_count = max(1, min(len(frames) // 8, self.workers * 2))
+        bounds = [len(frames) * i // chunk_count for i in range(chunk_count + 1)]
+        chunks = [
+            (frames[first - 1] if first else None, frames[first:last])
+            for first, last in zip(bounds, bounds[1:])
+        ]
+        
+        if self.workers <= 1 or chunk_count == 1:
+            _init_worker(*settings)
+            results = [_process_chunk(*chunk) for chunk in chunks]
+        else:
+            # Spawned rather than forked, so workers don't inherit the threads of a running UI
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, chunk_count),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=settings
+            ) as pool:
+                results = list(pool.map(_process_chunk, *zip(*chunks)))
+        return [entry for result in results for entry in result]
+    
+    def _write_gif(self, filename, width, height, entries, durations, palette):
+        """Write encoded GIF image blocks with their delays"""
+        delays = self._integer_delays(durations, 100, GIF_MIN_DELAY)
+        with open(filename, "wb") as f:
+            # Logical screen, with the global palette padded to a power of two and room for the transparent index
+            flags = 0
+            table = b""
+            if palette is not None:
+                size_bits = len(palette).bit_length() - 1
+                flags = 0x80 | 0x70 | size_bits
+                table = palette.tobytes().ljust(3 << (size_bits + 1), b"\0")
+            f.write(b"GIF89a" + struct.pack("<HHBBB", width, height, flags, 0, 0) + table)
+            f.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\0")
+            
+            # Every frame is drawn over the previous one, which is left in place
+            for (data, transparent), delay in zip(entries, delays):
+                packed = (1 << 2) | (1 if transparent is not None else 0)
+                f.write(b"!\xf9\x04" + struct.pack("<BHB", packed, delay, transparent or 0) + b"\0")
+                f.write(data)
+            f.write(b";")
+    
+    def _write_pillow(self, filename, entries, durations, palette):
+        """Write an APNG or animated WebP file through Pillow, which stores only the changed area of each frame"""
+        if palette is not None:
+            palette_values = palette.flatten().tolist()
+            images = []
+            for indices in entries:
+                image = Image.frombytes("P", (indices.shape[1], indices.shape[0]), indices.tobytes())
+                image.putpalette(palette_values)
+                images.append(image)
+        else:
+            images = [Image.fromarray(frame) for frame in entries]
+        
+        delays = self._integer_delays(durations, 1000, 1)
+        options = {"save_all": True, "append_images": images[1:], "duration": delays, "loop": self.loop}
+        if self.image_format == FORMAT_APNG:
+            images[0].save(filename, format="PNG", **options)
+        else:
+            images[0].save(filename, format="WEBP", lossless=True, method=self.webp_method, **options)
+    
+    def _integer_delays(self, durations, units, minimum):
+        """Round frame durations to whole units without the rounding errors adding up"""
+        delays = []
+        elapsed = 0.0
+        shown = 0
+        for duration in durations:
+            elapsed += duration
+            delay = max(minimum, int(round(elapsed * units)) - shown)
+            delays.append(delay)
+            shown += delay
+        return delays
+    
+    def _report(self, message):
+        """Pass a progress message to the status callback"""
+        if self.status_callback:
+            self.status_callback(message)
@@ -0,0 +1,385 @@
+"""
+Poster frames and contact sheets for the CaptureKarma capture engine
+
+A contact sheet is a grid of frames taken at evenly spaced times through a
+recording. Instead of decoding the whole file, the reader seeks to each
+time and decodes only from the keyframe there: with PyAV installed it takes
+the keyframe itself (or decodes on to the target when that keyframe was
+already used), and with OpenCV alone it decodes forward from the keyframe to
+the exact time. The most detailed sampled frame is also saved as the
+recording's poster image.
+
+Folders are processed on a thread pool (decoding releases the GIL), and a
+small index file in the output folder remembers the size and modification
+time of every recording, so unchanged recordings are skipped next time.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from CaptureKarma.engine.results import ContactSheetResult
+from CaptureKarma.utils.encoders import ImageEncoder, FORMAT_JPEG
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+AV_AVAILABLE = module_available("av")
+av = lazy_import("av")
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+CACHE_FILENAME = ".contact_sheets.json"
+
+
+class ContactSheetCache:
+    """Remembers which recordings already have up-to-date contact sheets"""
+    
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON index file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+    
+    def get(self, video_filename, settings):
+        """
+        Get the outputs of a recording if they are still valid
+
+        Returns:
+            Dict with "poster", "sheet" and "timestamps", or None if the recording has changed
+            since, was made with other settings, or its outputs are gone
+        """
+        stat = os.stat(video_filename)
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(video_filename))
+        if (
+            entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size
+            or entry["settings"] != settings
+            or not os.path.exists(entry["poster"]) or not os.path.exists(entry["sheet"])
+        ):
+            return None
+        return entry
+    
+    def put(self, video_filename, settings, poster, sheet, timestamps):
+        """Record the outputs of a recording and write the index"""
+        stat = os.stat(video_filename)
+        with self._lock:
+            self._entries[os.path.abspath(video_filename)] = {
+                "mtime": stat.st_mtime, "size": stat.st_size, "settings": settings,
+                "poster": poster, "sheet": sheet, "timestamps": timestamps
+            }
+            
+            # Written to a temporary file first, so an interrupted write never leaves a broken index
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(temp_path, self.path)
+
+
+class ContactSheetGenerator:
+    """Makes poster frames and contact sheets for recordings"""
+    
+    def __init__(self, count=12, columns=4, thumb_width=320, poster_width=None, spacing=8,
+                 background=(32, 32, 32), labels=True, jpeg_quality=88, status_callback=None):
+        """
+        Args:
+            count: Number of frames on a contact sheet
+            columns: Number of frames per row
+            thumb_width: Width of every frame on the sheet in pixels
+            poster_width: Optional width limit of the poster image
+            spacing: Pixels between the frames and around the sheet
+            background: RGB color of the sheet
+            labels: Draw a header and the time of every frame
+            jpeg_quality: JPEG quality of the written images (1-100)
+            status_callback: Optional callback receiving progress messages
+        """
+        self.count = count
+        self.columns = columns
+        self.thumb_width = thumb_width
+        self.poster_width = poster_width
+        self.spacing = spacing
+        self.background = background
+        self.labels = labels
+        self.encoder = ImageEncoder(FORMAT_JPEG, jpeg_quality=jpeg_quality)
+        self.status_callback = status_callback
+    
+    @property
+    def settings(self):
+        """The settings that affect the outputs, as stored in the cache"""
+        return {
+            "count": self.count, "columns": self.columns, "thumb_width": self.thumb_width,
+            "poster_width": self.poster_width, "spacing": self.spacing,
+            "background": list(self.background), "labels": self.labels,
+            "jpeg_quality": self.encoder.jpeg_quality
+        }
+    
+    def generate(self, video_filename, output_dir=None, cache=None, name=None):
+        """
+        Make the poster and contact sheet of one recording
+
+        Args:
+            video_filename: Recorded video file
+            output_dir: Directory the images are written to (defaults to the video's directory)
+            cache: Optional ContactSheetCache; the recording is skipped if its entry is valid
+            name: Base name of the images; defaults to the video's filename with its extension,
+                so clip.avi and clip.mp4 get clip_avi_poster.jpg and clip_mp4_poster.jpg
+
+        Returns:
+            ContactSheetResult
+        """
+        start = time.perf_counter()
+        output_dir = output_dir or os.path.dirname(os.path.abspath(video_filename))
+        settings = self.settings
+        name = name or os.path.basename(video_filename).replace(".", "_")
+        poster_filename = os.path.join(output_dir, f"{name}_poster.{self.encoder.extension}")
+        sheet_filename = os.path.join(output_dir, f"{name}_sheet.{self.encoder.extension}")
+        
+        # Entries written under other names (another output folder, say) are made again
+        entry = cache.get(video_filename, settings) if cache is not None else None
+        if entry is not None and entry["poster"] == poster_filename and entry["sheet"] == sheet_filename:
+            return ContactSheetResult(
+                video_filename, entry["poster"], entry["sheet"], entry["timestamps"],
+                cached=True, seconds=time.perf_counter() - start
+            )
+        
+        samples, poster, info = self.sample_frames(video_filename)
+        if not samples:
+            raise ValueError(f"No frames could be read from {video_filename}")
+        
+        if self.poster_width and poster.shape[1] > self.poster_width:
+            scale = self.poster_width / poster.shape[1]
+            poster = cv2.resize(
+                poster, (self.poster_width, max(1, int(round(poster.shape[0] * scale)))),
+                interpolation=cv2.INTER_AREA
+            )
+        
+        os.makedirs(output_dir, exist_ok=True)
+        self.encoder.save(cv2.cvtColor(poster, cv2.COLOR_BGR2RGB), poster_filename)
+        title = os.path.splitext(os.path.basename(video_filename))[0]
+        sheet = self.compose([thumb for _, thumb in samples], [timestamp for timestamp, _ in samples], title, info)
+        self.encoder.save(cv2.cvtColor(sheet, cv2.COLOR_BGR2RGB), sheet_filename)
+        
+        timestamps = [round(sample[0], 3) for sample in samples]
+        if cache is not None:
+            cache.put(video_filename, settings, poster_filename, sheet_filename, timestamps)
+        return ContactSheetResult(
+            video_filename, poster_filename, sheet_filename, timestamps,
+            cached=False, seconds=time.perf_counter() - start
+        )
+    
+    def process_folder(self, folder, output_dir=None, workers=4, recursive=False):
+        """
+        Make posters and contact sheets for every recording in a folder
+
+        Args:
+            folder: Folder to look for recordings in
+            output_dir: Directory the images are written to (defaults to the folder)
+            workers: Number of recordings processed at the same time
+            recursive: Also look in subfolders
+
+        Returns:
+            List of ContactSheetResult, in filename order; failed recordings have an error set
+        """
+        output_dir = output_dir or folder
+        os.makedirs(output_dir, exist_ok=True)
+        cache = ContactSheetCache(os.path.join(output_dir, CACHE_FILENAME))
+        
+        videos = []
+        for root, dirs, files in os.walk(folder):
+            videos.extend(
+                os.path.join(root, filename) for filename in files
+                if filename.lower().endswith(VIDEO_EXTENSIONS)
+            )
+            if not recursive:
+                break
+        videos.sort()
+        
+        def run(video_filename):
+            try:
+                # Recordings from subfolders share the output folder, so their folder is part of the name
+                name = os.path.relpath(video_filename, folder).replace(os.sep, "_").replace(".", "_")
+                result = self.generate(video_filename, output_dir, cache, name)
+                state = "up to date" if result.cached else f"done in {result.seconds:.2f} s"
+                self._report(f"Contact sheet for {os.path.basename(video_filename)} {state}")
+                return result
+            except Exception as e:
+                print(f"Error making contact sheet for {video_filename}: {str(e)}")
+                return ContactSheetResult(video_filename, None, None, [], error=e)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="contact-sheet") as pool:
+            results = list(pool.map(run, videos))
+        
+        failed = sum(1 for result in results if result.error is not None)
+        cached = sum(1 for result in results if result.cached)
+        self._report(
+            f"Made {len(results) - failed - cached} contact sheets ({cached} up to date, {failed} failed)"
+        )
+        return results
+    
+    def sample_frames(self, video_filename):
+        """
+        Decode frames at evenly spaced times
+
+        Only the thumbnails and the poster are kept, so memory use doesn't grow with the
+        number of samples at full resolution.
+
+        Returns:
+            Tuple (samples, poster, info). samples is a list of (time in seconds, BGR thumbnail);
+            poster is the most detailed frame at full size, so a black or blank opening frame is
+            never picked; info is a dict with "duration", "width", "height" and "fps".
+        """
+        info = {}
+        reader = self._read_av if AV_AVAILABLE else self._read_opencv
+        samples = []
+        poster, best_detail = None, -1.0
+        for timestamp, image in reader(video_filename, info):
+            detail = _detail(image)
+            if detail > best_detail:
+                poster, best_detail = image, detail
+            samples.append((timestamp, self._thumbnail(image)))
+        return samples, poster, info
+    
+    def compose(self, thumbs, timestamps, title, info):
+        """
+        Lay out thumbnails in a grid
+
+        Args:
+            thumbs: BGR thumbnails, all the same size
+            timestamps: Time of every thumbnail in seconds
+            title: Text of the header line
+            info: Dict with "duration", "width", "height" and "fps"
+
+        Returns:
+            BGR image of the sheet
+        """
+        thumb_height, thumb_width = thumbs[0].shape[:2]
+        columns = min(self.columns, len(thumbs))
+        rows = (len(thumbs) + columns - 1) // columns
+        header = 36 if self.labels else 0
+        spacing = self.spacing
+        
+        sheet = np.empty(
+            (header + spacing + rows * (thumb_height + spacing), spacing + columns * (thumb_width + spacing), 3),
+            dtype=np.uint8
+        )
+        sheet[:] = self.background[::-1]
+        
+        if self.labels:
+            details = (
+                f"{_format_time(info['duration'])}  {info['width']}x{info['height']}  "
+                f"{info['fps']:.0f} fps"
+            )
+            _draw_label(sheet, title, (spacing, 24), 0.6)
+            text_width = cv2.getTextSize(details, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0][0]
+            _draw_label(sheet, details, (sheet.shape[1] - spacing - text_width, 24), 0.5)
+        
+        for index, (thumb, timestamp) in enumerate(zip(thumbs, timestamps)):
+            row, column = divmod(index, columns)
+            x = spacing + column * (thumb_width + spacing)
+            y = header + spacing + row * (thumb_height + spacing)
+            sheet[y:y + thumb_height, x:x + thumb_width] = thumb
+            if self.labels:
+                # Tenths of a second tell the frames of short clips apart
+                label = _format_time(timestamp, tenths=info["duration"] < 60)
+                text_width = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)[0][0]
+                _draw_label(sheet, label, (x + thumb_width - text_width - 6, y + thumb_height - 6), 0.45)
+        return sheet
+    
+    def _targets(self, duration):
+        """Get the sample times: the middle of count equal slices of the recording"""
+        return [duration * (index + 0.5) / self.count for index in range(self.count)]
+    
+    def _read_av(self, video_filename, info):
+        """Yield (time, BGR frame) at the sample times, seeking to keyframes with PyAV"""
+        with av.open(video_filename) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            if stream.duration is not None:
+                duration = float(stream.duration * stream.time_base)
+            else:
+                duration = (container.duration or 0) / av.time_base
+            info.update(
+                duration=duration, width=stream.width, height=stream.height,
+                fps=float(stream.average_rate or 0)
+            )
+            
+            last_time = -1.0
+            for target in self._targets(duration):
+                container.seek(int(target / stream.time_base), stream=stream, backward=True, any_frame=False)
+                for frame in container.decode(stream):
+                    if frame.time is None or frame.time <= last_time:
+                        continue
+                    
+                    # A keyframe that wasn't used yet is taken as is; otherwise decode on to the target
+                    if frame.key_frame or frame.time >= target:
+                        last_time = frame.time
+                        yield frame.time, frame.to_ndarray(format="bgr24")
+                        break
+    
+    def _read_opencv(self, video_filename, info):
+        """Yield (time, BGR frame) at the sample times, seeking with OpenCV (which decodes on from the keyframe)"""
+        capture = cv2.VideoCapture(video_filename)
+        if not capture.isOpened():
+            raise IOError(f"Could not open {video_filename}")
+        
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            info.update(
+                duration=capture.get(cv2.CAP_PROP_FRAME_COUNT) / fps,
+                width=int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                height=int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                fps=fps
+            )
+            for target in self._targets(info["duration"]):
+                capture.set(cv2.CAP_PROP_POS_MSEC, target * 1000)
+                timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                ok, image = capture.read()
+                if ok:
+                    yield timestamp, image
+        finally:
+            capture.release()
+    
+    def _thumbnail(self, image):
+        """Downscale a frame to the sheet's thumbnail width"""
+        height, width = image.shape[:2]
+        size = (self.thumb_width, max(1, int(round(height * self.thumb_width / width))))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    
+    def _report(self, message):
+        """Pass a progress message to the status callback"""
+        if self.status_callback:
+            self.status_callback(message)
+
+
+def _detail(image):
+    """Score how much is going on in a frame (the standard deviation of a small grayscale copy)"""
+    small = cv2.resize(image, (64, 36), interpolation=cv2.INTER_AREA)
+    return float(cv2.meanStdDev(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))[1][0][0])
+
+
+def _format_time(seconds, tenths=False):
+    """Format seconds as m:ss (or m:ss.s), or h:mm:ss for long recordings"""
+    if tenths:
+        minutes, seconds = divmod(round(seconds, 1), 60)
+        return f"{int(minutes)}:{seconds:04.1f}"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def _draw_label(image, text, origin, font_scale):
+    """Draw white text with a dark outline, readable on any background"""
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), 3, cv2.LINE_AA)
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), 1, cv2.LINE_AA)
@@ -0,0 +1,494 @@
+"""
+Per-frame video effects for the CaptureKarma capture engine
+
+Effects run inside the recorder on every frame before it is written, so a
+watermarked and cropped delivery no longer needs a second ffmpeg pass. Each
+effect precomputes what it can for the frame size once (watermark masks,
+crop slices, padding canvases) and then only touches the pixels it changes:
+crops are views, the watermark blends just its own rectangle with integer
+arithmetic into preallocated buffers, padding rewrites its border strips,
+and the cursor overlay draws pre-rendered sprites around the pointer only.
+"""
+import copy
+import time
+
+from CaptureKarma.capture.cursor_tracker import CursorTracker
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+POSITION_TOP_LEFT = "top-left"
+POSITION_TOP_RIGHT = "top-right"
+POSITION_BOTTOM_LEFT = "bottom-left"
+POSITION_BOTTOM_RIGHT = "bottom-right"
+POSITION_CENTER = "center"
+
+
+class FrameEffect:
+    """
+    Base class of a per-frame effect
+
+    prepare() is called once with the size of the incoming frames; apply() is
+    then called for every frame with a BGR array and returns the frame to pass
+    on, which may be the same array changed in place or a view into it.
+    """
+    
+    name = "effect"
+    
+    # Screen position of the top-left pixel of the frames, set before prepare()
+    origin = (0, 0)
+    
+    def prepare(self, width, height):
+        """
+        Precompute everything that depends on the frame size
+
+        Returns:
+            Tuple (width, height) of the frames apply() returns
+        """
+        return width, height
+    
+    def apply(self, frame):
+        """Process one frame"""
+        return frame
+    
+    def close(self):
+        """Release anything the effect started, once the recording has ended"""
+
+
+class Crop(FrameEffect):
+    """Crops every frame to a rectangle, as a view without copying"""
+    
+    name = "crop"
+    
+    def __init__(self, x, y, width, height):
+        """
+        Args:
+            x, y: Top-left corner of the crop inside the frame
+            width, height: Size of the crop (rounded down to even numbers for the codec)
+        """
+        self.rect = (x, y, width, height)
+        self._slices = None
+    
+    def prepare(self, width, height):
+        x, y, crop_width, crop_height = self.rect
+        
+        # Keep the crop inside the frame and even-sized
+        x = min(max(0, x), width - 2)
+        y = min(max(0, y), height - 2)
+        crop_width = min(crop_width, width - x)
+        crop_height = min(crop_height, height - y)
+        crop_width -= crop_width % 2
+        crop_height -= crop_height % 2
+        
+        self._slices = (slice(y, y + crop_height), slice(x, x + crop_width))
+        return crop_width, crop_height
+    
+    def apply(self, frame):
+        return frame[self._slices]
+
+
+class Padding(FrameEffect):
+    """Places every frame on a larger canvas with a solid border"""
+    
+    name = "padding"
+    
+    def __init__(self, top=0, right=0, bottom=0, left=0, color=(0, 0, 0)):
+        """
+        Args:
+            top, right, bottom, left: Border widths in pixels; right and bottom grow by
+                one pixel when needed to keep the output even-sized
+            color: Border color as a (B, G, R) tuple
+        """
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.left = left
+        self.color = color
+        self._canvas = None
+        self._inner = None
+        self._strips = []
+    
+    def prepare(self, width, height):
+        out_width = width + self.left + self.right
+        out_height = height + self.top + self.bottom
+        right = self.right + out_width % 2
+        bottom = self.bottom + out_height % 2
+        out_width += out_width % 2
+        out_height += out_height % 2
+        
+        # The canvas is reused for every frame
+        self._canvas = np.empty((out_height, out_width, 3), dtype=np.uint8)
+        self._canvas[:] = self.color
+        self._inner = self._canvas[self.top:self.top + height, self.left:self.left + width]
+        
+        # Border strips, repainted every frame in case a later effect drew over them
+        self._strips = [
+            self._canvas[:self.top],
+            self._canvas[out_height - bottom:],
+            self._canvas[self.top:out_height - bottom, :self.left],
+            self._canvas[self.top:out_height - bottom, out_width - right:]
+        ]
+        self._color = np.array(self.color, dtype=np.uint8)
+        return out_width, out_height
+    
+    def apply(self, frame):
+        for strip in self._strips:
+            strip[:] = self._color
+        self._inner[:] = frame
+        return self._canvas
+
+
+class AlphaSprite:
+    """
+    A BGRA image prepared for fast repeated alpha blending
+
+    Fully transparent borders are trimmed and the blend terms are precomputed,
+    so drawing the sprite is one multiply, add and shift over its visible
+    rectangle: out = (frame * (256 - alpha) + color * alpha + 128) >> 8.
+    """
+    
+    def __init__(self, image, opacity=1.0, hotspot=None):
+        """
+        Args:
+            image: BGRA array
+            opacity: Overall opacity (0-1)
+            hotspot: (x, y) pixel of the image that is placed at the position given to
+                blend(); defaults to the top-left corner of the visible area
+        """
+        # Alpha on a 0-256 scale, so blending is a multiply and a shift
+        alpha = image[:, :, 3].astype(np.uint16) * int(round(opacity * 256)) // 255
+        
+        # Drop fully transparent rows and columns
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if not len(rows):
+            self.width = self.height = 0
+            self.hotspot = (0, 0)
+            return
+        top, left = int(rows[0]), int(cols[0])
+        image = image[top:rows[-1] + 1, left:cols[-1] + 1]
+        alpha = alpha[top:rows[-1] + 1, left:cols[-1] + 1, np.newaxis]
+        
+        self.height, self.width = alpha.shape[:2]
+        self.hotspot = (0, 0) if hotspot is None else (hotspot[0] - left, hotspot[1] - top)
+        self._inverse = 256 - alpha
+        self._premultiplied = image[:, :, :3].astype(np.uint16) * alpha + 128
+        self._buffer = np.empty_like(self._premultiplied)
+    
+    def blend(self, frame, x, y):
+        """Draw the sprite into a BGR frame with its hotspot at (x, y), clipped to the frame"""
+        if not self.width:
+            return
+        
+        x = int(x) - self.hotspot[0]
+        y = int(y) - self.hotspot[1]
+        frame_height, frame_width = frame.shape[:2]
+        left, top = max(0, x), max(0, y)
+        right, bottom = min(frame_width, x + self.width), min(frame_height, y + self.height)
+        if right <= left or bottom <= top:
+            return
+        
+        roi = frame[top:bottom, left:right]
+        visible = (slice(top - y, bottom - y), slice(left - x, right - x))
+        buffer = self._buffer[visible]
+        np.multiply(roi, self._inverse[visible], out=buffer)
+        np.add(buffer, self._premultiplied[visible], out=buffer)
+        np.right_shift(buffer, 8, out=buffer)
+        np.copyto(roi, buffer, casting="unsafe")
+
+
+class Watermark(FrameEffect):
+    """Alpha-blends a logo into a corner of every frame"""
+    
+    name = "watermark"
+    
+    def __init__(self, image, position=POSITION_BOTTOM_RIGHT, margin=24, opacity=1.0, scale=1.0):
+        """
+        Args:
+            image: Path of the logo (PNG with transparency recommended), or a BGR/BGRA array
+            position: One of the POSITION_ constants, or an (x, y) tuple for the top-left corner
+            margin: Distance from the frame edges in pixels, for corner positions
+            opacity: Overall opacity of the logo (0-1)
+            scale: Scale factor applied to the logo once, when the effect is prepared
+        """
+        self.image = image
+        self.position = position
+        self.margin = margin
+        self.opacity = opacity
+        self.scale = scale
+        self._sprite = None
+        self._origin = (0, 0)
+    
+    def prepare(self, width, height):
+        logo = self._load_logo()
+        if self.scale != 1.0:
+            logo = cv2.resize(
+                logo, None, fx=self.scale, fy=self.scale,
+                interpolation=cv2.INTER_AREA if self.scale < 1.0 else cv2.INTER_LINEAR
+            )
+        
+        # Only the visible part of the logo is blended, at a fixed place in the frame
+        self._sprite = AlphaSprite(logo, self.opacity)
+        self._origin = self._get_origin(width, height, self._sprite.width, self._sprite.height)
+        return width, height
+    
+    def apply(self, frame):
+        self._sprite.blend(frame, *self._origin)
+        return frame
+    
+    def _load_logo(self):
+        """Get the logo as a BGRA array"""
+        if isinstance(self.image, str):
+            logo = cv2.imread(self.image, cv2.IMREAD_UNCHANGED)
+            if logo is None:
+                raise ValueError(f"Could not read watermark image: {self.image}")
+        else:
+            logo = np.asarray(self.image)
+        
+        if logo.ndim == 2:
+            logo = cv2.cvtColor(logo, cv2.COLOR_GRAY2BGRA)
+        elif logo.shape[2] == 3:
+            logo = cv2.cvtColor(logo, cv2.COLOR_BGR2BGRA)
+        return logo
+    
+    def _get_origin(self, width, height, logo_width, logo_height):
+        """Get the top-left corner of the logo inside the frame"""
+        if isinstance(self.position, (tuple, list)):
+            return int(self.position[0]), int(self.position[1])
+        
+        left = self.margin
+        right = width - logo_width - self.margin
+        top = self.margin
+        bottom = height - logo_height - self.margin
+        positions = {
+            POSITION_TOP_LEFT: (left, top),
+            POSITION_TOP_RIGHT: (right, top),
+            POSITION_BOTTOM_LEFT: (left, bottom),
+            POSITION_BOTTOM_RIGHT: (right, bottom),
+            POSITION_CENTER: ((width - logo_width) // 2, (height - logo_height) // 2)
+        }
+        if self.position not in positions:
+            raise ValueError(f"Unknown watermark position: {self.position}")
+        return positions[self.position]
+
+
+class CursorOverlay(FrameEffect):
+    """
+    Draws the mouse pointer and click ripples into every frame
+
+    Screen grabs don't include the cursor, so its position is polled once per
+    frame and a pre-rendered arrow is blended around it; each recent click adds
+    a ripple, picked from pre-rendered animation steps by the click's age. Only
+    the pixels under the sprites are touched. Put it before any crop or padding,
+    since it maps screen coordinates through the region origin.
+    """
+    
+    name = "cursor"
+    
+    def __init__(self, tracker=None, scale=1.0, show_pointer=True, show_clicks=True, ripple_duration=0.5,
+                 ripple_color=(0, 215, 255), ripple_steps=12):
+        """
+        Args:
+            tracker: Optional CursorTracker to reuse
+            scale: Size of the pointer and ripples relative to a standard 1x cursor
+            show_pointer: Draw the arrow pointer
+            show_clicks: Draw an expanding ripple at every click
+            ripple_duration: Seconds a ripple stays visible
+            ripple_color: Ripple color as a (B, G, R) tuple
+            ripple_steps: Number of pre-rendered ripple animation steps
+        """
+        self.tracker = tracker or CursorTracker()
+        self.scale = scale
+        self.show_pointer = show_pointer
+        self.show_clicks = show_clicks
+        self.ripple_duration = ripple_duration
+        self.ripple_color = ripple_color
+        self.ripple_steps = ripple_steps
+        self._pointer = None
+        self._ripples = []
+    
+    def prepare(self, width, height):
+        if self.show_pointer:
+            self._pointer = AlphaSprite(*render_pointer(self.scale))
+        if self.show_clicks:
+            self._ripples = [
+                AlphaSprite(*render_ripple(step / self.ripple_steps, self.scale, self.ripple_color))
+                for step in range(self.ripple_steps)
+            ]
+            self.tracker.start()
+        return width, height
+    
+    def apply(self, frame):
+        origin_x, origin_y = self.origin
+        
+        # Ripples go under the pointer
+        if self._ripples:
+            now = time.perf_counter()
+            for click_time, x, y in self.tracker.recent_clicks(now - self.ripple_duration):
+                step = min(len(self._ripples) - 1, int((now - click_time) / self.ripple_duration * len(self._ripples)))
+                self._ripples[step].blend(frame, x - origin_x, y - origin_y)
+        
+        if self._pointer:
+            x, y = self.tracker.position()
+            self._pointer.blend(frame, x - origin_x, y - origin_y)
+        return frame
+    
+    def close(self):
+        self.tracker.stop()
+
+
+def render_pointer(scale=1.0, supersample=4):
+    """
+    Render an anti-aliased arrow pointer
+
+    Returns:
+        Tuple (image, opacity, hotspot) ready for AlphaSprite, with the hotspot at the arrow tip
+    """
+    # Standard arrow outline, in 1x cursor pixels with the tip at (1, 1)
+    outline = np.array([(1, 1), (1, 18), (5, 14), (8, 21), (11, 20), (8, 13), (13, 13)], dtype=np.float64)
+    factor = scale * supersample
+    size = (int(np.ceil(23 * factor)), int(np.ceil(15 * factor)))
+    
+    # Draw large, then shrink with area averaging for smooth edges
+    canvas = np.zeros(size + (4,), dtype=np.uint8)
+    points = np.rint(outline * factor).astype(np.int32)
+    cv2.fillPoly(canvas, [points], (255, 255, 255, 255), lineType=cv2.LINE_AA)
+    cv2.polylines(canvas, [points], True, (0, 0, 0, 255), max(1, int(round(factor))), lineType=cv2.LINE_AA)
+    image = cv2.resize(canvas, (int(np.ceil(15 * scale)), int(np.ceil(23 * scale))), interpolation=cv2.INTER_AREA)
+    
+    return image, 1.0, (int(round(scale)), int(round(scale)))
+
+
+def render_ripple(progress, scale=1.0, color=(0, 215, 255), supersample=4):
+    """
+    Render one step of a click ripple: a ring that grows and fades out
+
+    Args:
+        progress: Animation position from 0 (the click) to 1 (gone)
+
+    Returns:
+        Tuple (image, opacity, hotspot) ready for AlphaSprite, with the hotspot at the center
+    """
+    max_radius = 26 * scale
+    radius = (6 + (max_radius - 6) * progress) * supersample
+    size = int(np.ceil((max_radius + 4 * scale) * 2 * supersample))
+    center = size // 2
+    
+    canvas = np.zeros((size, size, 4), dtype=np.uint8)
+    cv2.circle(
+        canvas, (center, center), int(round(radius)), tuple(color) + (255,),
+        max(1, int(round(3 * scale * supersample))), lineType=cv2.LINE_AA
+    )
+    small = size // supersample
+    image = cv2.resize(canvas, (small, small), interpolation=cv2.INTER_AREA)
+    
+    # Start fairly transparent and fade out as the ring grows
+    return image, 0.8 * (1.0 - progress), (small // 2, small // 2)
+
+
+class EffectsPipeline:
+    """Runs a chain of effects on every frame and times each stage"""
+    
+    def __init__(self, effects=None, budget=None):
+        """
+        Args:
+            effects: List of FrameEffect objects, applied in order
+            budget: Optional time budget in seconds per frame for all effects together;
+                a warning is printed when the average cost goes over it
+        """
+        self.effects = list(effects or [])
+        self.budget = budget
+        self.output_size = None
+        self.frame_count = 0
+        self._totals = [0.0] * len(self.effects)
+        self._maxima = [0.0] * len(self.effects)
+    
+    def __bool__(self):
+        return bool(self.effects)
+    
+    def for_size(self, width, height, origin=(0, 0)):
+        """
+        Get a prepared copy of the pipeline for frames of the given size
+
+        Every recorded region gets its own copy, since the effects keep per-size buffers.
+        """
+        pipeline = EffectsPipeline(copy.deepcopy(self.effects), self.budget)
+        pipeline.prepare(width, height, origin)
+        return pipeline
+    
+    def prepare(self, width, height, origin=(0, 0)):
+        """
+        Prepare every effect for frames of the given size
+
+        Args:
+            width, height: Size of the incoming frames
+            origin: Screen position (x, y) of the top-left pixel of the incoming frames
+
+        Returns:
+            Tuple (width, height) of the frames the pipeline produces
+        """
+        try:
+            for effect in self.effects:
+                effect.origin = origin
+                width, height = effect.prepare(width, height)
+        except Exception:
+            # Don't leave a click listener running for a recording that won't start
+            self.close()
+            raise
+        self.output_size = (width, height)
+        self.frame_count = 0
+        self._totals = [0.0] * len(self.effects)
+        self._maxima = [0.0] * len(self.effects)
+        return self.output_size
+    
+    def apply(self, frame):
+        """Run every effect on a frame and return the result"""
+        for index, effect in enumerate(self.effects):
+            start = time.perf_counter()
+            frame = effect.apply(frame)
+            elapsed = time.perf_counter() - start
+            self._totals[index] += elapsed
+            if elapsed > self._maxima[index]:
+                self._maxima[index] = elapsed
+        self.frame_count += 1
+        return frame
+    
+    def close(self):
+        """Release anything the effects started"""
+        for effect in self.effects:
+            effect.close()
+    
+    def report(self):
+        """
+        Get the cost of every stage
+
+        Returns:
+            List of (name, mean_seconds, max_seconds) tuples, one per effect
+        """
+        count = max(1, self.frame_count)
+        return [
+            (effect.name, total / count, maximum)
+            for effect, total, maximum in zip(self.effects, self._totals, self._maxima)
+        ]
+    
+    def over_budget(self):
+        """Whether the average cost per frame is over the budget"""
+        if self.budget is None or not self.frame_count:
+            return False
+        return sum(self._totals) / self.frame_count > self.budget
+    
+    def summary(self):
+        """Get a one-line human readable summary of the per-frame cost"""
+        stages = ", ".join(
+            f"{name} {mean * 1000:.2f} ms (max {maximum * 1000:.2f} ms)"
+            for name, mean, maximum in self.report()
+        )
+        total = sum(self._totals) / max(1, self.frame_count)
+        line = f"{self.frame_count} frames, {stages}, total {total * 1000:.2f} ms/frame"
+        if self.budget is not None:
+            line += f" of {self.budget * 1000:.2f} ms budget"
+            if self.over_budget():
+                line += " (over budget)"
+        return line
@@ -0,0 +1,306 @@
+"""
+Privacy masking for the CaptureKarma capture engine
+
+Mask rectangles hide emails, API keys and similar details by pixelating or
+blurring them inside the capture pipeline, so demo captures no longer need
+a manual re-edit. Only the masked rectangles are processed. A mask can be
+static (fixed on screen) or anchored to the page, in which case it follows
+the content as it scrolls; the scroll offset is measured from the frames
+themselves by phase correlation of a downscaled column of the region.
+
+The same PrivacyMask object masks screenshots, full-page images and every
+frame of a video.
+"""
+from CaptureKarma.engine.effects import FrameEffect
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+MASK_PIXELATE = "pixelate"
+MASK_BLUR = "blur"
+
+
+class MaskRegion:
+    """A rectangle to hide, in screen coordinates"""
+    
+    def __init__(self, x, y, width, height, anchored=False):
+        """
+        Args:
+            x, y, width, height: Rectangle in screen coordinates at the start of the capture
+            anchored: Move the rectangle with the page as it scrolls, instead of keeping it
+                at a fixed place on screen
+        """
+        self.rect = (x, y, width, height)
+        self.anchored = anchored
+    
+    def frame_rect(self, origin, scroll_offset=0.0, margin=0, uncertainty=0):
+        """
+        Get the rectangle inside a frame
+
+        Args:
+            origin: Screen position (x, y) of the frame's top-left pixel
+            scroll_offset: Pixels the page has scrolled down since the capture started
+            margin: Extra pixels added on every side
+            uncertainty: Pixels the scroll offset may be off by; anchored masks grow
+                by this much above and below
+
+        Returns:
+            Tuple (left, top, right, bottom), not clipped to the frame
+        """
+        x, y, width, height = self.rect
+        left = x - origin[0]
+        top = y - origin[1]
+        spread = 0
+        if self.anchored:
+            top -= int(round(scroll_offset))
+            spread = int(uncertainty)
+        return left - margin, top - margin - spread, left + width + margin, top + height + margin + spread
+
+
+class ScrollOffsetEstimator:
+    """
+    Tracks how far the content of a region has scrolled
+
+    Consecutive frames are compared by phase correlation on a downscaled
+    green channel of the most textured column of the region. The coarse shift,
+    and the shift of the previous frame, are then refined to the exact pixel by
+    comparing every few full-resolution columns of that column, which also
+    rules out the false peaks of evenly spaced lines of text. Screen content
+    only scrolls by whole pixels, so the refined offsets add up without
+    drifting over long takes. The cost is a few milliseconds per 1080p frame.
+
+    When a frame can't be matched (a weak correlation peak that the previous
+    movement doesn't explain either, for example after a page change), the
+    offset is kept and the uncertainty grows instead, so masks that follow the
+    page can be widened rather than slide off what they hide.
+    """
+    
+    def __init__(self, halvings=2, min_response=0.1, refine_radius=3, column_step=4, uncertain_growth=48):
+        """
+        Args:
+            halvings: Number of times the column is halved in size before phase correlation
+            min_response: Minimum phase correlation peak; weaker matches (such as a page
+                change) are only accepted when they repeat the previous movement
+            refine_radius: Whole-pixel shifts tried on either side of each estimate
+            column_step: Spacing of the full-resolution pixel columns used for refinement
+            uncertain_growth: Pixels added to the uncertainty for every frame that can't be matched
+        """
+        self.halvings = halvings
+        self.min_response = min_response
+        self.refine_radius = refine_radius
+        self.column_step = column_step
+        self.uncertain_growth = uncertain_growth
+        self.offset = 0.0
+        self.uncertainty = 0
+        self._previous = None
+        self._previous_strip = None
+        self._last_shift = 0
+        self._left = None
+        self._window = None
+    
+    def reset(self):
+        """Start again from an offset of zero"""
+        self.offset = 0.0
+        self.uncertainty = 0
+        self._previous = None
+        self._previous_strip = None
+        self._last_shift = 0
+        self._left = None
+    
+    def update(self, frame):
+        """
+        Measure the movement since the previous frame
+
+        Args:
+            frame: BGR or BGRA array
+
+        Returns:
+            Pixels the page has scrolled down since the first frame
+        """
+        if self._left is None:
+            self._left = self._pick_column(frame)
+        
+        # Compared at the previous frame's column, so both sides show the same part of the page
+        sample, strip = self._sample(frame, self._left), self._strip(frame, self._left)
+        if self._previous is not None and self._previous.shape == sample.shape:
+            if not np.array_equal(self._previous_strip, strip):
+                self._match(sample, strip, frame.shape[0])
+        
+        # The most textured column of this frame is used for the next comparison
+        left = self._pick_column(frame)
+        if left != self._left:
+            self._left = left
+            sample, strip = self._sample(frame, left), self._strip(frame, left)
+        self._previous = sample
+        self._previous_strip = strip
+        return self.offset
+    
+    def _match(self, sample, strip, height):
+        """Add the movement between the previous and the current frame to the offset"""
+        (shift_x, shift_y), response = cv2.phaseCorrelate(self._previous, sample, self._window)
+        
+        # Content moves up when the page scrolls down; scrolling usually keeps its pace
+        candidates = [self._last_shift]
+        if response >= self.min_response:
+            candidates.insert(0, int(round(-shift_y * 2 ** self.halvings)))
+        shift, error = self._refine(candidates, self._previous_strip, strip)
+        
+        # A match is only trusted if it explains the frame much better than no movement does
+        if shift is not None and error * 2 < self._error(self._previous_strip, strip, 0):
+            self.offset += shift
+            self._last_shift = shift
+        else:
+            self.uncertainty = min(height, self.uncertainty + self.uncertain_growth)
+            self._last_shift = 0
+    
+    def _refine(self, candidates, previous, current):
+        """
+        Find the whole-pixel scroll near a set of estimates that best lines up two strips
+
+        Shifts are tried outwards from each estimate in turn and only a strictly
+        better match replaces the current one, so ties keep the estimate that
+        was tried first.
+
+        Returns:
+            Tuple (shift, mean absolute error), or (None, None) when no shift fits in the strip
+        """
+        height = current.shape[0]
+        best_shift, best_error = None, None
+        for center in candidates:
+            for distance in range(self.refine_radius + 1):
+                for shift in sorted({center - distance, center + distance}):
+                    if abs(shift) >= height // 2:
+                        continue
+                    error = self._error(previous, current, shift)
+                    if best_error is None or error < best_error:
+                        best_shift, best_error = shift, error
+        return best_shift, best_error
+    
+    @staticmethod
+    def _error(previous, current, shift):
+        """Mean absolute difference of two strips after scrolling down by shift pixels"""
+        height = current.shape[0]
+        
+        # After scrolling down by shift pixels, row y of the new frame was row y + shift before
+        if shift >= 0:
+            return np.abs(previous[shift:] - current[:height - shift]).mean()
+        return np.abs(previous[:height + shift] - current[-shift:]).mean()
+    
+    def _pick_column(self, frame):
+        """Find the left edge of the most textured column of a frame"""
+        width = frame.shape[1]
+        column_width = self._column_width(width)
+        
+        # Variance of a coarse grid of the green channel, in steps of half a column
+        coarse = frame[::8, ::4, 1]
+        starts = list(range(0, width - column_width + 1, max(1, column_width // 2)))
+        texture = [coarse[:, left // 4:(left + column_width) // 4].var() for left in starts]
+        return starts[int(np.argmax(texture))]
+    
+    @staticmethod
+    def _column_width(width):
+        """Width of the column compared between frames"""
+        return min(width, max(16, width // 4))
+    
+    def _strip(self, frame, left):
+        """Get every few full-resolution green channel pixel columns of a column of a frame"""
+        right = left + self._column_width(frame.shape[1])
+        return frame[:, left:right:self.column_step, 1].astype(np.int16)
+    
+    def _sample(self, frame, left):
+        """Get the downscaled green channel of a column of a frame"""
+        sample = frame[:, left:left + self._column_width(frame.shape[1])]
+        
+        # Exact halvings take OpenCV's fast area-averaging path
+        for _ in range(self.halvings):
+            sample = cv2.resize(
+                sample, (max(1, sample.shape[1] // 2), max(1, sample.shape[0] // 2)),
+                interpolation=cv2.INTER_AREA
+            )
+        sample = np.float32(sample[:, :, 1])
+        
+        # Hanning window, created once per sample size
+        if self._window is None or self._window.shape != sample.shape:
+            self._window = cv2.createHanningWindow((sample.shape[1], sample.shape[0]), cv2.CV_32F)
+        return sample
+
+
+class PrivacyMask(FrameEffect):
+    """Pixelates or blurs mask rectangles in screenshots and video frames"""
+    
+    name = "privacy"
+    
+    def __init__(self, masks, mode=MASK_PIXELATE, strength=12, margin=4):
+        """
+        Args:
+            masks: List of MaskRegion objects, or (x, y, width, height) tuples for static masks
+            mode: MASK_PIXELATE or MASK_BLUR
+            strength: Pixel block size for pixelation, or box size for blurring
+            margin: Extra pixels masked on every side, to allow for small tracking errors
+        """
+        if mode not in (MASK_PIXELATE, MASK_BLUR):
+            raise ValueError(f"Unknown mask mode: {mode}")
+        
+        self.masks = [mask if isinstance(mask, MaskRegion) else MaskRegion(*mask) for mask in masks]
+        self.mode = mode
+        self.strength = max(2, int(strength))
+        self.margin = margin
+        self._estimator = None
+    
+    @property
+    def has_anchored_masks(self):
+        """Whether any mask follows the page as it scrolls"""
+        return any(mask.anchored for mask in self.masks)
+    
+    def mask(self, image, origin=(0, 0), scroll_offset=0.0, uncertainty=0):
+        """
+        Mask an image in place
+
+        Args:
+            image: BGR, BGRA or RGB array
+            origin: Screen position (x, y) of the image's top-left pixel
+            scroll_offset: Pixels the page has scrolled down since the masks were placed
+            uncertainty: Pixels the scroll offset may be off by
+
+        Returns:
+            The masked image; a copy if the image was read-only
+        """
+        if not image.flags.writeable:
+            image = image.copy()
+        
+        height, width = image.shape[:2]
+        for mask in self.masks:
+            left, top, right, bottom = mask.frame_rect(origin, scroll_offset, self.margin, uncertainty)
+            left, top = max(0, left), max(0, top)
+            right, bottom = min(width, right), min(height, bottom)
+            if right > left and bottom > top:
+                self._obscure(image[top:bottom, left:right])
+        return image
+    
+    def prepare(self, width, height):
+        # The scroll offset is only measured when a mask needs it
+        self._estimator = ScrollOffsetEstimator() if self.has_anchored_masks else None
+        return width, height
+    
+    def apply(self, frame):
+        if self._estimator is None:
+            return self.mask(frame, self.origin)
+        
+        # Anchored masks widen instead of guessing when the scroll couldn't be followed
+        scroll_offset = self._estimator.update(frame)
+        return self.mask(frame, self.origin, scroll_offset, self._estimator.uncertainty)
+    
+    def _obscure(self, roi):
+        """Pixelate or blur one rectangle in place"""
+        height, width = roi.shape[:2]
+        if self.mode == MASK_PIXELATE:
+            # Downsample with area averaging, then scale back up with hard block edges
+            small = cv2.resize(
+                roi, (max(1, width // self.strength), max(1, height // self.strength)),
+                interpolation=cv2.INTER_AREA
+            )
+            roi[:] = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+        else:
+            roi[:] = cv2.blur(roi, (self.strength, self.strength))
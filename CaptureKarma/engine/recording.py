@@ -0,0 +1,659 @@
+"""
+Video recording for the CaptureKarma capture engine
+"""
+import os
+import time
+import datetime
+import threading
+
+from CaptureKarma.capture.multi_monitor import MultiMonitorCapture
+from CaptureKarma.capture.multi_region import MultiRegionGrabber, normalize_regions, region_filename
+from CaptureKarma.capture.window_tracker import WindowTracker
+from CaptureKarma.engine.effects import EffectsPipeline, CursorOverlay
+from CaptureKarma.engine.results import RecordingResult
+from CaptureKarma.utils.frame_analysis import FrameAnalyzer, FRAME_OK, FRAME_FROZEN, FRAME_WARNINGS
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+
+class RecordingEngine:
+    """
+    Records screen regions to video files on a background thread
+
+    start() returns once the capture thread is running and stop() returns a
+    RecordingResult; record() does both for a fixed duration.
+    """
+    
+    def __init__(self, status_callback=None, finished_callback=None):
+        """
+        Args:
+            status_callback: Optional callback receiving progress messages (called from
+                the capture thread)
+            finished_callback: Optional callback receiving the RecordingResult (None if the
+                recording failed) when a recording ends without stop(), for example when
+                it is trimmed at the end of a scroll (called from the capture thread)
+        """
+        self.status_callback = status_callback
+        self.finished_callback = finished_callback
+        self.is_recording = False
+        self.recording_thread = None
+        
+        # Outcome of the last recording, set when its files are finished
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+        
+        # Variables for recording state; one output file per capture region
+        self.video_filename = None
+        self.video_filenames = []
+        self.temp_files = []
+        self.recording_fps = 30
+        self.codec_quality = 18  # Default medium quality
+        
+        # Shared frame clock, so input replay can run in lock-step with capture
+        self.recording_started = threading.Event()
+        self.recording_start_time = None
+        self.macro_replayer = None
+        
+        # Set to stop the capture loop; the loop waits on it between frames
+        self.stop_event = threading.Event()
+        
+        # Frame count after which the frozen tail of a scroll take is dropped
+        self.trim_frame_count = None
+        self.tail_seconds = 1.0
+        
+        # Every frame is checked for black, blank, frozen and torn captures
+        self.frame_analyzers = []
+        self.frame_warning = None
+        self.frozen_warning_seconds = 3.0
+        self._frozen_frames = 0
+        
+        # Parallel per-monitor capture, used when recording all monitors
+        self.monitor_capture = None
+        
+        # Follows the target window's geometry when it moves or is resized
+        self.window_tracker = None
+        
+        # Per-region effects applied to every frame before it is written
+        self.effect_pipelines = []
+        
+        # Smoothed delay between a frame's deadline and its capture, in seconds
+        self.capture_lag = 0.0
+    
+    @property
+    def is_saturated(self):
+        """Whether the recording is falling behind its frame rate"""
+        return self.is_recording and self.capture_lag > 0.5 / self.recording_fps
+    
+    def start(self, region, output_dir, fps=30, quality_index=2,
+              output_format="mp4", scrolling_enabled=False,
+              scroll_amount=0, scroll_duration=0, scroll_step=5,
+              macro_file=None, stop_at_end=False, all_monitors=False,
+              follow_window=None, tracking_rate=5.0, countdown=3.0, filename=None, effects=None,
+              show_cursor=False, show_clicks=False, privacy_mask=None):
+        """
+        Start recording a region
+
+        Args:
+            region: Tuple (x, y, width, height) defining the region to capture, or a list
+                of such tuples to record several regions into separate files in sync
+            output_dir: Directory to save the recording
+            fps: Frames per second for the recording
+            quality_index: Quality index (0=low, 1=medium, 2=high)
+            output_format: Output format ("mp4" or "avi")
+            scrolling_enabled: Whether to perform scrolling during recording
+            scroll_amount: Amount to scroll (negative for down, positive for up)
+            scroll_duration: Duration of scrolling in seconds
+            scroll_step: Size of each scroll step (smaller = smoother)
+            macro_file: Optional input macro to replay in lock-step with the first frame
+            stop_at_end: Stop scrolling at the end of the page and trim the frozen tail
+            all_monitors: Record the whole virtual desktop, grabbing every monitor on its own thread
+            follow_window: Optional native window handle; the capture follows the window when it
+                moves or is resized, letterboxed into the size it had at the start
+            tracking_rate: Window geometry polls per second when following a window
+            countdown: Seconds to wait before the first frame, to switch to the target window
+            filename: Optional output path; a timestamped name in output_dir is used by default
+            effects: Optional EffectsPipeline, or list of FrameEffect objects, applied to every
+                frame before it is written (e.g. a watermark and a crop)
+            show_cursor: Draw the mouse pointer into the video (screen grabs don't include it)
+            show_clicks: Draw a ripple at every mouse click
+            privacy_mask: Optional PrivacyMask hiding parts of every frame; masks anchored to
+                the page follow it as it scrolls
+
+        Raises:
+            ValueError if no region is given or a recording is already running
+        """
+        if not region:
+            raise ValueError("No capture region given")
+        if self.is_recording:
+            raise ValueError("A recording is already running")
+        
+        # Create a timestamp for the filename
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Set filename based on preferred format; extra regions get a _r1, _r2, ... suffix
+        self.regions = normalize_regions(region)
+        self.monitor_capture = None
+        if all_monitors:
+            self.monitor_capture = MultiMonitorCapture()
+            self.regions = [self.monitor_capture.bounds]
+        
+        # Window following applies to a single region only
+        self.window_tracker = None
+        if follow_window is not None and len(self.regions) == 1 and not all_monitors:
+            self.window_tracker = WindowTracker(follow_window, self.regions[0], rate=tracking_rate)
+        self.video_filename = filename or os.path.join(output_dir, f"recording_{timestamp}.{output_format}")
+        self.video_filenames = [
+            region_filename(self.video_filename, index, len(self.regions))
+            for index in range(len(self.regions))
+        ]
+        self.video_filename = self.video_filenames[0]
+        
+        # Calculate quality settings
+        if quality_index == 0:  # Low
+            self.codec_quality = 23
+        elif quality_index == 1:  # Medium
+            self.codec_quality = 18
+        else:  # High
+            self.codec_quality = 13
+        
+        # Get FPS setting
+        self.recording_fps = fps
+        self.countdown = countdown
+        
+        # Store parameters for potential scrolling; the first region drives end-of-page detection
+        self.region = self.regions[0]
+        self.scrolling_enabled = scrolling_enabled
+        self.scroll_amount = scroll_amount
+        self.scroll_duration = scroll_duration
+        self.scroll_step = scroll_step
+        self.stop_at_end = stop_at_end
+        self.trim_frame_count = None
+        
+        # Load the macro up front so a bad file fails before recording starts
+        self.macro_replayer = None
+        if macro_file:
+            from CaptureKarma.utils.macros import MacroReplayer, load_macro
+            self.macro_replayer = MacroReplayer(load_macro(macro_file))
+        
+        # Prepare the effects up front so a bad watermark fails before recording starts;
+        # without an explicit budget the effects may use a quarter of the frame interval
+        if not isinstance(effects, EffectsPipeline):
+            effects = EffectsPipeline(effects, budget=0.25 / fps)
+        
+        # The cursor is drawn first, while frames still line up with screen coordinates;
+        # a followed window is letterboxed, so the pointer can't be placed there
+        if (show_cursor or show_clicks) and self.window_tracker:
+            print("Cursor overlay is not available while following a window")
+        elif show_cursor or show_clicks:
+            overlay = CursorOverlay(show_pointer=show_cursor, show_clicks=show_clicks)
+            effects = EffectsPipeline([overlay] + effects.effects, effects.budget)
+        
+        # Masks go before everything else, so nothing is drawn over a hidden area and blurred with it;
+        # a letterboxed window no longer maps to screen coordinates, so masks would land in the wrong place
+        if privacy_mask and self.window_tracker:
+            raise ValueError("Privacy masks can't be used while following a window")
+        if privacy_mask:
+            effects = EffectsPipeline([privacy_mask] + effects.effects, effects.budget)
+        
+        self.effect_pipelines = []
+        if effects:
+            self.effect_pipelines = [
+                effects.for_size(width - width % 2, height - height % 2, origin=(x, y))
+                for x, y, width, height in self.regions
+            ]
+        
+        # Set recording flag
+        self.recording_started.clear()
+        self.recording_start_time = None
+        self.stop_event.clear()
+        self.finished.clear()
+        self.result = None
+        self.error = None
+        self.is_recording = True
+        
+        # Start the recording thread
+        self.recording_thread = threading.Thread(target=self._record_screen)
+        self.recording_thread.daemon = True
+        self.recording_thread.start()
+        
+        self._report(
+            f"Recording started in {output_format.upper()} format. Switch to your target window."
+        )
+    
+    def stop(self, timeout=None):
+        """
+        Stop the recording and wait for the video files
+
+        Args:
+            timeout: Maximum seconds to wait for the files to be finished (None waits until done)
+
+        Returns:
+            RecordingResult, or None if the files were not finished within the timeout
+            or the recording failed (see error)
+        """
+        # Actually stop the recording
+        self.is_recording = False
+        self.stop_event.set()
+        
+        # Stop any macro that is still replaying
+        if self.macro_replayer:
+            self.macro_replayer.cancel()
+        
+        # Wait for recording thread to finish
+        if self.recording_thread and self.recording_thread.is_alive():
+            self.recording_thread.join(timeout=timeout)
+        return self.result
+    
+    def record(self, region, output_dir, duration, **options):
+        """
+        Record for a fixed duration and wait for the finished files
+
+        The recording ends early if stop_at_end trims it at the end of a scroll.
+
+        Args:
+            region: Tuple (x, y, width, height), or a list of such tuples
+            output_dir: Directory to save the recording in
+            duration: Seconds to record, counted from the first frame
+            **options: Any other start() argument
+
+        Returns:
+            RecordingResult
+
+        Raises:
+            The error that stopped the recording, if any
+        """
+        self.start(region, output_dir, **options)
+        
+        # Wait for the countdown, then for the duration or the end of the capture loop
+        while not self.recording_started.wait(0.1):
+            if self.finished.is_set():
+                break
+        if self.recording_started.is_set():
+            self.finished.wait(duration)
+        
+        result = self.stop()
+        if self.error is not None:
+            raise self.error
+        return result
+    
+    def _record_screen(self):
+        """Record the screen region in a background thread"""
+        try:
+            # Ensure even dimensions (required by some codecs)
+            regions = [
+                (x, y, width - width % 2, height - height % 2)
+                for x, y, width, height in self.regions
+            ]
+            
+            # Get preferred format
+            preferred_format = os.path.splitext(self.video_filename)[1].lower().lstrip('.')
+            
+            # Create one video writer per region
+            writers = []
+            self.temp_files = []
+            for index, (video_filename, (x, y, width, height)) in enumerate(zip(self.video_filenames, regions)):
+                # Effects such as crops and padding change the size of the written frames
+                if self.effect_pipelines:
+                    width, height = self.effect_pipelines[index].output_size
+                out, temp_file = self._create_writer(video_filename, preferred_format, width, height)
+                writers.append(out)
+                self.temp_files.append(temp_file)
+                
+                # Print debug info
+                print(f"Region: {(x, y, width, height)}, using dimensions {width}x{height}")
+            print(f"FPS: {self.recording_fps}, Quality: {self.codec_quality}")
+            
+            # Countdown to recording
+            if self.countdown > 0:
+                self._report(f"Recording will start in {self.countdown:g} seconds...")
+            if self.stop_event.wait(self.countdown):
+                for out in writers:
+                    out.release()
+                print("Recording stopped during countdown")
+                return
+            
+            # Setup MSS for capture if available
+            if MSS_AVAILABLE:
+                sct = mss.mss()
+                use_mss = True
+                print("Using MSS for screen capture (better for multi-monitor setups)")
+            else:
+                use_mss = False
+                print("MSS not available, using PyAutoGUI for capture")
+            
+            # All regions on a monitor are cut from a single grab per frame
+            grabber = MultiRegionGrabber(regions, sct.monitors[1:] if use_mss else None)
+            if len(regions) > 1:
+                print(f"Recording {len(regions)} regions with {len(grabber.groups)} grab(s) per frame")
+            
+            # For all monitors, every screen is grabbed on its own thread into one canvas
+            if self.monitor_capture:
+                self.monitor_capture.start()
+            
+            # When following a window, frames are fitted into the initial size on a black canvas
+            if self.window_tracker:
+                tracked_region = self.regions[0]
+                letterbox = np.zeros((regions[0][3], regions[0][2], 3), dtype=np.uint8)
+                self.window_tracker.start()
+            
+            # If scrolling is enabled, start scrolling in a separate thread
+            if self.scrolling_enabled:
+                self._start_scrolling_thread()
+            
+            # Get start time on the monotonic clock shared with macro replay
+            start_time = time.perf_counter()
+            frame_time = 1.0 / self.recording_fps
+            next_frame_time = start_time
+            self.capture_lag = 0.0
+            self.recording_start_time = start_time
+            self.recording_started.set()
+            
+            # Replay the input macro against the same clock
+            if self.macro_replayer:
+                self._start_macro_thread(start_time)
+            
+            # Main recording loop
+            frame_count = 0
+            self.frame_analyzers = [FrameAnalyzer() for _ in regions]
+            self.frame_warning = None
+            self._frozen_frames = 0
+            while not self.stop_event.is_set():
+                current_time = time.perf_counter()
+                
+                # Stop once the frozen tail after the end of the page has been captured
+                if self.trim_frame_count is not None and frame_count >= self.trim_frame_count:
+                    self.is_recording = False
+                    self._report("End of page reached: recording trimmed")
+                    break
+                
+                # Maintain consistent FPS
+                if current_time >= next_frame_time:
+                    # Track how late frames are captured, so other work can back off
+                    self.capture_lag = 0.9 * self.capture_lag + 0.1 * (current_time - next_frame_time)
+                    
+                    # Pick up a new window rectangle published by the tracker (no window-system call here)
+                    if self.window_tracker and self.window_tracker.region != tracked_region:
+                        tracked_region = self.window_tracker.region
+                        grabber = MultiRegionGrabber([tracked_region])
+                        letterbox.fill(0)
+                    
+                    # Capture the regions using the appropriate method
+                    if self.monitor_capture:
+                        # Composite of all monitors, cropped to the even recording size
+                        canvas = self.monitor_capture.grab()
+                        views = [canvas[:regions[0][3], :regions[0][2]]]
+                        conversion = cv2.COLOR_BGRA2BGR
+                    elif use_mss:
+                        # Use MSS for better multi-monitor support; regions are views into the grab
+                        views = grabber.grab(sct)
+                        # Convert BGRA to BGR (remove alpha channel)
+                        conversion = cv2.COLOR_BGRA2BGR
+                    else:
+                        # Fallback to PyAutoGUI
+                        views = grabber.grab_with_pyautogui()
+                        # Convert RGB to OpenCV's BGR
+                        conversion = cv2.COLOR_RGB2BGR
+                    
+                    # Check the frames on the raw buffer and warn while the take is still running
+                    self._check_frame_quality([
+                        analyzer.analyze(pixels) for analyzer, pixels in zip(self.frame_analyzers, views)
+                    ])
+                    
+                    # Write one frame to each video
+                    for index, (out, pixels) in enumerate(zip(writers, views)):
+                        frame = cv2.cvtColor(pixels, conversion)
+                        if self.window_tracker:
+                            frame = self._letterbox(frame, letterbox)
+                        if self.effect_pipelines:
+                            # Effects work in place; the letterbox canvas outlives the frame, so copy it
+                            if frame is letterbox:
+                                frame = frame.copy()
+                            frame = self.effect_pipelines[index].apply(frame)
+                        out.write(frame)
+                    frame_count += 1
+                    
+                    # Calculate next frame time
+                    next_frame_time = start_time + (frame_count + 1) * frame_time
+                    
+                    # Update UI occasionally
+                    if frame_count % 30 == 0:  # Update every 30 frames
+                        elapsed = int(current_time - start_time)
+                        warning = f" - Warning: {self.frame_warning}" if self.frame_warning else ""
+                        self._report(
+                            f"Recording: {elapsed}s, {frame_count} frames{warning}"
+                        )
+                else:
+                    # Sleep until the next frame is due, waking early if recording is stopped
+                    self.stop_event.wait(next_frame_time - current_time)
+            end_time = time.perf_counter()
+            
+            # Clean up resources
+            monitor_summary = None
+            if use_mss:
+                sct.close()
+            if self.window_tracker:
+                self.window_tracker.stop()
+            if self.monitor_capture:
+                self.monitor_capture.stop()
+                
+                # Show which screen limits the frame rate
+                monitor_summary = self.monitor_capture.summary()
+                print(f"Monitor capture timing: {monitor_summary}")
+                self._report(f"Monitor capture timing: {monitor_summary}")
+            
+            # Release video writers
+            for out in writers:
+                out.release()
+            print(f"Recording finished with {frame_count} frames captured")
+            for index, analyzer in enumerate(self.frame_analyzers):
+                print(f"Frame quality (region {index + 1}): {analyzer.summary()}")
+            effects_timing = [pipeline.summary() for pipeline in self.effect_pipelines]
+            for index, summary in enumerate(effects_timing):
+                print(f"Effects timing (region {index + 1}): {summary}")
+            if any(pipeline.over_budget() for pipeline in self.effect_pipelines):
+                self._report("Warning: video effects took longer than their per-frame budget")
+            
+            # Process the videos based on format
+            if preferred_format == "mp4":
+                # Convert AVI to MP4 for better compatibility
+                for index, temp_file in enumerate(self.temp_files):
+                    self.video_filenames[index] = self._finalize_video(temp_file, self.video_filenames[index])
+                self.video_filename = self.video_filenames[0]
+            else:
+                # AVI is already in final form
+                self._report(f"Video saved to {self.video_filename}")
+            
+            self.result = RecordingResult(
+                list(self.video_filenames), frame_count, end_time - start_time, self.recording_fps,
+                trimmed=self.trim_frame_count is not None and frame_count >= self.trim_frame_count,
+                quality=[analyzer.summary() for analyzer in self.frame_analyzers],
+                monitor_timing=monitor_summary,
+                effects_timing=effects_timing
+            )
+        
+        except Exception as e:
+            self.error = e
+            self._report(f"Error during recording: {str(e)}")
+            print(f"Error during recording: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            self.is_recording = False
+            if self.monitor_capture:
+                self.monitor_capture.stop()
+            if self.window_tracker:
+                self.window_tracker.stop()
+        finally:
+            for pipeline in self.effect_pipelines:
+                pipeline.close()
+            self.finished.set()
+            
+            # Let the caller catch up with a recording that ended by itself
+            if self.finished_callback and not self.stop_event.is_set():
+                self.finished_callback(self.result)
+    
+    def _letterbox(self, frame, canvas):
+        """Scale a frame to fit the output size, centered on a black canvas"""
+        height, width = frame.shape[:2]
+        canvas_height, canvas_width = canvas.shape[:2]
+        if (height, width) == (canvas_height, canvas_width):
+            return frame
+        
+        scale = min(canvas_width / width, canvas_height / height)
+        fit_width = max(1, int(width * scale))
+        fit_height = max(1, int(height * scale))
+        offset_x = (canvas_width - fit_width) // 2
+        offset_y = (canvas_height - fit_height) // 2
+        canvas[offset_y:offset_y + fit_height, offset_x:offset_x + fit_width] = cv2.resize(
+            frame, (fit_width, fit_height), interpolation=cv2.INTER_AREA
+        )
+        return canvas
+    
+    def _create_writer(self, video_filename, preferred_format, width, height):
+        """
+        Create the video writer for one output file
+
+        Returns:
+            Tuple (writer, temp_file) where temp_file is the file the writer records to
+        """
+        # Setup codec and output file based on preferred format
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        if preferred_format == "mp4":
+            # For MP4, we'll record to temp AVI first then convert for quality
+            temp_file = os.path.join(os.path.dirname(video_filename), 
+                                    f"temp_{os.path.basename(video_filename)}.avi")
+            print(f"Recording to temporary AVI file: {temp_file} (will be converted to MP4)")
+        else:
+            # For direct AVI output
+            temp_file = video_filename
+            print(f"Recording directly to AVI file: {temp_file}")
+        
+        out = cv2.VideoWriter(temp_file, fourcc, self.recording_fps, (width, height))
+        return out, temp_file
+    
+    def _check_frame_quality(self, results):
+        """Report a warning when the captured frames look wrong"""
+        # Any problem in one region is reported; the take only counts as frozen if every region is
+        problems = [result for result in results if result not in (FRAME_OK, FRAME_FROZEN)]
+        if problems:
+            result = problems[0]
+        elif all(result == FRAME_FROZEN for result in results):
+            result = FRAME_FROZEN
+        else:
+            result = FRAME_OK
+        
+        # Unchanged frames are normal for a short while; only a long freeze is reported
+        if result == FRAME_FROZEN:
+            self._frozen_frames += 1
+            if self._frozen_frames < self.frozen_warning_seconds * self.recording_fps:
+                return
+        else:
+            self._frozen_frames = 0
+        
+        warning = None if result == FRAME_OK else FRAME_WARNINGS[result]
+        if warning != self.frame_warning:
+            self.frame_warning = warning
+            if warning:
+                print(f"Frame quality warning: {warning}")
+                self._report(f"Warning: {warning}")
+    
+    def _start_scrolling_thread(self):
+        """Start a thread to handle scrolling during recording"""
+        from CaptureKarma.utils.scrolling import ScrollingManager
+        
+        # Create scrolling manager
+        scrolling_manager = ScrollingManager()
+        
+        # Start scrolling in a separate thread
+        scroll_thread = threading.Thread(
+            target=scrolling_manager.delayed_scroll,
+            args=(
+                self.scroll_amount,
+                self.scroll_duration,
+                self.scroll_step,
+                self._report
+            ),
+            kwargs={
+                "stop_at_end": self.stop_at_end,
+                "region": self.region,
+                "end_callback": self._on_scroll_end
+            }
+        )
+        scroll_thread.daemon = True
+        scroll_thread.start()
+    
+    def _on_scroll_end(self, last_motion_time):
+        """Trim the recording shortly after the page stopped moving"""
+        if self.recording_start_time is None:
+            return
+        
+        keep_seconds = max(0.0, last_motion_time - self.recording_start_time) + self.tail_seconds
+        self.trim_frame_count = int(keep_seconds * self.recording_fps) + 1
+        print(f"Scroll reached the end of the page, keeping {self.trim_frame_count} frames")
+    
+    def _start_macro_thread(self, start_time):
+        """Start replaying the input macro with the recording start as time zero"""
+        macro_thread = threading.Thread(
+            target=self.macro_replayer.play,
+            kwargs={"origin": start_time, "frame_rate": self.recording_fps}
+        )
+        macro_thread.daemon = True
+        macro_thread.start()
+    
+    def _finalize_video(self, temp_file, video_filename):
+        """
+        Convert temporary AVI file to MP4 with proper quality settings
+
+        Returns:
+            The filename of the finished video (an AVI file if conversion failed)
+        """
+        try:
+            # Use ffmpeg to convert AVI to MP4 with high quality
+            # Drop any frames captured after the trim point
+            trim_option = f"-frames:v {self.trim_frame_count} " if self.trim_frame_count else ""
+            ffmpeg_cmd = (
+                f'ffmpeg -i "{temp_file}" {trim_option}-c:v libx264 '
+                f'-crf {self.codec_quality} "{video_filename}"'
+            )
+            print(f"Running conversion: {ffmpeg_cmd}")
+            result = os.system(ffmpeg_cmd)
+            print(f"Conversion completed with result code: {result}")
+            
+            # Check if conversion was successful
+            if os.path.exists(video_filename) and os.path.getsize(video_filename) > 0:
+                # Remove the temporary AVI file
+                os.remove(temp_file)
+                self._report(f"Video processed and saved to {video_filename}")
+                print(f"Conversion successful, temporary file removed, final video at: {video_filename}")
+            else:
+                # If conversion failed, keep the AVI file and rename it to the expected output name
+                print(f"Conversion failed, using original AVI file as output")
+                # If the video format was supposed to be MP4 but conversion failed, use the AVI file
+                if video_filename.lower().endswith('.mp4'):
+                    # Just rename the temp file to match the expected name (but with .avi extension)
+                    final_avi = video_filename.replace('.mp4', '.avi')
+                    os.rename(temp_file, final_avi)
+                    video_filename = final_avi
+                    self._report(
+                        f"MP4 conversion failed, saved as AVI instead: {video_filename}"
+                    )
+                else:
+                    # This shouldn't happen, but just in case
+                    self._report(f"Video saved at {temp_file}")
+                    video_filename = temp_file
+        except Exception as e:
+            self._report(f"Error converting video: {str(e)}")
+            print(f"Error converting video: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        return video_filename
+    
+    def _report(self, message):
+        """Pass a progress message to the status callback"""
+        if self.status_callback:
+            self.status_callback(message)
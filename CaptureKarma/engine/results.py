@@ -0,0 +1,302 @@
+"""
+Result objects returned by the CaptureKarma capture engine
+"""
+import threading
+
+from CaptureKarma.utils.timing import TimingReport
+
+
+class ScreenshotResult:
+    """
+    Outcome of a single screenshot
+
+    The pixels are grabbed before the result is returned; the files are
+    encoded and written in the background. wait() blocks until they are on
+    disk, and add_done_callback() reports completion without blocking.
+    """
+    
+    def __init__(self, filenames, regions, pixels, channel_order, is_black, futures):
+        """
+        Args:
+            filenames: One output file per captured region
+            regions: List of (x, y, width, height) tuples that were captured
+            pixels: Pixel array of the first region
+            channel_order: Channel layout of pixels ("BGRA" or "RGB")
+            is_black: Whether the first region appears all black
+            futures: Futures of the background saves, one per file
+        """
+        self.filenames = filenames
+        self.regions = regions
+        self.pixels = pixels
+        self.channel_order = channel_order
+        self.is_black = is_black
+        self.error = None
+        
+        self._futures = futures
+        self._callbacks = []
+        self._remaining = len(futures)
+        self._done_event = threading.Event()
+        self._lock = threading.Lock()
+        for future in futures:
+            future.add_done_callback(self._on_file_done)
+    
+    @property
+    def done(self):
+        """Whether every file has been written (or failed)"""
+        return self._done_event.is_set()
+    
+    def wait(self, timeout=None):
+        """
+        Block until every file has been written
+
+        Returns:
+            The list of written filenames
+
+        Raises:
+            The first error that occurred while saving, or TimeoutError
+        """
+        if not self._done_event.wait(timeout):
+            raise TimeoutError("Screenshot files were not written in time")
+        if self.error is not None:
+            raise self.error
+        return self.filenames
+    
+    def add_done_callback(self, callback):
+        """
+        Call callback(result) once every file has been written
+
+        The callback runs on the encoding pool, or immediately if the files are already saved.
+        """
+        with self._lock:
+            if not self._done_event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+    
+    def _on_file_done(self, future):
+        """Count finished saves and run the callbacks after the last one"""
+        error = future.exception()
+        with self._lock:
+            if error is not None and self.error is None:
+                self.error = error
+            self._remaining -= 1
+            if self._remaining > 0:
+                return
+            self._done_event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error in screenshot callback: {str(e)}")
+
+
+class SeriesResult:
+    """Outcome of a burst or interval capture"""
+    
+    def __init__(self, filenames, count, timing, cancelled):
+        """
+        Args:
+            filenames: Every file written, in capture order
+            count: Number of capture ticks (each tick saves one file per region)
+            timing: TimingReport of the capture deadlines
+            cancelled: Whether the series was stopped before reaching its count
+        """
+        self.filenames = filenames
+        self.count = count
+        self.timing = timing
+        self.cancelled = cancelled
+
+
+class RecordingResult:
+    """Outcome of a recording"""
+    
+    def __init__(self, filenames, frame_count, duration, fps, trimmed=False, quality=None, monitor_timing=None,
+                 effects_timing=None):
+        """
+        Args:
+            filenames: One finished video per recorded region
+            frame_count: Number of frames written to each video
+            duration: Seconds between the first frame and the end of the capture
+            fps: Recording frame rate
+            trimmed: Whether the frozen tail after the end of a scroll was dropped
+            quality: One FrameAnalyzer summary line per region
+            monitor_timing: Per-monitor timing summary when all monitors were recorded
+            effects_timing: One EffectsPipeline summary line per region when effects were applied
+        """
+        self.filenames = filenames
+        self.frame_count = frame_count
+        self.duration = duration
+        self.fps = fps
+        self.trimmed = trimmed
+        self.quality = quality or []
+        self.monitor_timing = monitor_timing
+        self.effects_timing = effects_timing or []
+    
+    @property
+    def filename(self):
+        """The video of the first region"""
+        return self.filenames[0] if self.filenames else None
+    
+    @property
+    def effective_fps(self):
+        """Frames actually captured per second"""
+        return self.frame_count / self.duration if self.duration > 0 else 0.0
+
+
+class AnimationResult:
+    """Outcome of an animated GIF, APNG or WebP export"""
+    
+    def __init__(self, filename, frame_count, source_frames, duration, size, file_size, timings):
+        """
+        Args:
+            filename: The written animation
+            frame_count: Number of frames stored after dropping repeats
+            source_frames: Number of frames read from the recording
+            duration: Seconds the animation plays for one loop
+            size: Frame size as (width, height)
+            file_size: Bytes written
+            timings: Dict of seconds spent per stage ("decode", "palette", "encode", "write")
+        """
+        self.filename = filename
+        self.frame_count = frame_count
+        self.source_frames = source_frames
+        self.duration = duration
+        self.size = size
+        self.file_size = file_size
+        self.timings = timings
+    
+    def summary(self):
+        """Get a one-line human readable summary"""
+        stages = ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in self.timings.items())
+        return (
+            f"Exported {self.frame_count} of {self.source_frames} frames ({self.size[0]}x{self.size[1]}, "
+            f"{self.duration:.1f} s) to {self.file_size / 1024:.0f} KB: {stages}"
+        )
+
+
+class ContactSheetResult:
+    """Outcome of making the poster and contact sheet of one recording"""
+    
+    def __init__(self, video, poster, sheet, timestamps, cached=False, seconds=0.0, error=None):
+        """
+        Args:
+            video: The recording
+            poster: Written poster image, or None if it failed
+            sheet: Written contact sheet, or None if it failed
+            timestamps: Time in seconds of every frame on the sheet
+            cached: Whether the existing images were still up to date and were kept
+            seconds: Time taken
+            error: The exception that stopped this recording, if any
+        """
+        self.video = video
+        self.poster = poster
+        self.sheet = sheet
+        self.timestamps = timestamps
+        self.cached = cached
+        self.seconds = seconds
+        self.error = error
+    
+    @property
+    def filenames(self):
+        """The poster and the contact sheet"""
+        return [filename for filename in (self.poster, self.sheet) if filename]
+
+
+class ScrollResult:
+    """Outcome of a scroll"""
+    
+    def __init__(self, amount, reached_end, duration):
+        """
+        Args:
+            amount: Requested scroll amount (negative for down)
+            reached_end: Whether scrolling stopped because the page stopped moving
+            duration: Seconds the scroll took
+        """
+        self.amount = amount
+        self.reached_end = reached_end
+        self.duration = duration
+
+
+class StepRecord:
+    """Planned and actual timing of one scenario step"""
+    
+    def __init__(self, name, track, action, planned):
+        """
+        Args:
+            name: Step name
+            track: Track the step ran on
+            action: Step action (e.g. "scroll")
+            planned: Planned start, in seconds from the start of the scenario
+        """
+        self.name = name
+        self.track = track
+        self.action = action
+        self.planned = planned
+        self.started = None
+        self.finished = None
+        self.status = None
+        self.error = None
+    
+    @property
+    def lateness(self):
+        """Seconds between the planned and the actual start, or None if the step never started"""
+        return None if self.started is None else self.started - self.planned
+    
+    def summary(self):
+        """Get a one-line human readable summary"""
+        if self.started is None:
+            return f"{self.track:<10}{self.name:<24}planned {self.planned:8.3f} s  {self.status}"
+        line = (
+            f"{self.track:<10}{self.name:<24}planned {self.planned:8.3f} s  started {self.started:8.3f} s "
+            f"({self.lateness * 1000:+7.2f} ms)  took {self.finished - self.started:7.3f} s  {self.status}"
+        )
+        if self.error is not None:
+            line += f": {str(self.error)}"
+        return line
+
+
+class ScenarioResult:
+    """Outcome of a scenario"""
+    
+    def __init__(self, steps, screenshots, recording, cancelled):
+        """
+        Args:
+            steps: One StepRecord per step, in planned order
+            screenshots: ScreenshotResult of every screenshot step
+            recording: RecordingResult of the scenario's recording, or None
+            cancelled: Whether the scenario was stopped before its last step
+        """
+        self.steps = steps
+        self.screenshots = screenshots
+        self.recording = recording
+        self.cancelled = cancelled
+    
+    @property
+    def error(self):
+        """The first error a step raised, or None"""
+        for step in self.steps:
+            if step.error is not None:
+                return step.error
+        return None
+    
+    @property
+    def filenames(self):
+        """Every file the scenario wrote"""
+        filenames = [filename for screenshot in self.screenshots for filename in screenshot.filenames]
+        if self.recording:
+            filenames.extend(self.recording.filenames)
+        return filenames
+    
+    @property
+    def timing(self):
+        """TimingReport of the start of every step that ran"""
+        started = [step for step in self.steps if step.started is not None]
+        return TimingReport([step.planned for step in started], [step.started for step in started])
+    
+    def format_log(self):
+        """Format the planned and actual timing of every step as plain text"""
+        lines = [step.summary() for step in self.steps]
+        lines.append(f"Scenario timing: {self.timing.summary()}")
+        return "\n".join(lines)
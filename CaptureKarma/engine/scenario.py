@@ -0,0 +1,323 @@
+"""
+Scripted capture scenarios for the CaptureKarma capture engine
+
+A scenario is a timeline of steps such as "move the cursor here, start
+recording, scroll 2000 px over 6 s, take a screenshot, stop". Every step has
+a planned start on one monotonic clock; steps on the same track run one
+after another, and separate tracks (for example input and capture) run in
+parallel against the same clock. Cancelling sets one event that every wait,
+cursor move and scroll checks, so a cancelled scenario always ends the same
+way: running steps stop at their next check, steps that haven't started are
+skipped, and a recording the scenario started is stopped and saved.
+"""
+import threading
+import time
+
+from CaptureKarma.capture.multi_region import normalize_regions
+from CaptureKarma.engine.recording import RecordingEngine
+from CaptureKarma.engine.results import ScenarioResult, StepRecord
+from CaptureKarma.engine.screenshot import ScreenshotEngine
+from CaptureKarma.utils.cursor_paths import PROFILE_MINIMUM_JERK
+from CaptureKarma.utils.lazy_imports import lazy_import
+from CaptureKarma.utils.scrolling import ScrollingManager
+from CaptureKarma.utils.timing import DeadlineScheduler
+
+pyautogui = lazy_import("pyautogui")
+
+
+ACTION_WAIT = "wait"
+ACTION_MOVE = "move"
+ACTION_CLICK = "click"
+ACTION_SCROLL = "scroll"
+ACTION_SCREENSHOT = "screenshot"
+ACTION_START_RECORDING = "start_recording"
+ACTION_STOP_RECORDING = "stop_recording"
+
+ACTIONS = (
+    ACTION_WAIT, ACTION_MOVE, ACTION_CLICK, ACTION_SCROLL,
+    ACTION_SCREENSHOT, ACTION_START_RECORDING, ACTION_STOP_RECORDING
+)
+
+STEP_DONE = "done"
+STEP_FAILED = "failed"
+STEP_CANCELLED = "cancelled"
+STEP_SKIPPED = "skipped"
+
+DEFAULT_TRACK = "main"
+
+
+class ScenarioStep:
+    """One action on a scenario timeline"""
+    
+    def __init__(self, action, planned, track=DEFAULT_TRACK, name=None, params=None):
+        """
+        Args:
+            action: One of ACTIONS
+            planned: Planned start, in seconds from the start of the scenario
+            track: Track the step runs on
+            name: Step name used in the timing log (defaults to the action)
+            params: Dict of action parameters
+        """
+        self.action = action
+        self.planned = planned
+        self.track = track
+        self.name = name or action
+        self.params = params or {}
+    
+    @property
+    def duration(self):
+        """Planned duration of the step (moves, scrolls and waits take their duration parameter)"""
+        return float(self.params.get("duration", 0.0))
+
+
+class Scenario:
+    """A timeline of steps on one or more parallel tracks"""
+    
+    def __init__(self):
+        self.steps = []
+        self._track_ends = {}
+    
+    def add(self, action, at=None, delay=0.0, track=DEFAULT_TRACK, name=None, **params):
+        """
+        Add a step to the timeline
+
+        Args:
+            action: One of ACTIONS
+            at: Planned start in seconds from the start of the scenario; by default the step
+                is planned for the end of the previous step on its track
+            delay: Extra seconds to wait after the previous step, when at is not given
+            track: Track to run the step on
+            name: Step name used in the timing log
+            **params: Action parameters (e.g. x, y and duration for a move)
+
+        Returns:
+            The new ScenarioStep
+
+        Raises:
+            ValueError for an unknown action or a step that overlaps the previous one on its track
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown scenario action: {action}")
+        
+        track_end = self._track_ends.get(track, 0.0)
+        planned = track_end + delay if at is None else float(at)
+        if planned < track_end - 1e-9:
+            raise ValueError(
+                f"Step '{name or action}' starts at {planned:.3f} s, before the previous step "
+                f"on track '{track}' ends at {track_end:.3f} s"
+            )
+        
+        step = ScenarioStep(action, planned, track, name, params)
+        self.steps.append(step)
+        self._track_ends[track] = planned + step.duration
+        return step
+    
+    def wait(self, duration, track=DEFAULT_TRACK):
+        """Add a pause to a track"""
+        return self.add(ACTION_WAIT, track=track, duration=duration)
+    
+    @property
+    def duration(self):
+        """Planned end of the last step"""
+        return max(self._track_ends.values(), default=0.0)
+    
+    def tracks(self):
+        """Get the steps grouped by track, each track in planned order"""
+        tracks = {}
+        for step in sorted(self.steps, key=lambda step: step.planned):
+            tracks.setdefault(step.track, []).append(step)
+        return tracks
+    
+    @classmethod
+    def from_steps(cls, steps):
+        """
+        Build a scenario from a list of step dicts, as found in a job file
+
+        Each dict has an "action" key plus any add() argument, e.g.
+        {"action": "scroll", "track": "input", "amount": -2000, "duration": 6}.
+        """
+        scenario = cls()
+        for step in steps:
+            step = dict(step)
+            scenario.add(step.pop("action", None), **step)
+        return scenario
+
+
+class ScenarioRunner:
+    """Runs scenarios against shared capture engines"""
+    
+    def __init__(self, output_dir, region=None, screenshot_engine=None, recording_engine=None,
+                 status_callback=None, stop_on_error=True, lead_time=0.05):
+        """
+        Args:
+            output_dir: Directory screenshots and recordings are saved in
+            region: Default capture region for steps that don't give one
+            screenshot_engine: Optional ScreenshotEngine to reuse
+            recording_engine: Optional RecordingEngine to reuse
+            status_callback: Optional callback receiving progress messages
+            stop_on_error: Cancel the whole scenario when a step fails
+            lead_time: Seconds between starting the track threads and time zero, so every
+                track is already waiting when the first step is due
+        """
+        self.output_dir = output_dir
+        self.region = region
+        self.screenshot_engine = screenshot_engine or ScreenshotEngine(status_callback=status_callback)
+        self.recording_engine = recording_engine or RecordingEngine(status_callback=status_callback)
+        self.status_callback = status_callback
+        self.stop_on_error = stop_on_error
+        self.lead_time = lead_time
+        self.scrolling_manager = ScrollingManager()
+        
+        # Set to cancel the scenario; every wait, move and scroll watches it
+        self.cancel_event = threading.Event()
+        self.is_running = False
+        
+        self._screenshots = []
+        self._started_recording = False
+        self._lock = threading.Lock()
+    
+    def run(self, scenario):
+        """
+        Run a scenario, blocking until every track has finished or the scenario is cancelled
+
+        Returns:
+            ScenarioResult with the planned and actual timing of every step
+        """
+        if self.is_running:
+            raise ValueError("A scenario is already running")
+        
+        self.is_running = True
+        self.cancel_event.clear()
+        self._screenshots = []
+        self._started_recording = False
+        
+        tracks = scenario.tracks()
+        records = {id(step): StepRecord(step.name, step.track, step.action, step.planned) for step in scenario.steps}
+        
+        try:
+            # All tracks share one origin on the monotonic clock
+            origin = time.perf_counter() + self.lead_time
+            threads = []
+            for name, steps in tracks.items():
+                thread = threading.Thread(
+                    target=self._run_track,
+                    args=(steps, records, origin),
+                    name=f"scenario-{name}"
+                )
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            
+            for thread in threads:
+                thread.join()
+            
+            # Clean up in a fixed order: stop our recording, then wait for screenshot files
+            recording = None
+            if self._started_recording:
+                recording = self.recording_engine.stop()
+            for screenshot in self._screenshots:
+                try:
+                    screenshot.wait()
+                except Exception as e:
+                    print(f"Error saving scenario screenshot: {str(e)}")
+        finally:
+            self.is_running = False
+        
+        result = ScenarioResult(
+            [records[id(step)] for step in sorted(scenario.steps, key=lambda step: step.planned)],
+            list(self._screenshots),
+            recording,
+            self.cancel_event.is_set()
+        )
+        print(result.format_log())
+        return result
+    
+    def cancel(self):
+        """Cancel a running scenario"""
+        self.cancel_event.set()
+    
+    def _run_track(self, steps, records, origin):
+        """Run the steps of one track in order (runs on the track's thread)"""
+        scheduler = DeadlineScheduler(cancel_event=self.cancel_event)
+        scheduler.start(origin)
+        
+        for step in steps:
+            record = records[id(step)]
+            if not scheduler.wait_until(step.planned):
+                record.status = STEP_SKIPPED
+                continue
+            
+            record.started = scheduler.elapsed()
+            try:
+                self._run_step(step, scheduler)
+                record.status = STEP_CANCELLED if self.cancel_event.is_set() else STEP_DONE
+            except Exception as e:
+                record.status = STEP_FAILED
+                record.error = e
+                print(f"Scenario step '{step.name}' failed: {str(e)}")
+                if self.stop_on_error:
+                    self.cancel_event.set()
+            record.finished = scheduler.elapsed()
+    
+    def _run_step(self, step, scheduler):
+        """Perform the action of one step"""
+        params = step.params
+        
+        if step.action == ACTION_WAIT:
+            # Block until the planned end, so a pause at the end of a track still delays the cleanup
+            scheduler.wait_until(step.planned + step.duration)
+            return
+        
+        if step.action == ACTION_MOVE:
+            # Moves play back on their own scheduler, so they stop as soon as the scenario is cancelled
+            waypoints = params.get("path") or [(params["x"], params["y"])]
+            waypoints = [tuple(pyautogui.position())] + [tuple(point) for point in waypoints]
+            self.scrolling_manager.cursor_engine.move(
+                waypoints, step.duration, params.get("profile", PROFILE_MINIMUM_JERK),
+                scheduler=DeadlineScheduler(cancel_event=self.cancel_event)
+            )
+        
+        elif step.action == ACTION_CLICK:
+            pyautogui.click(params.get("x"), params.get("y"), button=params.get("button", "left"), _pause=False)
+        
+        elif step.action == ACTION_SCROLL:
+            # The first region is watched for the end of the page
+            regions = normalize_regions(self._get_region(params, required=False))
+            self.scrolling_manager.smooth_scroll(
+                params["amount"], step.duration, params.get("step", 5),
+                status_callback=self.status_callback,
+                cancel_event=self.cancel_event,
+                stop_at_end=params.get("stop_at_end", False),
+                region=regions[0] if regions else None
+            )
+        
+        elif step.action == ACTION_SCREENSHOT:
+            # Files are written in the background; the step only covers the grab
+            result = self.screenshot_engine.capture(
+                self._get_region(params), self.output_dir,
+                encoder=params.get("encoder"),
+                filename=params.get("filename")
+            )
+            with self._lock:
+                self._screenshots.append(result)
+        
+        elif step.action == ACTION_START_RECORDING:
+            options = {key: value for key, value in params.items() if key not in ("region", "duration")}
+            options.setdefault("countdown", 0.0)
+            self.recording_engine.start(self._get_region(params), self.output_dir, **options)
+            self._started_recording = True
+            
+            # The step ends with the first frame, so later steps line up with the video
+            while not self.recording_engine.recording_started.wait(0.05):
+                if self.recording_engine.finished.is_set() or self.cancel_event.is_set():
+                    break
+        
+        elif step.action == ACTION_STOP_RECORDING:
+            self.recording_engine.stop()
+    
+    def _get_region(self, params, required=True):
+        """Get the region of a step, falling back to the runner's default region"""
+        region = params.get("region", self.region)
+        if region is None and required:
+            raise ValueError("No capture region given")
+        return region
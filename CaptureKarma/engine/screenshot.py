@@ -0,0 +1,241 @@
+"""
+Screenshots for the CaptureKarma capture engine
+"""
+import os
+import datetime
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from CaptureKarma.capture.multi_region import MultiRegionGrabber, normalize_regions, region_filename
+from CaptureKarma.engine.results import ScreenshotResult, SeriesResult
+from CaptureKarma.engine.scroll import scroll_region
+from CaptureKarma.utils.encoders import ImageEncoder
+from CaptureKarma.utils.frame_analysis import is_frame_black
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+from CaptureKarma.utils.scrolling import ScrollingManager
+from CaptureKarma.utils.timing import DeadlineScheduler
+
+np = lazy_import("numpy")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+
+class ScreenshotEngine:
+    """Takes screenshots and saves them on a background encoding pool"""
+    
+    def __init__(self, encoder=None, encode_workers=None, status_callback=None):
+        """
+        Args:
+            encoder: Default ImageEncoder, used when a capture call doesn't pass one
+            encode_workers: Number of encoding threads (defaults to up to 4)
+            status_callback: Optional callback receiving progress messages
+        """
+        self.encoder = encoder or ImageEncoder()
+        self.status_callback = status_callback
+        self.scrolling_manager = ScrollingManager()
+        
+        # Encoding runs on a pool so compression never delays the next grab
+        self.encode_workers = encode_workers or min(4, os.cpu_count() or 1)
+        self.encode_pool = ThreadPoolExecutor(
+            max_workers=self.encode_workers,
+            thread_name_prefix="screenshot-encode"
+        )
+        
+        # Sequence numbers keep filenames unique within the same second
+        self.sequence = itertools.count(1)
+        
+        # One MSS session per thread, kept open between captures
+        self._local = threading.local()
+    
+    def capture(self, region, output_dir, scrolling_enabled=False, scroll_amount=0, scroll_duration=0,
+                scroll_step=5, stop_at_end=False, encoder=None, filename=None, privacy_mask=None,
+                scroll_offset=0.0):
+        """
+        Take a screenshot, optionally after scrolling
+
+        Args:
+            region: Tuple (x, y, width, height), or a list of such tuples to save several
+                regions from the same moment
+            output_dir: Directory to save the screenshot in
+            scrolling_enabled: Whether to scroll before the capture
+            scroll_amount: Amount to scroll (negative for down, positive for up)
+            scroll_duration: Duration of scrolling in seconds
+            scroll_step: Size of each scroll step (smaller = smoother)
+            stop_at_end: Stop scrolling early once the end of the page is reached
+            encoder: Optional ImageEncoder choosing the file format
+            filename: Optional output path; a timestamped name is used by default
+            privacy_mask: Optional PrivacyMask hiding parts of the screenshot
+            scroll_offset: Pixels the page has scrolled since the privacy mask was placed,
+                for masks anchored to the page. The scroll before the capture isn't
+                measured, so anchored masks can't be combined with scrolling_enabled
+
+        Returns:
+            ScreenshotResult; the files are written in the background
+        """
+        encoder = encoder or self.encoder
+        regions = normalize_regions(region)
+        if not regions:
+            raise ValueError("No capture region given")
+        if scrolling_enabled and privacy_mask and privacy_mask.has_anchored_masks:
+            raise ValueError(
+                "Masks anchored to the page can't follow a scroll before a screenshot; "
+                "record the scroll instead, or use masks that stay in place"
+            )
+        
+        filename = filename or self.next_filename(output_dir, extension=encoder.extension)
+        
+        # Scroll the first region into position before the capture
+        if scrolling_enabled:
+            self._report("Taking screenshot with scrolling...")
+            scroll_region(
+                regions[0], scroll_amount, scroll_duration, scroll_step,
+                stop_at_end=stop_at_end,
+                status_callback=self.status_callback,
+                scrolling_manager=self.scrolling_manager
+            )
+        
+        views, channel_order = self.grab(regions)
+        if privacy_mask:
+            views = self._mask(views, regions, privacy_mask, scroll_offset)
+        
+        # Save the screenshots in the background
+        filenames = [region_filename(filename, index, len(views)) for index in range(len(views))]
+        futures = [
+            self.encode_pool.submit(self.save_pixels, pixels, channel_order, region_file, encoder)
+            for pixels, region_file in zip(views, filenames)
+        ]
+        return ScreenshotResult(filenames, regions, views[0], channel_order, is_frame_black(views[0]), futures)
+    
+    def capture_series(self, region, output_dir, count, interval, encoder=None, cancel_event=None,
+                       privacy_mask=None):
+        """
+        Take screenshots on a fixed timeline (blocks until the series ends)
+
+        Args:
+            region: Tuple (x, y, width, height), or a list of such tuples
+            output_dir: Directory to save the screenshots in
+            count: Number of screenshots to take, or None to continue until cancelled
+            interval: Time between screenshots in seconds
+            encoder: Optional ImageEncoder choosing the file format
+            cancel_event: Optional threading.Event that stops the series when set
+            privacy_mask: Optional PrivacyMask hiding parts of every screenshot
+
+        Returns:
+            SeriesResult, once every file has been written
+        """
+        encoder = encoder or self.encoder
+        regions = normalize_regions(region)
+        scheduler = DeadlineScheduler(cancel_event=cancel_event)
+        filenames = []
+        pending = []
+        index = 0
+        cancelled = False
+        
+        # The series runs on its own thread, so it gets its own MSS session
+        with mss.mss() as sct:
+            grabber = MultiRegionGrabber(regions, sct.monitors[1:])
+            scheduler.start()
+            while count is None or index < count:
+                if not scheduler.wait_until(index * interval):
+                    cancelled = True
+                    break
+                
+                # Only the grab happens on this thread; conversion and encoding are pooled
+                views = grabber.grab(sct)
+                if privacy_mask:
+                    views = self._mask(views, regions, privacy_mask)
+                filename = self.next_filename(output_dir, extension=encoder.extension)
+                for region_index, pixels in enumerate(views):
+                    region_file = region_filename(filename, region_index, len(views))
+                    filenames.append(region_file)
+                    pending.append(self.encode_pool.submit(self.save_pixels, pixels, "BGRA", region_file, encoder))
+                index += 1
+                
+                # Drop finished saves and warn if encoding falls behind
+                pending = [future for future in pending if not future.done()]
+                if len(pending) > self.encode_workers * 2:
+                    print(f"Warning: {len(pending)} screenshots waiting to be encoded")
+                
+                total = f"/{count}" if count else ""
+                self._report(f"Captured screenshot {index}{total}")
+        
+        # Wait for the remaining files to be written
+        for future in pending:
+            future.result()
+        
+        timing = scheduler.report()
+        print(f"Screenshot series timing: {timing.summary()}")
+        return SeriesResult(filenames, index, timing, cancelled)
+    
+    def grab(self, regions):
+        """
+        Grab several regions at the same moment
+
+        Returns:
+            Tuple (views, channel_order) with one pixel array per region
+        """
+        try:
+            # Try using MSS first (better for multi-monitor setups); regions are views into the grab
+            sct = self._get_sct()
+            views = MultiRegionGrabber(regions, sct.monitors[1:]).grab(sct)
+            self._report("Screenshot taken using MSS (Windows native API)")
+            return views, "BGRA"
+        except Exception as e:
+            print(f"MSS screenshot failed: {str(e)}, trying fallback")
+        
+        # Fall back to PyAutoGUI
+        views = MultiRegionGrabber(regions).grab_with_pyautogui()
+        self._report("Screenshot taken using PyAutoGUI")
+        return views, "RGB"
+    
+    def monitor_region(self, index):
+        """
+        Get the region of a monitor
+
+        Args:
+            index: 1-based monitor number, or 0 for the whole virtual desktop
+
+        Returns:
+            Tuple (x, y, width, height)
+        """
+        monitor = self._get_sct().monitors[index]
+        return (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+    
+    def save_pixels(self, pixels, channel_order, filename, encoder=None):
+        """Convert a captured pixel array to RGB and save it (runs on the encoding pool)"""
+        if channel_order == "BGRA":
+            pixels = np.ascontiguousarray(pixels[:, :, 2::-1])
+        (encoder or self.encoder).save(pixels, filename)
+    
+    def next_filename(self, output_dir, prefix="screenshot", extension="png"):
+        """Create a timestamped filename with a sequence number"""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(output_dir, f"{prefix}_{timestamp}_{next(self.sequence):04d}.{extension}")
+    
+    def close(self):
+        """Wait for pending saves and release the encoding pool"""
+        self.encode_pool.shutdown(wait=True)
+    
+    def _mask(self, views, regions, privacy_mask, scroll_offset=0.0):
+        """Apply a privacy mask to grabbed regions, each at its own screen position"""
+        return [
+            privacy_mask.mask(pixels, origin=(x, y), scroll_offset=scroll_offset)
+            for pixels, (x, y, width, height) in zip(views, regions)
+        ]
+    
+    def _get_sct(self):
+        """Get the calling thread's MSS session, reused by later captures on the same thread"""
+        if not MSS_AVAILABLE:
+            raise RuntimeError("MSS is not installed")
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+    
+    def _report(self, message):
+        """Pass a progress message to the status callback"""
+        if self.status_callback:
+            self.status_callback(message)
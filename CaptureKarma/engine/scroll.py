@@ -0,0 +1,50 @@
+"""
+Scrolling for the CaptureKarma capture engine
+"""
+import time
+
+from CaptureKarma.engine.results import ScrollResult
+from CaptureKarma.utils.lazy_imports import lazy_import
+from CaptureKarma.utils.scrolling import ScrollingManager
+
+pyautogui = lazy_import("pyautogui")
+
+
+def scroll_region(region, amount, duration=3.0, step=5, stop_at_end=False, click=True,
+                  status_callback=None, cancel_event=None, scrolling_manager=None):
+    """
+    Move the cursor to the center of a region, focus it and scroll
+
+    Args:
+        region: Tuple (x, y, width, height) of the content to scroll
+        amount: Amount to scroll (negative for down, positive for up)
+        duration: Duration of the scroll in seconds
+        step: Size of each scroll step (smaller = smoother)
+        stop_at_end: Stop early once the content in the region stops moving
+        click: Click the center of the region first, so it receives the scroll
+        status_callback: Optional callback receiving progress messages
+        cancel_event: Optional threading.Event that stops the scroll when set
+            (defaults to the abort hotkey)
+        scrolling_manager: Optional ScrollingManager to reuse
+
+    Returns:
+        ScrollResult
+    """
+    manager = scrolling_manager or ScrollingManager()
+    
+    # Move to the middle of the region so the scroll goes to the right window
+    x = region[0] + region[2] // 2
+    y = region[1] + region[3] // 2
+    manager.smooth_move(x, y, duration=0.5)
+    if click:
+        pyautogui.click()
+    
+    start = time.perf_counter()
+    reached_end = manager.smooth_scroll(
+        amount, duration, step,
+        status_callback=status_callback,
+        cancel_event=cancel_event,
+        stop_at_end=stop_at_end,
+        region=region
+    )
+    return ScrollResult(amount, reached_end, time.perf_counter() - start)
@@ -2,30 +2,60 @@
 Capture tab UI component for the CaptureKarma Screen Capture Tool
 """
 import os
+import threading
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 from CaptureKarma.capture.region import RegionSelector
 from CaptureKarma.capture.screenshot import ScreenshotCapture
 from CaptureKarma.capture.recording import VideoRecorder
+from CaptureKarma.ui.live_preview import LivePreview
 from CaptureKarma.utils.scrolling import ScrollingManager
 
 
 class CaptureTab(QtWidgets.QWidget):
     """Tab for capture functionality including screenshots and recording"""
     
+    # Emitted from the input listener thread when a macro has been saved
+    macro_saved = QtCore.pyqtSignal(str)
+    
+    # Emitted from the encoding pool when a screenshot thumbnail is ready
+    thumbnail_ready = QtCore.pyqtSignal(QtGui.QImage)
+    
+    # Emitted from the thumbnail pool when a region dialog thumbnail or region preview is ready
+    region_thumbnail_ready = QtCore.pyqtSignal(object, QtGui.QImage, bool)
+    region_preview_ready = QtCore.pyqtSignal(str, object, QtGui.QImage, bool)
+    
+    # Emitted from the window index thread with the added and removed window handles
+    windows_changed = QtCore.pyqtSignal(list, list)
+    
+    # Emitted from the capture thread when a recording ends by itself, with its RecordingResult
+    recording_finished = QtCore.pyqtSignal(object)
+    
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
         self.capture_region = None
+        self.extra_regions = []
+        self.macro_file = None
+        self.macro_recorder = None
+        self.macro_saved.connect(self._on_macro_saved)
         
         # Create helper classes
         self.region_selector = RegionSelector(self)
+        self.region_thumbnail_ready.connect(self.region_selector.show_thumbnail)
+        self.region_preview_ready.connect(self.region_selector.show_region_preview)
+        self.windows_changed.connect(self.region_selector.update_windows_list)
         self.screenshot_capture = ScreenshotCapture(self)
+        self.thumbnail_ready.connect(self.screenshot_capture.show_thumbnail_preview)
         self.video_recorder = VideoRecorder(self)
+        self.recording_finished.connect(self._on_recording_finished)
         self.scrolling_manager = ScrollingManager()
         
         # Setup the UI components
         self.setup_ui()
+        
+        # Live preview of the selected region, paused while recording is busy
+        self.live_preview = LivePreview(self.preview_label, self.video_recorder)
     
     def setup_ui(self):
         """Setup the capture tab UI components"""
@@ -38,6 +68,21 @@ class CaptureTab(QtWidgets.QWidget):
         self.preview_label.setMinimumHeight(300)
         layout.addWidget(self.preview_label)
         
+        self.live_preview_cb = QtWidgets.QCheckBox("Live Preview")
+        self.live_preview_cb.setToolTip("Continuously update the preview (frame rate is set on the Settings tab)")
+        self.live_preview_cb.toggled.connect(self.toggle_live_preview)
+        self.live_preview_cb.setEnabled(False)
+        
+        self.follow_window_cb = QtWidgets.QCheckBox("Follow Window")
+        self.follow_window_cb.setToolTip("Keep recording the selected window when it is moved or resized")
+        self.follow_window_cb.setEnabled(False)
+        
+        preview_options_layout = QtWidgets.QHBoxLayout()
+        preview_options_layout.addWidget(self.live_preview_cb)
+        preview_options_layout.addWidget(self.follow_window_cb)
+        preview_options_layout.addStretch()
+        layout.addLayout(preview_options_layout)
+        
         # Buttons area
         buttons_layout = QtWidgets.QHBoxLayout()
         
@@ -45,6 +90,12 @@ class CaptureTab(QtWidgets.QWidget):
         self.select_region_btn.clicked.connect(self.select_capture_region)
         buttons_layout.addWidget(self.select_region_btn)
         
+        self.add_region_btn = QtWidgets.QPushButton("Add Region")
+        self.add_region_btn.setToolTip("Capture another region at the same time, saved to its own file")
+        self.add_region_btn.clicked.connect(self.add_capture_region)
+        self.add_region_btn.setEnabled(False)
+        buttons_layout.addWidget(self.add_region_btn)
+        
         self.take_screenshot_btn = QtWidgets.QPushButton("Take Screenshot")
         self.take_screenshot_btn.clicked.connect(self.take_screenshot)
         self.take_screenshot_btn.setEnabled(False)
@@ -57,12 +108,40 @@ class CaptureTab(QtWidgets.QWidget):
         
         layout.addLayout(buttons_layout)
         
+        # Screenshot options
+        self.setup_screenshot_options(layout)
+        
         # Scrolling options
         self.setup_scrolling_options(layout)
         
+        # Macro options
+        self.setup_macro_options(layout)
+        
         # Output info
         self.setup_output_info(layout)
     
+    def setup_screenshot_options(self, parent_layout):
+        """Setup screenshot mode options UI"""
+        screenshot_group = QtWidgets.QGroupBox("Screenshot Options")
+        screenshot_layout = QtWidgets.QFormLayout(screenshot_group)
+        
+        self.screenshot_mode_combo = QtWidgets.QComboBox()
+        self.screenshot_mode_combo.addItems(["Single", "Burst", "Interval"])
+        screenshot_layout.addRow("Screenshot Mode:", self.screenshot_mode_combo)
+        
+        self.burst_count_spin = QtWidgets.QSpinBox()
+        self.burst_count_spin.setRange(2, 1000)
+        self.burst_count_spin.setValue(10)
+        screenshot_layout.addRow("Burst Shots:", self.burst_count_spin)
+        
+        self.screenshot_interval_spin = QtWidgets.QDoubleSpinBox()
+        self.screenshot_interval_spin.setRange(0.05, 3600.0)
+        self.screenshot_interval_spin.setValue(1.0)
+        self.screenshot_interval_spin.setSingleStep(0.5)
+        screenshot_layout.addRow("Interval (seconds):", self.screenshot_interval_spin)
+        
+        parent_layout.addWidget(screenshot_group)
+    
     def setup_scrolling_options(self, parent_layout):
         """Setup scrolling options UI"""
         scroll_group = QtWidgets.QGroupBox("Scrolling Options")
@@ -71,6 +150,10 @@ class CaptureTab(QtWidgets.QWidget):
         self.enable_scrolling_cb = QtWidgets.QCheckBox("Enable Scrolling During Capture")
         scroll_layout.addWidget(self.enable_scrolling_cb)
         
+        # Off by default, like stop_at_end in the engine and in batch jobs
+        self.stop_at_end_cb = QtWidgets.QCheckBox("Stop Automatically at End of Page")
+        scroll_layout.addWidget(self.stop_at_end_cb)
+        
         scroll_params_layout = QtWidgets.QFormLayout()
         
         self.scroll_amount_spin = QtWidgets.QSpinBox()
@@ -93,6 +176,32 @@ class CaptureTab(QtWidgets.QWidget):
         scroll_layout.addLayout(scroll_params_layout)
         parent_layout.addWidget(scroll_group)
     
+    def setup_macro_options(self, parent_layout):
+        """Setup input macro options UI"""
+        macro_group = QtWidgets.QGroupBox("Macro Options")
+        macro_layout = QtWidgets.QVBoxLayout(macro_group)
+        
+        macro_buttons_layout = QtWidgets.QHBoxLayout()
+        
+        self.record_macro_btn = QtWidgets.QPushButton("Record Macro")
+        self.record_macro_btn.clicked.connect(self.record_macro)
+        macro_buttons_layout.addWidget(self.record_macro_btn)
+        
+        self.load_macro_btn = QtWidgets.QPushButton("Load Macro...")
+        self.load_macro_btn.clicked.connect(self.load_macro)
+        macro_buttons_layout.addWidget(self.load_macro_btn)
+        
+        macro_layout.addLayout(macro_buttons_layout)
+        
+        self.macro_label = QtWidgets.QLabel("No macro loaded")
+        macro_layout.addWidget(self.macro_label)
+        
+        self.replay_macro_cb = QtWidgets.QCheckBox("Replay Macro During Recording")
+        self.replay_macro_cb.setEnabled(False)
+        macro_layout.addWidget(self.replay_macro_cb)
+        
+        parent_layout.addWidget(macro_group)
+    
     def setup_output_info(self, parent_layout):
         """Setup output information UI"""
         output_group = QtWidgets.QGroupBox("Output Information")
@@ -105,16 +214,62 @@ class CaptureTab(QtWidgets.QWidget):
         self.open_folder_btn.clicked.connect(self.parent.open_output_folder)
         output_layout.addWidget(self.open_folder_btn)
         
+        self.dejudder_btn = QtWidgets.QPushButton("De-judder Recording...")
+        self.dejudder_btn.clicked.connect(self.dejudder_recording)
+        output_layout.addWidget(self.dejudder_btn)
+        
+        self.animation_btn = QtWidgets.QPushButton("Export Animation...")
+        self.animation_btn.clicked.connect(self.export_animation)
+        output_layout.addWidget(self.animation_btn)
+        
+        self.contact_sheets_btn = QtWidgets.QPushButton("Make Contact Sheets...")
+        self.contact_sheets_btn.clicked.connect(self.make_contact_sheets)
+        output_layout.addWidget(self.contact_sheets_btn)
+        
         parent_layout.addWidget(output_group)
     
     def select_capture_region(self):
         """Open the region selection dialog"""
         self.capture_region = self.region_selector.select_region()
+        self.extra_regions = []
         
         if self.capture_region:
-            # Enable capture buttons
+            # Enable capture buttons; extra regions don't apply when recording all monitors
             self.take_screenshot_btn.setEnabled(True)
             self.record_btn.setEnabled(True)
+            self.add_region_btn.setEnabled(not self.region_selector.all_monitors)
+            self.live_preview_cb.setEnabled(True)
+            self.follow_window_cb.setEnabled(self.region_selector.window_handle is not None)
+            
+            # Follow the new region if the live preview is on
+            if self.live_preview.is_running:
+                self.live_preview.start(self.capture_region)
+    
+    def toggle_live_preview(self, enabled):
+        """Start or stop the live preview of the selected region"""
+        if enabled and self.capture_region:
+            self.live_preview.set_fps(self.parent.settings_tab.preview_fps_spin.value())
+            self.live_preview.start(self.capture_region)
+        else:
+            self.live_preview.stop()
+    
+    def add_capture_region(self):
+        """Select an additional region that is captured together with the first one"""
+        region = self.region_selector.select_region()
+        if region and self.region_selector.all_monitors:
+            self.region_selector.all_monitors = False
+            self.parent.status_bar.showMessage("All Monitors can't be combined with other regions")
+        elif region:
+            self.extra_regions.append(region)
+            self.parent.status_bar.showMessage(
+                f"{len(self.extra_regions) + 1} regions selected; each is saved to its own file"
+            )
+    
+    def get_capture_regions(self):
+        """Get the selected region, or a list of regions if extra regions were added"""
+        if not self.extra_regions:
+            return self.capture_region
+        return [self.capture_region] + self.extra_regions
     
     def take_screenshot(self):
         """Capture a screenshot of the selected region"""
@@ -122,22 +277,59 @@ class CaptureTab(QtWidgets.QWidget):
             self.parent.status_bar.showMessage("Please select a region first")
             return
         
+        # Encoder chosen on the settings tab
+        encoder = self.parent.settings_tab.get_image_encoder()
+        
+        # Burst and interval captures run in the background
+        screenshot_mode = self.screenshot_mode_combo.currentText()
+        if screenshot_mode == "Burst":
+            self.screenshot_capture.take_burst(
+                self.get_capture_regions(),
+                self.parent.output_dir,
+                self.burst_count_spin.value(),
+                self.screenshot_interval_spin.value(),
+                encoder=encoder
+            )
+            return
+        if screenshot_mode == "Interval":
+            self.toggle_interval_capture()
+            return
+        
         # Get scrolling options
         scrolling_enabled = self.enable_scrolling_cb.isChecked()
         scroll_amount = self.scroll_amount_spin.value() if scrolling_enabled else 0
         scroll_duration = self.scroll_duration_spin.value() if scrolling_enabled else 0
         scroll_step = self.scroll_step_spin.value() if scrolling_enabled else 0
+        stop_at_end = scrolling_enabled and self.stop_at_end_cb.isChecked()
         
         # Take the screenshot
         self.screenshot_capture.take_screenshot(
-            self.capture_region,
+            self.get_capture_regions(),
             self.parent.output_dir,
             scrolling_enabled=scrolling_enabled,
             scroll_amount=scroll_amount,
             scroll_duration=scroll_duration,
-            scroll_step=scroll_step
+            scroll_step=scroll_step,
+            stop_at_end=stop_at_end,
+            encoder=encoder
         )
     
+    def toggle_interval_capture(self):
+        """Start or stop taking screenshots at a fixed interval"""
+        if self.screenshot_capture.is_capturing_series:
+            self.screenshot_capture.stop_series()
+            self.take_screenshot_btn.setText("Take Screenshot")
+            self.screenshot_mode_combo.setEnabled(True)
+        else:
+            self.screenshot_capture.start_interval(
+                self.get_capture_regions(),
+                self.parent.output_dir,
+                self.screenshot_interval_spin.value(),
+                encoder=self.parent.settings_tab.get_image_encoder()
+            )
+            self.take_screenshot_btn.setText("Stop Interval Capture")
+            self.screenshot_mode_combo.setEnabled(False)
+    
     def toggle_recording(self):
         """Start or stop video recording"""
         if not self.video_recorder.is_recording:
@@ -162,10 +354,19 @@ class CaptureTab(QtWidgets.QWidget):
         scroll_amount = self.scroll_amount_spin.value() if scrolling_enabled else 0
         scroll_duration = self.scroll_duration_spin.value() if scrolling_enabled else 0
         scroll_step = self.scroll_step_spin.value() if scrolling_enabled else 0
+        stop_at_end = scrolling_enabled and self.stop_at_end_cb.isChecked()
+        
+        # Replay the loaded macro in lock-step with the recording if requested
+        macro_file = self.macro_file if self.replay_macro_cb.isChecked() else None
+        
+        # Follow the selected window if it moves or is resized
+        follow_window = None
+        if self.follow_window_cb.isEnabled() and self.follow_window_cb.isChecked() and not self.extra_regions:
+            follow_window = self.region_selector.window_handle
         
         # Start recording
         self.video_recorder.start_recording(
-            self.capture_region,
+            self.get_capture_regions(),
             self.parent.output_dir,
             fps=fps,
             quality_index=quality_index,
@@ -173,23 +374,169 @@ class CaptureTab(QtWidgets.QWidget):
             scrolling_enabled=scrolling_enabled,
             scroll_amount=scroll_amount,
             scroll_duration=scroll_duration,
-            scroll_step=scroll_step
+            scroll_step=scroll_step,
+            macro_file=macro_file,
+            stop_at_end=stop_at_end,
+            all_monitors=self.region_selector.all_monitors,
+            follow_window=follow_window,
+            tracking_rate=settings_tab.tracking_rate_spin.value(),
+            show_cursor=settings_tab.show_cursor_cb.isChecked(),
+            show_clicks=settings_tab.show_clicks_cb.isChecked()
         )
         
         # Update UI
         self.record_btn.setText("Stop Recording")
         self.select_region_btn.setEnabled(False)
+        self.add_region_btn.setEnabled(False)
         self.take_screenshot_btn.setEnabled(False)
     
     def stop_recording(self):
         """Stop video recording"""
         self.video_recorder.stop_recording()
-        
-        # Reset UI
+        self._reset_recording_ui()
+    
+    def _on_recording_finished(self, result):
+        """Catch up with a recording that ended by itself, such as one trimmed at the end of a scroll"""
+        if result is not None:
+            self.video_recorder.show_saved(result)
+        self._reset_recording_ui()
+    
+    def _reset_recording_ui(self):
+        """Put the capture controls back after a recording"""
         self.record_btn.setText("Start Recording")
         self.select_region_btn.setEnabled(True)
+        self.add_region_btn.setEnabled(not self.region_selector.all_monitors)
         self.take_screenshot_btn.setEnabled(True)
     
+    def record_macro(self):
+        """Record mouse and keyboard input until ESC is pressed"""
+        from CaptureKarma.utils.macros import MacroRecorder, default_macro_path
+        
+        try:
+            self.macro_recorder = MacroRecorder(stop_key="esc")
+        except ImportError as e:
+            self.parent.status_bar.showMessage(str(e))
+            return
+        
+        macro_path = default_macro_path(self.parent.output_dir)
+        
+        def on_finished(macro):
+            macro.save(macro_path)
+            self.macro_saved.emit(macro_path)
+        
+        self.macro_recorder.start(on_finished=on_finished)
+        self.record_macro_btn.setEnabled(False)
+        self.parent.status_bar.showMessage("Recording macro... Press ESC or the Save Macro hotkey to finish.")
+    
+    def finish_macro(self):
+        """Stop a macro recording in progress and save it"""
+        if not self.macro_recorder or not self.macro_recorder.is_recording:
+            return
+        
+        self.macro_recorder.finish()
+    
+    def load_macro(self):
+        """Load a previously recorded macro"""
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select Macro", self.parent.output_dir, "Macros (*.ckm *.json)"
+        )
+        if filename:
+            self._on_macro_saved(filename)
+    
+    def _on_macro_saved(self, macro_path):
+        """Make a recorded or loaded macro the current one"""
+        self.macro_file = macro_path
+        self.macro_label.setText(f"Macro: {os.path.basename(macro_path)}")
+        self.replay_macro_cb.setEnabled(True)
+        self.record_macro_btn.setEnabled(True)
+        self.parent.status_bar.showMessage(f"Macro ready: {macro_path}")
+    
+    def dejudder_recording(self):
+        """Smooth out the scroll motion of an existing recording"""
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select Recording", self.parent.output_dir, "Videos (*.mp4 *.avi)"
+        )
+        if not filename:
+            return
+        
+        def run():
+            from CaptureKarma.utils.dejudder import ScrollDejudder
+            
+            try:
+                ScrollDejudder().process(
+                    filename,
+                    status_callback=lambda msg: self.parent.status_bar.showMessage(msg)
+                )
+            except Exception as e:
+                self.parent.status_bar.showMessage(f"Error during de-judder: {str(e)}")
+                import traceback
+                traceback.print_exc()
+        
+        # Process in the background so the UI stays responsive
+        dejudder_thread = threading.Thread(target=run)
+        dejudder_thread.daemon = True
+        dejudder_thread.start()
+    
+    def export_animation(self):
+        """Export an existing recording as a looping GIF, APNG or animated WebP"""
+        from CaptureKarma.engine.animation import AnimationExporter, FORMAT_GIF, FORMAT_APNG, FORMAT_WEBP
+        
+        video_filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Select Recording", self.parent.output_dir, "Videos (*.mp4 *.avi)"
+        )
+        if not video_filename:
+            return
+        
+        filters = {
+            "GIF (*.gif)": FORMAT_GIF,
+            "APNG (*.png)": FORMAT_APNG,
+            "Animated WebP (*.webp)": FORMAT_WEBP,
+        }
+        filename, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Animation", f"{os.path.splitext(video_filename)[0]}.gif", ";;".join(filters)
+        )
+        if not filename:
+            return
+        
+        def run():
+            try:
+                AnimationExporter(
+                    filters.get(selected_filter, FORMAT_GIF),
+                    status_callback=lambda msg: self.parent.status_bar.showMessage(msg)
+                ).export(video_filename, filename)
+            except Exception as e:
+                self.parent.status_bar.showMessage(f"Error exporting animation: {str(e)}")
+                import traceback
+                traceback.print_exc()
+        
+        # Export in the background so the UI stays responsive
+        animation_thread = threading.Thread(target=run)
+        animation_thread.daemon = True
+        animation_thread.start()
+    
+    def make_contact_sheets(self):
+        """Make a poster and a contact sheet for every recording in a folder"""
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Recordings Folder", self.parent.output_dir)
+        if not folder:
+            return
+        
+        def run():
+            from CaptureKarma.engine.contact_sheet import ContactSheetGenerator
+            
+            try:
+                ContactSheetGenerator(
+                    status_callback=lambda msg: self.parent.status_bar.showMessage(msg)
+                ).process_folder(folder)
+            except Exception as e:
+                self.parent.status_bar.showMessage(f"Error making contact sheets: {str(e)}")
+                import traceback
+                traceback.print_exc()
+        
+        # Process in the background so the UI stays responsive
+        sheets_thread = threading.Thread(target=run)
+        sheets_thread.daemon = True
+        sheets_thread.start()
+    
     def update_preview(self, pixmap):
         """Update the preview with a captured image"""
         # Scale pixmap to fit the preview label while maintaining aspect ratio
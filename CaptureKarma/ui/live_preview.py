@@ -0,0 +1,121 @@
+"""
+Live preview for the CaptureKarma Screen Capture Tool
+"""
+from PyQt5 import QtCore, QtGui
+
+from CaptureKarma.utils.frame_analysis import mss_to_array
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+from CaptureKarma.utils.qt_conversion import array_to_qimage
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+
+class LivePreview:
+    """
+    Shows a continuously updated, downscaled view of the capture region
+
+    A QTimer drives the updates. Every frame is resized straight into one
+    preallocated NumPy buffer that a QImage wraps, so no image buffers are
+    allocated per frame. Updates are skipped while the window is hidden or
+    minimized, or while the recorder is falling behind its frame rate.
+    """
+    
+    def __init__(self, label, recorder=None, fps=10):
+        """
+        Args:
+            label: QLabel to show the preview in
+            recorder: Optional VideoRecorder; the preview pauses while it is saturated
+            fps: Preview updates per second
+        """
+        self.label = label
+        self.recorder = recorder
+        self.region = None
+        self.paused = False
+        
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self._update)
+        self.set_fps(fps)
+        
+        self._sct = None
+        self._frame = None
+        self._pixmap = QtGui.QPixmap()
+    
+    @property
+    def is_running(self):
+        """Whether the live preview is on"""
+        return self.timer.isActive()
+    
+    def set_fps(self, fps):
+        """Change the preview frame rate"""
+        self.timer.setInterval(max(1, int(1000 / fps)))
+    
+    def start(self, region):
+        """
+        Start previewing a region
+
+        Args:
+            region: Tuple (x, y, width, height) to preview
+        """
+        if not MSS_AVAILABLE:
+            print("MSS not available, live preview disabled")
+            return
+        
+        self.region = region
+        if self._sct is None:
+            self._sct = mss.mss()
+        self.timer.start()
+    
+    def stop(self):
+        """Stop the live preview and release the capture session"""
+        self.timer.stop()
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+    
+    def _update(self):
+        """Capture and show one preview frame (runs on the GUI thread)"""
+        if not self._should_update():
+            return
+        
+        try:
+            x, y, width, height = self.region
+            pixels = mss_to_array(self._sct.grab({"top": y, "left": x, "width": width, "height": height}))
+            
+            # Resize directly into the buffer the QImage points at
+            frame = self._get_frame(width, height)
+            buffer = frame.array
+            cv2.resize(pixels, (buffer.shape[1], buffer.shape[0]), dst=buffer, interpolation=cv2.INTER_AREA)
+            
+            # Refresh the pixmap in place and show it
+            self._pixmap.convertFromImage(frame.qimage)
+            self.label.setPixmap(self._pixmap)
+        except Exception as e:
+            print(f"Error updating live preview: {str(e)}")
+            self.stop()
+    
+    def _should_update(self):
+        """Check whether a preview frame should be captured now"""
+        window = self.label.window()
+        if not self.label.isVisible() or window.isMinimized():
+            return False
+        
+        # Leave the CPU to the recorder while it is missing frame deadlines
+        saturated = self.recorder is not None and self.recorder.is_saturated
+        if saturated != self.paused:
+            self.paused = saturated
+            if saturated:
+                self.label.setText("Live preview paused while recording is busy")
+        return not saturated
+    
+    def _get_frame(self, width, height):
+        """Get the preview buffer and its QImage, reallocating them only when the target size changes"""
+        scale = min(self.label.width() / width, self.label.height() / height, 1.0)
+        size = (max(1, int(height * scale)), max(1, int(width * scale)))
+        
+        if self._frame is None or self._frame.array.shape[:2] != size:
+            self._frame = array_to_qimage(np.zeros((size[0], size[1], 4), dtype=np.uint8), "BGRA")
+        return self._frame
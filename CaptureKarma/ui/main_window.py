@@ -8,11 +8,22 @@ from PyQt5 import QtWidgets, QtCore
 from CaptureKarma.ui.capture_tab import CaptureTab
 from CaptureKarma.ui.settings_tab import SettingsTab
 from CaptureKarma.ui.about_tab import AboutTab
+from CaptureKarma.utils.encoders import available_formats
+from CaptureKarma.utils.hotkeys import (
+    get_hotkey_service, ACTION_TOGGLE_RECORDING, ACTION_SCREENSHOT, ACTION_SAVE_REPLAY
+)
+from CaptureKarma.utils.lazy_imports import warm_up
 
 
 class MarketingScreenCaptureTool(QtWidgets.QMainWindow):
     """Main application window for the screen capture tool"""
     
+    # Emitted from the hotkey dispatcher thread; handled on the GUI thread
+    hotkey_triggered = QtCore.pyqtSignal(str)
+    
+    # Emitted from the warm-up thread with the image formats the installed libraries can encode
+    backends_ready = QtCore.pyqtSignal(list)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("CaptureKarma Screen Capture Tool")
@@ -48,6 +59,62 @@ class MarketingScreenCaptureTool(QtWidgets.QMainWindow):
         
         # Load settings
         self.load_settings()
+        
+        # Global hotkeys work while another window has focus
+        self.setup_hotkeys()
+        
+        # Capture libraries are loaded in the background after the first paint
+        self.backends_requested = False
+        self.backends_ready.connect(self.settings_tab.set_image_formats)
+    
+    def paintEvent(self, event):
+        """Start loading the capture libraries once the window is on screen"""
+        super().paintEvent(event)
+        if not self.backends_requested:
+            self.backends_requested = True
+            QtCore.QTimer.singleShot(0, self.warm_up_backends)
+    
+    def warm_up_backends(self):
+        """Import the capture libraries in the background once the window is on screen"""
+        warm_up(callback=self._on_backends_loaded)
+        self.capture_tab.region_selector.window_index.start()
+    
+    def _on_backends_loaded(self, timings):
+        """Report preload times and probe the image formats (runs on the warm-up thread)"""
+        loaded = ", ".join(
+            f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items() if seconds is not None
+        )
+        print(f"Capture backends loaded: {loaded}")
+        self.backends_ready.emit(available_formats())
+    
+    def setup_hotkeys(self):
+        """Start the shared hotkey service and route its actions to the UI"""
+        self.hotkey_service = get_hotkey_service()
+        self.hotkey_triggered.connect(self.handle_hotkey)
+        
+        for action in (ACTION_TOGGLE_RECORDING, ACTION_SCREENSHOT, ACTION_SAVE_REPLAY):
+            self.hotkey_service.register(action, lambda action=action: self.hotkey_triggered.emit(action))
+        
+        self.hotkey_service.start()
+    
+    def handle_hotkey(self, action):
+        """Perform the UI action bound to a hotkey"""
+        if action == ACTION_TOGGLE_RECORDING:
+            if self.capture_tab.record_btn.isEnabled():
+                self.capture_tab.toggle_recording()
+        elif action == ACTION_SCREENSHOT:
+            if self.capture_tab.take_screenshot_btn.isEnabled():
+                self.capture_tab.take_screenshot()
+        elif action == ACTION_SAVE_REPLAY:
+            self.capture_tab.finish_macro()
+    
+    def closeEvent(self, event):
+        """Stop background services when the window closes"""
+        self.hotkey_service.stop()
+        self.capture_tab.live_preview.stop()
+        self.capture_tab.region_selector.window_index.stop()
+        self.capture_tab.region_selector.thumbnails.shutdown()
+        super().closeEvent(event)
     
     def load_settings(self):
         """Load application settings"""
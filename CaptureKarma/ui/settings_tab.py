@@ -1,12 +1,21 @@
 """
 Settings tab UI component for the Marketing Screen Capture Tool
 """
+import threading
 from PyQt5 import QtWidgets, QtCore
 
+from CaptureKarma.utils.encoders import (
+    ImageEncoder, benchmark_encoders, format_benchmark, FORMAT_LABELS, FORMAT_PNG
+)
+from CaptureKarma.utils.hotkeys import get_hotkey_service, ACTION_LABELS, DEFAULT_HOTKEYS
+
 
 class SettingsTab(QtWidgets.QWidget):
     """Tab for application settings"""
     
+    # Emitted from the benchmark thread with the formatted results
+    benchmark_finished = QtCore.pyqtSignal(str)
+    
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
@@ -21,9 +30,15 @@ class SettingsTab(QtWidgets.QWidget):
         # Video settings
         self.setup_video_settings(layout)
         
+        # Screenshot settings
+        self.setup_screenshot_settings(layout)
+        
         # Output settings
         self.setup_output_settings(layout)
         
+        # Hotkey settings
+        self.setup_hotkey_settings(layout)
+        
         # Add save settings button
         save_btn = QtWidgets.QPushButton("Save Settings")
         save_btn.clicked.connect(self.save_settings)
@@ -53,8 +68,120 @@ class SettingsTab(QtWidgets.QWidget):
         self.output_format_combo.setCurrentIndex(0)  # MP4 default
         video_layout.addRow("Output Format:", self.output_format_combo)
         
+        # Live preview rate; lower values leave more CPU for recording
+        self.preview_fps_spin = QtWidgets.QSpinBox()
+        self.preview_fps_spin.setRange(1, 30)
+        self.preview_fps_spin.setValue(10)
+        self.preview_fps_spin.valueChanged.connect(self.update_preview_fps)
+        video_layout.addRow("Live Preview FPS:", self.preview_fps_spin)
+        
+        # How often a followed window's position is checked during recording
+        self.tracking_rate_spin = QtWidgets.QSpinBox()
+        self.tracking_rate_spin.setRange(1, 30)
+        self.tracking_rate_spin.setValue(5)
+        video_layout.addRow("Window Tracking Rate (Hz):", self.tracking_rate_spin)
+        
+        # Screen grabs don't include the pointer, so it can be drawn into the video (off by default,
+        # like the batch runner, so existing recordings don't change)
+        self.show_cursor_cb = QtWidgets.QCheckBox("Draw Mouse Cursor")
+        video_layout.addRow(self.show_cursor_cb)
+        
+        self.show_clicks_cb = QtWidgets.QCheckBox("Highlight Mouse Clicks")
+        video_layout.addRow(self.show_clicks_cb)
+        
         parent_layout.addWidget(video_group)
     
+    def update_preview_fps(self, fps):
+        """Apply a new live preview frame rate"""
+        if hasattr(self.parent, 'capture_tab'):
+            self.parent.capture_tab.live_preview.set_fps(fps)
+    
+    def setup_screenshot_settings(self, parent_layout):
+        """Setup screenshot encoding settings UI"""
+        screenshot_group = QtWidgets.QGroupBox("Screenshot Settings")
+        screenshot_layout = QtWidgets.QFormLayout(screenshot_group)
+        
+        # Probing the other formats imports Pillow and OpenCV, so they are added once the backends are loaded
+        self.image_format_combo = QtWidgets.QComboBox()
+        self.set_image_formats([FORMAT_PNG])
+        screenshot_layout.addRow("Image Format:", self.image_format_combo)
+        
+        self.png_compression_spin = QtWidgets.QSpinBox()
+        self.png_compression_spin.setRange(0, 9)
+        self.png_compression_spin.setValue(6)
+        screenshot_layout.addRow("PNG Compression (0 = fastest):", self.png_compression_spin)
+        
+        self.jpeg_quality_spin = QtWidgets.QSpinBox()
+        self.jpeg_quality_spin.setRange(1, 100)
+        self.jpeg_quality_spin.setValue(92)
+        screenshot_layout.addRow("JPEG Quality:", self.jpeg_quality_spin)
+        
+        self.benchmark_btn = QtWidgets.QPushButton("Benchmark Encoders on Current Region")
+        self.benchmark_btn.clicked.connect(self.benchmark_encoders)
+        self.benchmark_finished.connect(self._show_benchmark_results)
+        screenshot_layout.addRow(self.benchmark_btn)
+        
+        parent_layout.addWidget(screenshot_group)
+    
+    def set_image_formats(self, formats):
+        """Fill the image format list, keeping the current selection if it is still available"""
+        current = self.image_format_combo.currentData() or FORMAT_PNG
+        self.image_format_combo.clear()
+        for image_format in formats:
+            self.image_format_combo.addItem(FORMAT_LABELS[image_format], image_format)
+        self.image_format_combo.setCurrentIndex(max(0, self.image_format_combo.findData(current)))
+    
+    def get_image_encoder(self):
+        """Create an image encoder from the current screenshot settings"""
+        return ImageEncoder(
+            self.image_format_combo.currentData(),
+            png_compression=self.png_compression_spin.value(),
+            jpeg_quality=self.jpeg_quality_spin.value()
+        )
+    
+    def benchmark_encoders(self):
+        """Compare encode time and size of every format on a capture of the selected region"""
+        region = self.parent.capture_tab.capture_region
+        if not region:
+            self.parent.status_bar.showMessage("Please select a region first")
+            return
+        
+        png_compression = self.png_compression_spin.value()
+        jpeg_quality = self.jpeg_quality_spin.value()
+        
+        def run():
+            import mss
+            from PIL import Image
+            
+            try:
+                with mss.mss() as sct:
+                    x, y, width, height = region
+                    sct_img = sct.grab({"top": y, "left": x, "width": width, "height": height})
+                    image = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+                
+                results = benchmark_encoders(image, png_compression=png_compression, jpeg_quality=jpeg_quality)
+                self.benchmark_finished.emit(
+                    f"Capture: {image.width}x{image.height}\n\n{format_benchmark(results)}"
+                )
+            except Exception as e:
+                self.benchmark_finished.emit(f"Benchmark failed: {str(e)}")
+        
+        self.benchmark_btn.setEnabled(False)
+        self.parent.status_bar.showMessage("Benchmarking image encoders...")
+        benchmark_thread = threading.Thread(target=run)
+        benchmark_thread.daemon = True
+        benchmark_thread.start()
+    
+    def _show_benchmark_results(self, text):
+        """Display encoder benchmark results"""
+        self.benchmark_btn.setEnabled(True)
+        self.parent.status_bar.showMessage("Encoder benchmark finished")
+        
+        message_box = QtWidgets.QMessageBox(self)
+        message_box.setWindowTitle("Encoder Benchmark")
+        message_box.setText(f"<pre>{text}</pre>")
+        message_box.exec_()
+    
     def setup_output_settings(self, parent_layout):
         """Setup output settings UI"""
         output_group = QtWidgets.QGroupBox("Output Settings")
@@ -73,6 +200,32 @@ class SettingsTab(QtWidgets.QWidget):
         
         parent_layout.addWidget(output_group)
     
+    def setup_hotkey_settings(self, parent_layout):
+        """Setup global hotkey settings UI"""
+        hotkey_group = QtWidgets.QGroupBox("Global Hotkeys")
+        hotkey_layout = QtWidgets.QFormLayout(hotkey_group)
+        
+        # One editable combination per action, e.g. "<ctrl>+<alt>+r"
+        self.hotkey_edits = {}
+        for action, label in ACTION_LABELS.items():
+            hotkey_edit = QtWidgets.QLineEdit(DEFAULT_HOTKEYS[action])
+            hotkey_edit.setPlaceholderText("e.g. <ctrl>+<alt>+r (empty to disable)")
+            hotkey_layout.addRow(f"{label}:", hotkey_edit)
+            self.hotkey_edits[action] = hotkey_edit
+        
+        parent_layout.addWidget(hotkey_group)
+    
+    def apply_hotkeys(self):
+        """Apply the hotkey combinations to the shared hotkey service"""
+        hotkeys = {action: edit.text().strip() for action, edit in self.hotkey_edits.items()}
+        
+        try:
+            get_hotkey_service().set_hotkeys(hotkeys)
+            return True
+        except ValueError as e:
+            self.parent.status_bar.showMessage(f"Invalid hotkey: {str(e)}")
+            return False
+    
     def browse_output_folder(self):
         """Browse for output folder location"""
         folder = QtWidgets.QFileDialog.getExistingDirectory(
@@ -89,4 +242,6 @@ class SettingsTab(QtWidgets.QWidget):
     def save_settings(self):
         """Save application settings"""
         # Here you would save settings to a file
+        if not self.apply_hotkeys():
+            return
         self.parent.status_bar.showMessage("Settings saved")
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Cursor path engine for the CaptureKarma Screen Capture Tool
+
+Cursor trajectories are precomputed as NumPy arrays sampled at the display
+refresh rate and played back against a deadline scheduler, so moves look
+natural on camera and finish exactly on time.
+"""
+
+from CaptureKarma.utils.lazy_imports import lazy_import
+from CaptureKarma.utils.timing import DeadlineScheduler
+
+np = lazy_import("numpy")
+
+
+PROFILE_MINIMUM_JERK = "minimum_jerk"
+PROFILE_BEZIER = "bezier"
+
+
+class CursorPath:
+    """A cursor trajectory sampled at fixed time steps"""
+    
+    def __init__(self, points, times):
+        """
+        Args:
+            points: NumPy array of shape (N, 2) with screen coordinates
+            times: NumPy array of shape (N,) with offsets in seconds from the start of the move
+        """
+        self.points = points
+        self.times = times
+    
+    @property
+    def duration(self):
+        """Total duration of the move in seconds"""
+        return float(self.times[-1]) if len(self.times) else 0.0
+    
+    def __len__(self):
+        return len(self.times)
+
+
+class CursorPathEngine:
+    """Builds and plays back smooth cursor trajectories"""
+    
+    def __init__(self, refresh_rate=60, mover=None):
+        """
+        Args:
+            refresh_rate: Display refresh rate in Hz; one sample is produced per refresh
+            mover: Optional function (x, y) that moves the cursor (defaults to PyAutoGUI)
+        """
+        self.refresh_rate = refresh_rate
+        self.mover = mover or self._move_with_pyautogui
+    
+    def build(self, waypoints, duration, profile=PROFILE_MINIMUM_JERK, curvature=0.15):
+        """
+        Precompute a trajectory through a list of waypoints
+
+        Args:
+            waypoints: Sequence of (x, y) points, including the starting point
+            duration: Total duration of the move in seconds
+            profile: "minimum_jerk" for straight reaches that settle at every waypoint,
+                or "bezier" for one continuous curve through all waypoints
+            curvature: Sideways bulge of a two-point Bezier move, relative to its length
+
+        Returns:
+            A CursorPath
+        """
+        waypoints = np.asarray(waypoints, dtype=np.float64)
+        if len(waypoints) < 2:
+            raise ValueError("A cursor path needs at least two waypoints")
+        
+        sample_count = max(2, int(round(duration * self.refresh_rate)) + 1)
+        times = np.linspace(0.0, duration, sample_count)
+        tau = times / duration if duration > 0 else np.ones(sample_count)
+        
+        if profile == PROFILE_BEZIER:
+            points = self._bezier_points(waypoints, tau, curvature)
+        elif profile == PROFILE_MINIMUM_JERK:
+            points = self._minimum_jerk_points(waypoints, tau)
+        else:
+            raise ValueError(f"Unknown cursor path profile: {profile}")
+        
+        return CursorPath(points, times)
+    
+    def play(self, path, scheduler=None):
+        """
+        Play a trajectory back against a deadline scheduler
+
+        Args:
+            path: CursorPath to play
+            scheduler: Optional DeadlineScheduler (for example one sharing a cancel event)
+
+        Returns:
+            TimingReport describing how closely each sample hit its deadline
+        """
+        scheduler = scheduler or DeadlineScheduler()
+        scheduler.start()
+        
+        # Round once up front so the playback loop only does the move calls
+        pixels = np.rint(path.points).astype(np.int64)
+        last_position = None
+        
+        for offset, (x, y) in zip(path.times.tolist(), pixels.tolist()):
+            if not scheduler.wait_until(offset):
+                break
+            
+            # Skip samples that land on the same pixel as the previous one
+            if (x, y) != last_position:
+                self.mover(x, y)
+                last_position = (x, y)
+        
+        return scheduler.report()
+    
+    def move(self, waypoints, duration, profile=PROFILE_MINIMUM_JERK, scheduler=None):
+        """Build a trajectory and play it back immediately"""
+        path = self.build(waypoints, duration, profile)
+        return self.play(path, scheduler)
+    
+    def _minimum_jerk_points(self, waypoints, tau):
+        """Straight segments, each following a minimum-jerk velocity profile"""
+        segment_lengths = np.linalg.norm(np.diff(waypoints, axis=0), axis=1)
+        total_length = segment_lengths.sum()
+        
+        # Give every segment a share of the time proportional to its length
+        if total_length > 0:
+            boundaries = np.concatenate(([0.0], np.cumsum(segment_lengths) / total_length))
+        else:
+            boundaries = np.linspace(0.0, 1.0, len(waypoints))
+        
+        segment = np.clip(np.searchsorted(boundaries, tau, side='right') - 1, 0, len(waypoints) - 2)
+        span = boundaries[segment + 1] - boundaries[segment]
+        local = np.where(span > 0, (tau - boundaries[segment]) / np.where(span > 0, span, 1.0), 1.0)
+        
+        progress = self._minimum_jerk(np.clip(local, 0.0, 1.0))[:, None]
+        return waypoints[segment] + (waypoints[segment + 1] - waypoints[segment]) * progress
+    
+    def _bezier_points(self, waypoints, tau, curvature):
+        """One continuous cubic Bezier curve, traversed with minimum-jerk timing"""
+        if len(waypoints) == 2:
+            # Bow a single move slightly to one side, as a hand would
+            start, end = waypoints
+            delta = end - start
+            normal = np.array([-delta[1], delta[0]]) * curvature
+            controls = [np.array([start, start + delta / 3 + normal, end - delta / 3 + normal, end])]
+        else:
+            # Catmull-Rom spline through the waypoints, expressed as Bezier segments
+            padded = np.vstack([waypoints[0], waypoints, waypoints[-1]])
+            controls = []
+            for i in range(1, len(padded) - 2):
+                p0, p1, p2, p3 = padded[i - 1], padded[i], padded[i + 1], padded[i + 2]
+                controls.append(np.array([p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2]))
+        
+        # Densely sample the curve so it can be re-parameterized by arc length
+        t = np.linspace(0.0, 1.0, 64)[:, None]
+        basis = [(1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3]
+        dense = np.vstack([
+            sum(weight * control[k] for k, weight in enumerate(basis))[(1 if index else 0):]
+            for index, control in enumerate(controls)
+        ])
+        
+        arc = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(dense, axis=0), axis=1))))
+        if arc[-1] <= 0:
+            return np.repeat(waypoints[:1], len(tau), axis=0)
+        
+        distance = self._minimum_jerk(tau) * arc[-1]
+        return np.column_stack([
+            np.interp(distance, arc, dense[:, 0]),
+            np.interp(distance, arc, dense[:, 1])
+        ])
+    
+    def _minimum_jerk(self, tau):
+        """Minimum-jerk position profile for normalized time in [0, 1]"""
+        return tau ** 3 * (10 - 15 * tau + 6 * tau ** 2)
+    
+    def _move_with_pyautogui(self, x, y):
+        """Move the cursor without PyAutoGUI's built-in pause"""
+        import pyautogui
+        pyautogui.moveTo(x, y, _pause=False)
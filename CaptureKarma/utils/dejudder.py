@@ -0,0 +1,255 @@
+"""
+Scroll de-judder post-processing for the CaptureKarma Screen Capture Tool
+
+Takes recorded with live scrolling often move unevenly because the target
+application does not repaint at a steady pace. The de-judder pass estimates
+the scroll offset of every frame, replaces the measured motion with a
+constant-velocity curve and re-synthesizes each frame at its ideal position
+by shifting and blending its neighbouring frames.
+"""
+import os
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+class ScrollDejudder:
+    """Re-times the scroll motion of an existing recording"""
+    
+    def __init__(self, window_radius=8, analysis_scale=0.25, motion_threshold=0.5, workers=None):
+        """
+        Args:
+            window_radius: Frames kept in memory on either side of the frame being rendered
+            analysis_scale: Downscale factor used when estimating scroll offsets
+            motion_threshold: Minimum per-frame shift (in pixels) that counts as scrolling
+            workers: Number of worker threads (defaults to the number of CPU cores)
+        """
+        self.window_radius = max(1, int(window_radius))
+        self.analysis_scale = analysis_scale
+        self.motion_threshold = motion_threshold
+        self.workers = workers or os.cpu_count() or 1
+        
+        # Hanning window used by phase correlation, created once per video size
+        self._window = None
+    
+    def process(self, input_path, output_path=None, status_callback=None):
+        """
+        De-judder a recorded video
+
+        Args:
+            input_path: Path of the recording to process
+            output_path: Path of the processed video (defaults to "<name>_dejudder<ext>")
+            status_callback: Optional callback function to report status messages
+
+        Returns:
+            The path of the processed video
+        """
+        if output_path is None:
+            base, ext = os.path.splitext(input_path)
+            output_path = f"{base}_dejudder{ext}"
+        
+        # First pass: measure how far the page moved between frames
+        if status_callback:
+            status_callback("De-judder: estimating scroll offsets...")
+        offsets = self.estimate_offsets(input_path)
+        positions, targets = self.fit_positions(offsets)
+        print(f"De-judder: {len(offsets)} frames, total scroll {positions[-1]:.1f}px")
+        
+        # Second pass: render every frame at its ideal position
+        if status_callback:
+            status_callback("De-judder: re-synthesizing frames...")
+        self.render(input_path, output_path, positions, targets, status_callback)
+        
+        if status_callback:
+            status_callback(f"De-juddered video saved to {output_path}")
+        return output_path
+    
+    def estimate_offsets(self, input_path):
+        """
+        Estimate the vertical shift between each pair of consecutive frames
+
+        Frames are streamed from the file; only a bounded number of
+        downscaled frames are in flight at any time.
+
+        Returns:
+            NumPy array with one offset per frame (the first entry is always 0)
+        """
+        capture = self._open_capture(input_path)
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        analysis_size = (
+            max(8, int(width * self.analysis_scale)),
+            max(8, int(height * self.analysis_scale))
+        )
+        self._window = cv2.createHanningWindow(analysis_size, cv2.CV_32F)
+        
+        offsets = [0.0]
+        pending_frames = collections.deque()
+        pending_shifts = collections.deque()
+        previous = None
+        max_pending = self.workers * 2
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    ok, frame = capture.read()
+                    if ok:
+                        pending_frames.append(pool.submit(self._prepare, frame, analysis_size))
+                    
+                    # Collect results in order, keeping the queues bounded
+                    while pending_frames and (not ok or len(pending_frames) > max_pending):
+                        current = pending_frames.popleft().result()
+                        if previous is not None:
+                            pending_shifts.append(pool.submit(self._measure_shift, previous, current))
+                        previous = current
+                    while pending_shifts and (not ok or len(pending_shifts) > max_pending):
+                        offsets.append(pending_shifts.popleft().result())
+                    
+                    if not ok:
+                        break
+        finally:
+            capture.release()
+        
+        return np.array(offsets, dtype=np.float64)
+    
+    def fit_positions(self, offsets):
+        """
+        Fit a constant-velocity curve through the measured scroll positions
+
+        The curve is anchored at the first and last moving frame so the
+        de-juddered take starts and stops at exactly the same page positions
+        as the original, without a jump at either end.
+
+        Returns:
+            Tuple (positions, targets) of measured and ideal per-frame offsets
+        """
+        positions = np.cumsum(offsets)
+        targets = positions.copy()
+        
+        moving = np.flatnonzero(np.abs(offsets) > self.motion_threshold)
+        if len(moving) < 2:
+            return positions, targets
+        
+        first = max(moving[0] - 1, 0)
+        last = moving[-1]
+        targets[first:last + 1] = np.linspace(positions[first], positions[last], last - first + 1)
+        return positions, targets
+    
+    def render(self, input_path, output_path, positions, targets, status_callback=None):
+        """
+        Write a new video where every frame sits at its target scroll position
+
+        Frames are read through a sliding window of ``2 * window_radius + 1``
+        frames; blending runs on the worker pool and results are written in order.
+        """
+        capture = self._open_capture(input_path)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        fourcc = cv2.VideoWriter_fourcc(*('mp4v' if output_path.lower().endswith('.mp4') else 'XVID'))
+        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        
+        # Scroll direction, so positions can be searched as an increasing sequence
+        direction = 1.0 if positions[-1] >= positions[0] else -1.0
+        ordered = np.maximum.accumulate(direction * positions)
+        
+        frame_count = len(positions)
+        window = collections.deque()
+        window_start = 0
+        pending = collections.deque()
+        max_pending = self.workers * 2
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for index in range(frame_count):
+                    # Slide the window so it covers [index - radius, index + radius]
+                    while window_start + len(window) <= min(frame_count - 1, index + self.window_radius):
+                        ok, frame = capture.read()
+                        if not ok:
+                            break
+                        window.append(frame)
+                    while window_start < index - self.window_radius:
+                        window.popleft()
+                        window_start += 1
+                    
+                    if not window:
+                        break
+                    
+                    # Pick the pair of neighbours whose positions bracket the target
+                    low = window_start
+                    high = window_start + len(window) - 1
+                    target = direction * targets[index]
+                    first = int(np.searchsorted(ordered, target, side='right')) - 1
+                    first = min(max(first, low), max(high - 1, low))
+                    second = min(first + 1, high)
+                    
+                    span = ordered[second] - ordered[first]
+                    weight = 0.0 if span <= 0 else float(np.clip((target - ordered[first]) / span, 0.0, 1.0))
+                    
+                    pending.append(pool.submit(
+                        self._synthesize,
+                        window[first - window_start], targets[index] - positions[first],
+                        window[second - window_start], targets[index] - positions[second],
+                        weight
+                    ))
+                    
+                    while len(pending) > max_pending:
+                        out.write(pending.popleft().result())
+                    
+                    if status_callback and index % 100 == 0:
+                        status_callback(f"De-judder: {index}/{frame_count} frames")
+                
+                while pending:
+                    out.write(pending.popleft().result())
+        finally:
+            capture.release()
+            out.release()
+    
+    def _open_capture(self, input_path):
+        """Open a video file for reading"""
+        capture = cv2.VideoCapture(input_path)
+        if not capture.isOpened():
+            raise IOError(f"Could not open video: {input_path}")
+        return capture
+    
+    def _prepare(self, frame, analysis_size):
+        """Convert a frame to the downscaled float image used for offset estimation"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, analysis_size, interpolation=cv2.INTER_AREA)
+        return np.float32(small)
+    
+    def _measure_shift(self, previous, current):
+        """Measure the vertical shift (in full-resolution pixels) between two prepared frames"""
+        (shift_x, shift_y), response = cv2.phaseCorrelate(previous, current, self._window)
+        return shift_y / self.analysis_scale
+    
+    def _synthesize(self, first_frame, first_shift, second_frame, second_shift, weight):
+        """Shift two neighbouring frames onto the target position and blend them"""
+        if weight <= 0.01:
+            return self._translate(first_frame, first_shift)
+        if weight >= 0.99:
+            return self._translate(second_frame, second_shift)
+        
+        return cv2.addWeighted(
+            self._translate(first_frame, first_shift), 1.0 - weight,
+            self._translate(second_frame, second_shift), weight,
+            0
+        )
+    
+    def _translate(self, frame, shift_y):
+        """Move a frame vertically by a (sub-pixel) amount"""
+        if abs(shift_y) < 0.05:
+            return frame
+        
+        height, width = frame.shape[:2]
+        matrix = np.float32([[1, 0, 0], [0, 1, shift_y]])
+        return cv2.warpAffine(
+            frame, matrix, (width, height),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE
+        )
@@ -0,0 +1,183 @@
+"""
+Image encoders for the CaptureKarma Screen Capture Tool
+
+Screenshots can be written as PNG (Pillow or OpenCV, with a configurable
+compression level), lossless WebP, JPEG or QOI. A micro-benchmark reports
+encode time and file size of every format for a given capture.
+"""
+import io
+import time
+
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+CV2_AVAILABLE = module_available("cv2")
+cv2 = lazy_import("cv2")
+
+QOI_AVAILABLE = module_available("qoi")
+qoi = lazy_import("qoi")
+
+
+FORMAT_PNG = "png"
+FORMAT_PNG_OPENCV = "png-opencv"
+FORMAT_WEBP = "webp"
+FORMAT_JPEG = "jpeg"
+FORMAT_QOI = "qoi"
+
+FORMAT_EXTENSIONS = {
+    FORMAT_PNG: "png",
+    FORMAT_PNG_OPENCV: "png",
+    FORMAT_WEBP: "webp",
+    FORMAT_JPEG: "jpg",
+    FORMAT_QOI: "qoi",
+}
+
+FORMAT_LABELS = {
+    FORMAT_PNG: "PNG",
+    FORMAT_PNG_OPENCV: "PNG (OpenCV)",
+    FORMAT_WEBP: "WebP (lossless)",
+    FORMAT_JPEG: "JPEG",
+    FORMAT_QOI: "QOI",
+}
+
+
+def available_formats():
+    """Get the formats that can be encoded with the installed libraries"""
+    formats = [FORMAT_PNG]
+    if CV2_AVAILABLE:
+        formats.append(FORMAT_PNG_OPENCV)
+    if _pillow_can_save("WEBP"):
+        formats.append(FORMAT_WEBP)
+    formats.append(FORMAT_JPEG)
+    if QOI_AVAILABLE or _pillow_can_save("QOI"):
+        formats.append(FORMAT_QOI)
+    return formats
+
+
+def _pillow_can_save(pillow_format):
+    """Check whether Pillow has a writer for a format"""
+    Image.init()
+    return pillow_format in Image.SAVE
+
+
+class ImageEncoder:
+    """Encodes images in a configurable format"""
+    
+    def __init__(self, image_format=FORMAT_PNG, png_compression=6, jpeg_quality=92, webp_method=4):
+        """
+        Args:
+            image_format: One of the FORMAT_* constants
+            png_compression: zlib compression level for PNG (0 = fastest, 9 = smallest)
+            jpeg_quality: JPEG quality (1-100)
+            webp_method: WebP encoder effort (0 = fastest, 6 = smallest)
+        """
+        if image_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        
+        self.image_format = image_format
+        self.png_compression = png_compression
+        self.jpeg_quality = jpeg_quality
+        self.webp_method = webp_method
+    
+    @property
+    def extension(self):
+        """File extension (without dot) for the chosen format"""
+        return FORMAT_EXTENSIONS[self.image_format]
+    
+    def encode(self, image):
+        """
+        Encode an image
+
+        Args:
+            image: PIL image or RGB NumPy array of shape (height, width, 3)
+
+        Returns:
+            The encoded file contents as bytes
+        """
+        if self.image_format == FORMAT_PNG_OPENCV:
+            return self._encode_opencv_png(image)
+        if self.image_format == FORMAT_QOI and QOI_AVAILABLE:
+            return qoi.encode(np.ascontiguousarray(self._to_array(image)))
+        
+        pil_image = image if isinstance(image, Image.Image) else Image.fromarray(image)
+        if pil_image.mode not in ("RGB", "RGBA"):
+            pil_image = pil_image.convert("RGB")
+        
+        buffer = io.BytesIO()
+        if self.image_format == FORMAT_PNG:
+            pil_image.save(buffer, format="PNG", compress_level=self.png_compression)
+        elif self.image_format == FORMAT_WEBP:
+            pil_image.save(buffer, format="WEBP", lossless=True, method=self.webp_method)
+        elif self.image_format == FORMAT_JPEG:
+            pil_image.convert("RGB").save(buffer, format="JPEG", quality=self.jpeg_quality)
+        else:
+            pil_image.save(buffer, format="QOI")
+        return buffer.getvalue()
+    
+    def save(self, image, filename):
+        """Encode an image and write it to a file"""
+        data = self.encode(image)
+        with open(filename, "wb") as f:
+            f.write(data)
+        return filename
+    
+    def _encode_opencv_png(self, image):
+        """Encode PNG through OpenCV's libpng bindings"""
+        array = self._to_array(image)
+        bgr = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+        ok, encoded = cv2.imencode(".png", bgr, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+        if not ok:
+            raise IOError("OpenCV failed to encode PNG")
+        return encoded.tobytes()
+    
+    def _to_array(self, image):
+        """Get an RGB NumPy array for an image"""
+        if isinstance(image, Image.Image):
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            return np.asarray(image)
+        return image
+
+
+def benchmark_encoders(image, formats=None, repeat=3, png_compression=6, jpeg_quality=92, webp_method=4):
+    """
+    Measure encode time and output size of each format for one image
+
+    Args:
+        image: PIL image or RGB NumPy array to encode
+        formats: Formats to test (defaults to all available formats)
+        repeat: Number of encodes per format; the fastest run is reported
+
+    Returns:
+        List of dicts with "format", "seconds" and "size" (bytes) per format
+    """
+    results = []
+    for image_format in formats or available_formats():
+        encoder = ImageEncoder(image_format, png_compression, jpeg_quality, webp_method)
+        best = None
+        size = 0
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                size = len(encoder.encode(image))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results.append({"format": image_format, "seconds": best, "size": size})
+        except Exception as e:
+            print(f"Benchmark of {image_format} failed: {str(e)}")
+            results.append({"format": image_format, "seconds": None, "size": None, "error": str(e)})
+    return results
+
+
+def format_benchmark(results):
+    """Format benchmark results as a plain-text table"""
+    lines = [f"{'Format':<18}{'Encode (ms)':>12}{'Size (KB)':>12}"]
+    for result in results:
+        label = FORMAT_LABELS[result["format"]]
+        if result["seconds"] is None:
+            lines.append(f"{label:<18}{'failed':>12}{'-':>12}")
+        else:
+            lines.append(f"{label:<18}{result['seconds'] * 1000:>12.1f}{result['size'] / 1024:>12.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+"""
+Frame quality analysis for the CaptureKarma Screen Capture Tool
+
+Frames are classified on a strided NumPy view of the raw capture buffer
+(an MSS grab or a QImage), so the check is cheap enough to run on every
+recorded frame without copying or converting the image first.
+"""
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+
+# Frame classifications
+FRAME_OK = "ok"
+FRAME_BLACK = "black"
+FRAME_UNIFORM = "uniform"
+FRAME_FROZEN = "frozen"
+FRAME_TORN = "torn"
+
+FRAME_WARNINGS = {
+    FRAME_BLACK: "Captured frame is black. This may be due to Windows security restrictions.",
+    FRAME_UNIFORM: "Captured frame is a single flat color. Is the target window visible?",
+    FRAME_FROZEN: "The captured image has not changed for a while.",
+    FRAME_TORN: "Part of the captured frame is black. The region may extend off screen.",
+}
+
+
+def mss_to_array(sct_img):
+    """View an MSS grab as a BGRA array of shape (height, width, 4) without copying"""
+    return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+
+
+def qimage_to_array(qimage):
+    """
+    View a QImage as a BGRA array of shape (height, width, 4) without copying
+
+    The QImage is converted to 32-bit RGB first if needed. The array borrows the
+    image's memory, so the QImage must be kept alive while the array is used.
+
+    Returns:
+        Tuple (array, qimage) where qimage is the image the array points into
+    """
+    if qimage.format() not in (qimage.Format_RGB32, qimage.Format_ARGB32, qimage.Format_ARGB32_Premultiplied):
+        qimage = qimage.convertToFormat(qimage.Format_RGB32)
+    
+    width, height = qimage.width(), qimage.height()
+    bits = qimage.constBits()
+    bits.setsize(qimage.bytesPerLine() * height)
+    array = np.ndarray(
+        shape=(height, width, 4), dtype=np.uint8, buffer=bits,
+        strides=(qimage.bytesPerLine(), 4, 1)
+    )
+    return array, qimage
+
+
+def sample_frame(pixels, max_samples=256):
+    """
+    Get a strided view of a frame's color channels
+
+    Args:
+        pixels: Image array of shape (height, width, channels), or (height, width) for grayscale
+        max_samples: Upper bound on sampled rows and columns
+
+    Returns:
+        View of shape (rows, columns, 3), or (rows, columns) for grayscale; no pixel data is copied
+    """
+    height, width = pixels.shape[:2]
+    step = max(1, max(height, width) // max_samples)
+    if pixels.ndim == 2:
+        return pixels[::step, ::step]
+    return pixels[::step, ::step, :3]
+
+
+def _brightest_channel(sample):
+    """Get the largest channel value of every pixel of a sample"""
+    return sample if sample.ndim == 2 else sample.max(axis=2)
+
+
+def is_frame_black(pixels, threshold=10, fraction=0.95):
+    """
+    Check whether a frame is all or mostly black
+
+    Args:
+        pixels: Image array of shape (height, width, channels), or (height, width) for grayscale
+        threshold: Channel value below which a pixel counts as black
+        fraction: Share of black pixels above which the frame counts as black
+    """
+    sample = sample_frame(pixels)
+    if sample.size == 0:
+        return True
+    dark = _brightest_channel(sample) < threshold
+    return dark.mean() > fraction
+
+
+class FrameAnalyzer:
+    """Classifies captured frames as ok, black, uniform, frozen or torn"""
+    
+    def __init__(self, black_threshold=10, uniform_threshold=2.0, band_fraction=0.1, max_samples=256):
+        """
+        Args:
+            black_threshold: Channel value below which a pixel counts as black
+            uniform_threshold: Standard deviation below which a frame counts as one flat color
+            band_fraction: Minimum size of a black edge band, relative to the frame, for a torn frame
+            max_samples: Upper bound on sampled rows and columns
+        """
+        self.black_threshold = black_threshold
+        self.uniform_threshold = uniform_threshold
+        self.band_fraction = band_fraction
+        self.max_samples = max_samples
+        self.reset()
+    
+    def reset(self):
+        """Forget the previous frame and clear the counters"""
+        self.previous = None
+        self.counts = {FRAME_OK: 0, FRAME_BLACK: 0, FRAME_UNIFORM: 0, FRAME_FROZEN: 0, FRAME_TORN: 0}
+    
+    def analyze(self, pixels):
+        """
+        Classify one frame
+
+        Args:
+            pixels: Image array of shape (height, width, channels), e.g. from mss_to_array()
+
+        Returns:
+            One of the FRAME_* constants
+        """
+        sample = sample_frame(pixels, self.max_samples)
+        result = self._classify(sample)
+        self.counts[result] += 1
+        return result
+    
+    def _classify(self, sample):
+        """Classify a sampled frame"""
+        if sample.size == 0:
+            return FRAME_BLACK
+        
+        # Keep a small copy of the samples for the frozen check; the capture buffer may be reused
+        previous = self.previous
+        self.previous = np.array(sample)
+        
+        # A pixel is dark when all of its channels are below the threshold
+        dark = _brightest_channel(sample) < self.black_threshold
+        if dark.mean() > 0.95:
+            return FRAME_BLACK
+        
+        # Measured per channel, so a solid color isn't mistaken for detail by the spread between channels
+        if sample.reshape(sample.shape[0] * sample.shape[1], -1).std(axis=0).max() < self.uniform_threshold:
+            return FRAME_UNIFORM
+        
+        if self._has_black_band(dark):
+            return FRAME_TORN
+        
+        if previous is not None and previous.shape == sample.shape and np.array_equal(previous, sample):
+            return FRAME_FROZEN
+        
+        return FRAME_OK
+    
+    def _has_black_band(self, dark):
+        """Check for a solid black band along any edge of the frame"""
+        for lines in (dark.all(axis=1), dark.all(axis=0)):
+            band = max(1, int(len(lines) * self.band_fraction))
+            if lines[:band].all() or lines[-band:].all():
+                return True
+        return False
+    
+    def summary(self):
+        """Get a one-line description of the frame counts"""
+        total = sum(self.counts.values())
+        problems = [f"{count} {name}" for name, count in self.counts.items() if name != FRAME_OK and count]
+        if not problems:
+            return f"{total} frames, no problems detected"
+        return f"{total} frames, " + ", ".join(problems)
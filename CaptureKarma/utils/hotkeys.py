@@ -0,0 +1,191 @@
+"""
+Global hotkey service for the CaptureKarma Screen Capture Tool
+
+One long-lived keyboard listener is shared by the whole application. Hotkey
+presses are matched on the listener thread and handed to a dispatcher thread,
+so slow callbacks never stall the system input hook. Actions that need to
+interrupt running work (such as aborting a scroll) are exposed as
+threading.Event objects that loops can wait on instead of polling.
+"""
+import queue
+import threading
+
+try:
+    from pynput import keyboard
+    PYNPUT_AVAILABLE = True
+except ImportError:
+    PYNPUT_AVAILABLE = False
+
+
+# Hotkey actions
+ACTION_TOGGLE_RECORDING = "toggle_recording"
+ACTION_SCREENSHOT = "screenshot"
+ACTION_ABORT_SCROLL = "abort_scroll"
+ACTION_SAVE_REPLAY = "save_replay"
+
+ACTION_LABELS = {
+    ACTION_TOGGLE_RECORDING: "Start/Stop Recording",
+    ACTION_SCREENSHOT: "Take Screenshot",
+    ACTION_ABORT_SCROLL: "Abort Scrolling",
+    ACTION_SAVE_REPLAY: "Save Macro",
+}
+
+# Hotkeys in pynput's HotKey.parse() format
+DEFAULT_HOTKEYS = {
+    ACTION_TOGGLE_RECORDING: "<ctrl>+<alt>+r",
+    ACTION_SCREENSHOT: "<ctrl>+<alt>+s",
+    ACTION_ABORT_SCROLL: "<esc>",
+    ACTION_SAVE_REPLAY: "<ctrl>+<alt>+m",
+}
+
+
+class HotkeyService:
+    """Listens for global hotkeys and dispatches them to registered callbacks"""
+    
+    def __init__(self, hotkeys=None):
+        """
+        Args:
+            hotkeys: Optional dict mapping actions to hotkey strings, merged over the defaults
+        """
+        self.hotkeys = dict(DEFAULT_HOTKEYS)
+        if hotkeys:
+            self.hotkeys.update(hotkeys)
+        
+        # Set when the abort hotkey is pressed; scroll loops clear it before they start
+        self.abort_scroll_event = threading.Event()
+        
+        self._callbacks = {}
+        self._bindings = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._listener = None
+        self._dispatcher = None
+        
+        if PYNPUT_AVAILABLE:
+            self.set_hotkeys(self.hotkeys)
+    
+    @property
+    def is_running(self):
+        """Whether the keyboard listener is active"""
+        return self._listener is not None and self._listener.is_alive()
+    
+    def start(self):
+        """Start the keyboard listener and dispatcher (safe to call more than once)"""
+        if not PYNPUT_AVAILABLE:
+            print("WARNING: pynput not available. Install with 'pip install pynput' to enable global hotkeys.")
+            return
+        if self.is_running:
+            return
+        
+        self._dispatcher = threading.Thread(target=self._dispatch_loop)
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+        
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.daemon = True
+        self._listener.start()
+        print("Hotkey service started")
+    
+    def stop(self):
+        """Stop the keyboard listener and dispatcher"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher = None
+    
+    def set_hotkeys(self, hotkeys):
+        """
+        Replace the hotkey bindings
+
+        Args:
+            hotkeys: Dict mapping actions to hotkey strings such as "<ctrl>+<alt>+r"
+
+        Raises:
+            ValueError: If a hotkey string cannot be parsed
+        """
+        if not PYNPUT_AVAILABLE:
+            self.hotkeys = dict(hotkeys)
+            return
+        
+        bindings = []
+        for action, combination in hotkeys.items():
+            if not combination:
+                continue
+            bindings.append(keyboard.HotKey(
+                keyboard.HotKey.parse(combination),
+                lambda action=action: self._activate(action)
+            ))
+        
+        with self._lock:
+            self.hotkeys = dict(hotkeys)
+            self._bindings = bindings
+    
+    def register(self, action, callback):
+        """Register a callback (taking no arguments) for an action"""
+        with self._lock:
+            self._callbacks.setdefault(action, []).append(callback)
+    
+    def unregister(self, action, callback):
+        """Remove a previously registered callback"""
+        with self._lock:
+            if callback in self._callbacks.get(action, []):
+                self._callbacks[action].remove(callback)
+    
+    def _activate(self, action):
+        """Handle a matched hotkey on the listener thread"""
+        # Cancellation events are set immediately, before any callback runs
+        if action == ACTION_ABORT_SCROLL:
+            self.abort_scroll_event.set()
+        self._queue.put(action)
+    
+    def _dispatch_loop(self):
+        """Run callbacks off the listener thread"""
+        while True:
+            action = self._queue.get()
+            if action is None:
+                break
+            
+            with self._lock:
+                callbacks = list(self._callbacks.get(action, []))
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in hotkey callback for {action}: {str(e)}")
+                    import traceback
+                    traceback.print_exc()
+    
+    def _on_press(self, key):
+        listener = self._listener
+        if listener is None:
+            return
+        key = listener.canonical(key)
+        with self._lock:
+            bindings = self._bindings
+        for binding in bindings:
+            binding.press(key)
+    
+    def _on_release(self, key):
+        listener = self._listener
+        if listener is None:
+            return
+        key = listener.canonical(key)
+        with self._lock:
+            bindings = self._bindings
+        for binding in bindings:
+            binding.release(key)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_hotkey_service():
+    """Get the application-wide hotkey service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = HotkeyService()
+        return _service
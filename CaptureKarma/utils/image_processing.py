@@ -1,16 +1,20 @@
 """
 Image processing utilities for the CaptureKarma Screen Capture Tool
 """
-import numpy as np
-import pyautogui
-from PyQt5 import QtGui
-from PIL import Image
 
-try:
-    import mss
-    MSS_AVAILABLE = True
-except ImportError:
-    MSS_AVAILABLE = False
+from CaptureKarma.utils.frame_analysis import is_frame_black
+from CaptureKarma.utils.lazy_imports import lazy_import, module_available
+from CaptureKarma.utils.qt_conversion import array_to_qimage, mss_to_qimage, pil_to_qimage
+
+np = lazy_import("numpy")
+pyautogui = lazy_import("pyautogui")
+Image = lazy_import("PIL.Image")
+
+MSS_AVAILABLE = module_available("mss")
+mss = lazy_import("mss")
+
+CV2_AVAILABLE = module_available("cv2")
+cv2 = lazy_import("cv2")
 
 
 class ImageProcessor:
@@ -49,11 +53,8 @@ class ImageProcessor:
                 # Capture the screenshot
                 sct_img = sct.grab(monitor)
                 
-                # Convert to PIL Image
-                screenshot = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-                
-                # Convert to QImage and then to QPixmap
-                return self.pil_to_pixmap(screenshot)
+                # Wrap the grab in a QImage without copying, then convert to QPixmap
+                return mss_to_qimage(sct_img).to_pixmap()
         except Exception as e:
             print(f"MSS capture failed: {str(e)}")
             return None
@@ -76,31 +77,57 @@ class ImageProcessor:
             return None
             
         try:
-            # Ensure the image is in RGB mode
-            if pil_image.mode != "RGB":
-                pil_image = pil_image.convert("RGB")
-                
-            # Get image dimensions
-            width, height = pil_image.size
-            
-            # Convert PIL image to QImage
-            buffer = pil_image.tobytes("raw", "RGB")
-            qimage = QtGui.QImage(buffer, width, height, width * 3, QtGui.QImage.Format_RGB888)
-            
-            # Convert QImage to QPixmap
-            return QtGui.QPixmap.fromImage(qimage)
+            # Wrap the pixels without a tobytes() copy; the owner keeps them alive until the pixmap exists
+            return pil_to_qimage(pil_image).to_pixmap()
         except Exception as e:
             print(f"Error in pil_to_pixmap: {str(e)}")
             # Return None on failure
             return None
     
-    def is_image_black(self, pil_image):
-        """Check if a PIL image is all or mostly black"""
-        # Convert to numpy array for faster analysis
-        img_array = np.array(pil_image)
+    def array_to_qimage(self, array, channel_order="RGB"):
+        """
+        Wrap a NumPy image array in a QImage
+
+        Args:
+            array: uint8 array of shape (height, width, 3) for "RGB" or (height, width, 4) for "BGRA"
+            channel_order: "RGB" or "BGRA" (the layout MSS grabs in)
+
+        Returns:
+            QImage that owns a copy of the pixels, so the array can be released
+        """
+        return array_to_qimage(array, channel_order).detached()
+    
+    def thumbnail_qimage(self, array, max_size=200, channel_order="RGB"):
+        """
+        Downscale a captured image array to fit a square box and wrap it in a QImage
+
+        Safe to call from a worker thread; only the QPixmap must be made on the GUI thread.
+
+        Args:
+            array: uint8 image array, as accepted by array_to_qimage()
+            max_size: Maximum width and height of the thumbnail
+            channel_order: "RGB" or "BGRA"
+
+        Returns:
+            QImage of the thumbnail
+        """
+        height, width = array.shape[:2]
+        scale = min(max_size / width, max_size / height, 1.0)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
         
-        # Calculate the mean brightness across all channels
-        mean_brightness = np.mean(img_array)
+        if scale >= 1.0:
+            thumb = array
+        elif CV2_AVAILABLE:
+            # Area interpolation averages whole source blocks, which suits large reductions
+            thumb = cv2.resize(array, size, interpolation=cv2.INTER_AREA)
+        else:
+            step = max(1, int(1 / scale))
+            thumb = array[::step, ::step]
         
-        # If mean brightness is very low, consider it black
-        return mean_brightness < 10
\ No newline at end of file
+        return self.array_to_qimage(thumb, channel_order)
+    
+    def is_image_black(self, image):
+        """Check if a PIL image or image array is all or mostly black"""
+        if isinstance(image, Image.Image):
+            image = np.asarray(image)
+        return is_frame_black(image)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Deferred imports for the CaptureKarma Screen Capture Tool
+
+OpenCV, NumPy, MSS, Pillow, PyAutoGUI and PyGetWindow together take seconds
+to import in a frozen build. Modules refer to them through LazyModule
+proxies, so they are only imported on first use, and warm_up() imports them
+on a background thread once the main window is on screen.
+
+Because these imports are no longer visible to static analysis, every
+module in HEAVY_MODULES must also be listed in the PyInstaller spec's
+hiddenimports.
+"""
+import importlib
+import importlib.util
+import threading
+import time
+
+
+# Imported by warm_up(), in the order capture needs them
+HEAVY_MODULES = ("numpy", "cv2", "mss", "PIL.Image", "pyautogui", "pygetwindow")
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+    
+    def __init__(self, name):
+        """
+        Args:
+            name: Full dotted name of the module
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, attribute):
+        # Only called for attributes the proxy itself doesn't have
+        return getattr(self._load(), attribute)
+    
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+    
+    def _load(self):
+        """Import the module if it hasn't been imported yet"""
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+
+def lazy_import(name):
+    """
+    Get a proxy that imports a module on first use
+
+    Args:
+        name: Full dotted module name, e.g. "cv2" or "PIL.Image"
+
+    Returns:
+        LazyModule
+    """
+    return LazyModule(name)
+
+
+def module_available(name):
+    """Check whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def warm_up(modules=HEAVY_MODULES, callback=None):
+    """
+    Import modules on a background thread
+
+    Args:
+        modules: Module names to import, in order
+        callback: Optional function called on the background thread with a dict of
+            module name -> import time in seconds (None for modules that failed to import)
+
+    Returns:
+        The started thread
+    """
+    def run():
+        timings = {}
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+                timings[name] = time.perf_counter() - start
+            except Exception as e:
+                print(f"Could not preload {name}: {str(e)}")
+                timings[name] = None
+        
+        if callback is not None:
+            callback(timings)
+    
+    thread = threading.Thread(target=run, name="warm-up")
+    thread.daemon = True
+    thread.start()
+    return thread
@@ -0,0 +1,349 @@
+"""
+Input macro recording and replay for the CaptureKarma Screen Capture Tool
+
+A macro is a list of timestamped mouse and keyboard events. Macros are
+stored either as JSON (readable, easy to edit) or in a compact binary
+format (".ckm"), and are replayed against a monotonic deadline scheduler so
+every retake of a marketing video runs with identical timing.
+"""
+import os
+import json
+import datetime
+import math
+import struct
+import threading
+import time
+
+from CaptureKarma.utils.timing import DeadlineScheduler
+
+try:
+    from pynput import keyboard, mouse
+    PYNPUT_AVAILABLE = True
+except ImportError:
+    PYNPUT_AVAILABLE = False
+
+
+# Event kinds
+EVENT_MOVE = 0
+EVENT_CLICK = 1
+EVENT_SCROLL = 2
+EVENT_KEY_DOWN = 3
+EVENT_KEY_UP = 4
+
+EVENT_NAMES = {
+    EVENT_MOVE: "move",
+    EVENT_CLICK: "click",
+    EVENT_SCROLL: "scroll",
+    EVENT_KEY_DOWN: "key_down",
+    EVENT_KEY_UP: "key_up",
+}
+
+# Binary format: magic, then a string table, then fixed-size records
+BINARY_MAGIC = b"CKMACRO1"
+RECORD_STRUCT = struct.Struct("<dBiiii")
+
+
+class Macro:
+    """
+    A recorded sequence of input events
+
+    Every event is a tuple (time, kind, x, y, a, b) where time is in seconds
+    from the start of the macro. The meaning of a and b depends on the kind:
+    the button name and pressed flag for clicks, the scroll deltas for
+    scrolls and the key name for key events.
+    """
+    
+    def __init__(self, events=None):
+        self.events = list(events or [])
+    
+    @property
+    def duration(self):
+        """Time of the last event in seconds"""
+        return self.events[-1][0] if self.events else 0.0
+    
+    def save(self, path):
+        """Save the macro; the format is chosen by extension (.json or binary)"""
+        if path.lower().endswith(".json"):
+            self._save_json(path)
+        else:
+            self._save_binary(path)
+    
+    def _save_json(self, path):
+        """Save the macro as JSON"""
+        data = {
+            "version": 1,
+            "events": [[round(t, 6), EVENT_NAMES[kind], x, y, a, b] for t, kind, x, y, a, b in self.events]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+    
+    def _save_binary(self, path):
+        """Save the macro in the compact binary format"""
+        # Button and key names are stored once in a string table
+        strings = []
+        string_index = {}
+        records = []
+        for t, kind, x, y, a, b in self.events:
+            if kind in (EVENT_CLICK, EVENT_KEY_DOWN, EVENT_KEY_UP):
+                if a not in string_index:
+                    string_index[a] = len(strings)
+                    strings.append(a)
+                a = string_index[a]
+            records.append(RECORD_STRUCT.pack(t, kind, x, y, a, b))
+        
+        with open(path, "wb") as f:
+            f.write(BINARY_MAGIC)
+            f.write(struct.pack("<H", len(strings)))
+            for name in strings:
+                encoded = name.encode("utf-8")
+                f.write(struct.pack("<H", len(encoded)))
+                f.write(encoded)
+            f.write(struct.pack("<I", len(records)))
+            f.write(b"".join(records))
+
+
+def load_macro(path):
+    """Load a macro saved with Macro.save()"""
+    with open(path, "rb") as f:
+        data = f.read()
+    
+    if not data.startswith(BINARY_MAGIC):
+        kinds = {name: kind for kind, name in EVENT_NAMES.items()}
+        content = json.loads(data.decode("utf-8"))
+        return Macro([
+            (t, kinds[kind], x, y, a, b) for t, kind, x, y, a, b in content["events"]
+        ])
+    
+    offset = len(BINARY_MAGIC)
+    (string_count,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    strings = []
+    for _ in range(string_count):
+        (length,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        strings.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    
+    (record_count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    events = []
+    for t, kind, x, y, a, b in RECORD_STRUCT.iter_unpack(data[offset:offset + record_count * RECORD_STRUCT.size]):
+        if kind in (EVENT_CLICK, EVENT_KEY_DOWN, EVENT_KEY_UP):
+            a = strings[a]
+        events.append((t, kind, x, y, a, b))
+    return Macro(events)
+
+
+class MacroRecorder:
+    """Records mouse and keyboard input into a Macro"""
+    
+    def __init__(self, stop_key="esc", move_interval=0.0):
+        """
+        Args:
+            stop_key: Name of the key that ends the recording (not recorded), or None
+            move_interval: Minimum time between recorded mouse moves (0 = record all)
+        """
+        if not PYNPUT_AVAILABLE:
+            raise ImportError("pynput is required for macro recording. Install with 'pip install pynput'")
+        
+        self.stop_key = stop_key
+        self.move_interval = move_interval
+        self.is_recording = False
+        self.on_finished = None
+        
+        self._events = []
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._last_move_time = -1.0
+        self._mouse_listener = None
+        self._keyboard_listener = None
+    
+    def start(self, on_finished=None):
+        """
+        Start recording input events
+
+        Args:
+            on_finished: Optional callback receiving the Macro when the stop key ends the recording
+        """
+        self.on_finished = on_finished
+        self._events = []
+        self._last_move_time = -1.0
+        self._start_time = time.perf_counter()
+        self.is_recording = True
+        
+        self._mouse_listener = mouse.Listener(
+            on_move=self._on_move, on_click=self._on_click, on_scroll=self._on_scroll
+        )
+        self._keyboard_listener = keyboard.Listener(
+            on_press=self._on_press, on_release=self._on_release
+        )
+        self._mouse_listener.start()
+        self._keyboard_listener.start()
+        print("Macro recording started")
+    
+    def stop(self):
+        """Stop recording and return the recorded Macro"""
+        self.is_recording = False
+        for listener in (self._mouse_listener, self._keyboard_listener):
+            if listener is not None and listener.is_alive():
+                listener.stop()
+        
+        with self._lock:
+            macro = Macro(self._drop_unreleased_keys(self._events))
+        print(f"Macro recording stopped with {len(macro.events)} events over {macro.duration:.2f}s")
+        return macro
+    
+    def _drop_unreleased_keys(self, events):
+        """
+        Remove key presses that were never released
+        
+        These are the modifiers of the hotkey that ended the recording;
+        replaying them would leave the keys stuck down.
+        """
+        held = {}
+        for index, event in enumerate(events):
+            if event[1] == EVENT_KEY_DOWN:
+                held[event[4]] = index
+            elif event[1] == EVENT_KEY_UP:
+                held.pop(event[4], None)
+        
+        dropped = set(held.values())
+        return [event for index, event in enumerate(events) if index not in dropped]
+    
+    def _add_event(self, kind, x=0, y=0, a=0, b=0):
+        """Append an event stamped with the time since the recording started"""
+        if not self.is_recording:
+            return
+        with self._lock:
+            self._events.append((time.perf_counter() - self._start_time, kind, int(x), int(y), a, int(b)))
+    
+    def _on_move(self, x, y):
+        now = time.perf_counter()
+        if now - self._last_move_time >= self.move_interval:
+            self._last_move_time = now
+            self._add_event(EVENT_MOVE, x, y)
+    
+    def _on_click(self, x, y, button, pressed):
+        self._add_event(EVENT_CLICK, x, y, button.name, pressed)
+    
+    def _on_scroll(self, x, y, dx, dy):
+        self._add_event(EVENT_SCROLL, x, y, int(dx), dy)
+    
+    def _on_press(self, key):
+        name = key_to_name(key)
+        if self.stop_key and name == f"key:{self.stop_key}":
+            # Finish from a separate thread; listeners cannot join themselves
+            finisher = threading.Thread(target=self.finish)
+            finisher.daemon = True
+            finisher.start()
+            return
+        self._add_event(EVENT_KEY_DOWN, a=name)
+    
+    def _on_release(self, key):
+        name = key_to_name(key)
+        if self.stop_key and name == f"key:{self.stop_key}":
+            return
+        self._add_event(EVENT_KEY_UP, a=name)
+    
+    def finish(self):
+        """Stop recording and hand the macro to the on_finished callback"""
+        macro = self.stop()
+        if self.on_finished:
+            self.on_finished(macro)
+
+
+class MacroReplayer:
+    """Replays a Macro with deadline-scheduled timing"""
+    
+    def __init__(self, macro):
+        if not PYNPUT_AVAILABLE:
+            raise ImportError("pynput is required for macro replay. Install with 'pip install pynput'")
+        
+        self.macro = macro
+        self.cancel_event = threading.Event()
+        self.is_playing = False
+        self.report = None
+        
+        self._mouse = mouse.Controller()
+        self._keyboard = keyboard.Controller()
+    
+    def play(self, origin=None, frame_rate=None):
+        """
+        Replay the macro, blocking until it has finished or been cancelled
+
+        Args:
+            origin: Optional time.perf_counter() value to use as time zero, so the
+                replay shares its clock with another component (e.g. VideoRecorder)
+            frame_rate: If set, every event is moved to the middle of its frame
+                interval so it always lands between the same two captured frames
+
+        Returns:
+            TimingReport for the replayed events
+        """
+        self.cancel_event.clear()
+        self.is_playing = True
+        scheduler = DeadlineScheduler(cancel_event=self.cancel_event)
+        scheduler.start(origin)
+        
+        try:
+            for t, kind, x, y, a, b in self.macro.events:
+                if frame_rate:
+                    t = (math.floor(t * frame_rate) + 0.5) / frame_rate
+                if not scheduler.wait_until(t):
+                    print("Macro replay cancelled")
+                    break
+                self._dispatch(kind, x, y, a, b)
+        finally:
+            self.is_playing = False
+        
+        self.report = scheduler.report()
+        print(f"Macro replay timing: {self.report.summary()}")
+        return self.report
+    
+    def cancel(self):
+        """Stop a replay in progress"""
+        self.cancel_event.set()
+    
+    def _dispatch(self, kind, x, y, a, b):
+        """Send one event to the operating system"""
+        if kind == EVENT_MOVE:
+            self._mouse.position = (x, y)
+        elif kind == EVENT_CLICK:
+            self._mouse.position = (x, y)
+            button = mouse.Button[a]
+            if b:
+                self._mouse.press(button)
+            else:
+                self._mouse.release(button)
+        elif kind == EVENT_SCROLL:
+            self._mouse.position = (x, y)
+            self._mouse.scroll(a, b)
+        elif kind == EVENT_KEY_DOWN:
+            self._keyboard.press(name_to_key(a))
+        elif kind == EVENT_KEY_UP:
+            self._keyboard.release(name_to_key(a))
+
+
+def key_to_name(key):
+    """Serialize a pynput key as a string"""
+    if isinstance(key, keyboard.Key):
+        return f"key:{key.name}"
+    if getattr(key, "char", None):
+        return f"char:{key.char}"
+    return f"vk:{key.vk}"
+
+
+def name_to_key(name):
+    """Deserialize a key name produced by key_to_name()"""
+    prefix, value = name.split(":", 1)
+    if prefix == "key":
+        return keyboard.Key[value]
+    if prefix == "char":
+        return keyboard.KeyCode.from_char(value)
+    return keyboard.KeyCode.from_vk(int(value))
+
+
+def default_macro_path(output_dir):
+    """Get a timestamped path for a new macro file"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"macro_{timestamp}.ckm")
@@ -0,0 +1,149 @@
+"""
+NumPy / MSS to QImage conversion for the CaptureKarma Screen Capture Tool
+
+A QImage built on an external buffer does not keep that buffer alive, so
+converting through a temporary (such as PIL's tobytes()) can leave the
+image pointing at freed memory. The helpers here wrap captured pixels
+without copying them and return a QImageOwner, which holds the array and
+the QImage together for as long as the image is in use.
+
+Run "python -m CaptureKarma.utils.qt_conversion" to benchmark every
+conversion path used in the application; tests/test_qt_conversion.py runs
+the same benchmark under pytest and checks the converted pixels.
+"""
+import time
+
+from PyQt5 import QtGui, sip
+
+from CaptureKarma.utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+
+class QImageOwner:
+    """Keeps a pixel array alive together with the QImage that points into it"""
+    
+    def __init__(self, array, image_format):
+        """
+        Args:
+            array: uint8 array of shape (height, width, channels) whose rows may be strided,
+                but whose pixels within a row must be contiguous
+            image_format: QImage.Format matching the array's channel layout
+        """
+        if array.strides[2] != 1 or array.strides[1] != array.shape[2]:
+            array = np.ascontiguousarray(array)
+        
+        height, width = array.shape[:2]
+        self.array = array
+        # The row stride is passed explicitly, so views into larger grabs work without a copy
+        self.qimage = QtGui.QImage(sip.voidptr(array.ctypes.data), width, height, array.strides[0], image_format)
+    
+    def detached(self):
+        """Get a QImage that owns a copy of the pixels and can outlive this owner"""
+        return self.qimage.copy()
+    
+    def to_pixmap(self):
+        """Create a QPixmap from the image (must be called on the GUI thread)"""
+        return QtGui.QPixmap.fromImage(self.qimage)
+
+
+def array_to_qimage(array, channel_order="BGRA", alpha=False):
+    """
+    Wrap an image array in a QImage
+
+    Args:
+        array: uint8 array of shape (height, width, 4) for "BGRA" or (height, width, 3) for "RGB"/"BGR"
+        channel_order: "BGRA" (as grabbed by MSS), "RGB" (PIL, PyAutoGUI) or "BGR" (OpenCV)
+        alpha: Treat the fourth BGRA channel as transparency (Format_ARGB32)
+
+    Returns:
+        QImageOwner; BGRA and RGB are wrapped without copying, BGR is converted once
+    """
+    if channel_order == "BGRA":
+        image_format = QtGui.QImage.Format_ARGB32 if alpha else QtGui.QImage.Format_RGB32
+        return QImageOwner(array, image_format)
+    if channel_order == "BGR":
+        # Qt has no 24-bit BGR format; reversing the channels needs one copy
+        array = np.ascontiguousarray(array[:, :, ::-1])
+    return QImageOwner(array, QtGui.QImage.Format_RGB888)
+
+
+def mss_to_qimage(sct_img):
+    """Wrap an MSS grab in a QImage without copying the pixels"""
+    array = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+    return QImageOwner(array, QtGui.QImage.Format_RGB32)
+
+
+def pil_to_qimage(pil_image):
+    """Convert a PIL image to a QImage through NumPy instead of tobytes()"""
+    if pil_image.mode == "RGBA":
+        # QImage's RGBA8888 format has the same byte order as PIL's RGBA
+        return QImageOwner(np.asarray(pil_image), QtGui.QImage.Format_RGBA8888)
+    if pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+    return QImageOwner(np.asarray(pil_image), QtGui.QImage.Format_RGB888)
+
+
+def benchmark_conversions(resolutions=None, repeat=20):
+    """
+    Time every image-to-QImage conversion path used in the application
+
+    Screen grabs are simulated with random BGRA buffers of each resolution.
+
+    Args:
+        resolutions: List of (width, height) tuples (defaults to 720p, 1080p, 1440p and 4K)
+        repeat: Number of conversions per path; the fastest run is reported
+
+    Returns:
+        List of dicts with "resolution", "path" and "seconds"
+    """
+    from PIL import Image
+    
+    resolutions = resolutions or [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+    results = []
+    
+    for width, height in resolutions:
+        raw = bytearray(np.random.randint(0, 256, width * height * 4, dtype=np.uint8).tobytes())
+        bgra = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        pil_image = Image.frombytes("RGB", (width, height), bytes(raw), "raw", "BGRX")
+        # A region in the middle of a wider grab, as produced by multi-region capture
+        region_view = bgra[:, width // 4:width // 4 + width // 2]
+        
+        paths = {
+            # The original preview path: MSS grab -> PIL -> tobytes() -> QImage
+            "mss -> PIL -> tobytes -> QImage": lambda: QtGui.QImage(
+                Image.frombytes("RGB", (width, height), bytes(raw), "raw", "BGRX").tobytes("raw", "RGB"),
+                width, height, width * 3, QtGui.QImage.Format_RGB888
+            ).copy(),
+            # ImageProcessor.pil_to_pixmap before this module existed
+            "PIL -> tobytes -> QImage": lambda: QtGui.QImage(
+                pil_image.tobytes("raw", "RGB"), width, height, width * 3, QtGui.QImage.Format_RGB888
+            ).copy(),
+            "PIL -> NumPy -> QImage": lambda: pil_to_qimage(pil_image),
+            "mss BGRA -> QImage (zero-copy)": lambda: array_to_qimage(bgra),
+            "mss BGRA view -> QImage (zero-copy)": lambda: array_to_qimage(region_view),
+            "mss BGRA -> QImage (detached copy)": lambda: array_to_qimage(bgra).detached(),
+        }
+        
+        for name, convert in paths.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                convert()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results.append({"resolution": f"{width}x{height}", "path": name, "seconds": best})
+    
+    return results
+
+
+def format_conversion_benchmark(results):
+    """Format benchmark results as a plain-text table"""
+    lines = [f"{'Resolution':<12}{'Path':<40}{'Time (ms)':>10}"]
+    for result in results:
+        lines.append(f"{result['resolution']:<12}{result['path']:<40}{result['seconds'] * 1000:>10.3f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(format_conversion_benchmark(benchmark_conversions()))
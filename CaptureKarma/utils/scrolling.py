@@ -2,34 +2,75 @@
 Scrolling utilities for the CaptureKarma Screen Capture Tool
 """
 import time
-import pyautogui
+import threading
 
-try:
-    from pynput import keyboard
-    PYNPUT_AVAILABLE = True
-except ImportError:
-    PYNPUT_AVAILABLE = False
+from CaptureKarma.utils.cursor_paths import CursorPathEngine, PROFILE_MINIMUM_JERK, PROFILE_BEZIER
+from CaptureKarma.utils.hotkeys import get_hotkey_service, PYNPUT_AVAILABLE
+from CaptureKarma.utils.lazy_imports import lazy_import
+from CaptureKarma.utils.timing import DeadlineScheduler
+
+np = lazy_import("numpy")
+pyautogui = lazy_import("pyautogui")
 
 
 class ScrollingManager:
     """Manages smooth scrolling functionality"""
     
-    def __init__(self):
+    def __init__(self, refresh_rate=60):
         self.is_scrolling = False
+        self.cursor_engine = CursorPathEngine(refresh_rate=refresh_rate)
     
-    def smooth_move(self, x, y, duration=1.0):
-        """Move mouse smoothly to the coordinates"""
-        pyautogui.moveTo(x, y, duration=duration)
+    def smooth_move(self, x, y, duration=1.0, profile=PROFILE_MINIMUM_JERK):
+        """
+        Move mouse smoothly to the coordinates
+
+        Args:
+            x, y: Target screen coordinates
+            duration: Duration of the move in seconds
+            profile: Trajectory profile ("minimum_jerk" or "bezier")
+
+        Returns:
+            TimingReport for the move
+        """
+        start_x, start_y = pyautogui.position()
+        return self.smooth_move_path([(start_x, start_y), (x, y)], duration, profile)
     
-    def smooth_scroll(self, total_scroll, duration=3.0, step_size=5, status_callback=None):
+    def smooth_move_path(self, waypoints, duration=1.0, profile=PROFILE_BEZIER):
+        """
+        Move mouse smoothly through a list of waypoints
+
+        Args:
+            waypoints: Sequence of (x, y) points, starting at the current position
+            duration: Total duration of the move in seconds
+            profile: Trajectory profile ("minimum_jerk" or "bezier")
+
+        Returns:
+            TimingReport for the move
+        """
+        report = self.cursor_engine.move(waypoints, duration, profile)
+        print(f"Cursor move timing: {report.summary()}")
+        return report
+    
+    def smooth_scroll(self, total_scroll, duration=3.0, step_size=5, status_callback=None, cancel_event=None,
+                      stop_at_end=False, region=None, idle_steps=3, end_callback=None):
         """
         Perform smooth scrolling with fine control over speed
-        
+
         Args:
             total_scroll: Total amount to scroll (negative for down)
             duration: Total time the scrolling should take (in seconds)
             step_size: Size of each individual scroll step (smaller = smoother)
             status_callback: Optional callback function to report status messages
+            cancel_event: Optional threading.Event that stops the scroll when set
+                (defaults to the abort hotkey of the shared hotkey service)
+            stop_at_end: Stop early once the content in the region stops moving
+            region: Tuple (x, y, width, height) watched when stop_at_end is enabled
+            idle_steps: Number of consecutive steps without movement that mean the end was reached
+            end_callback: Optional callback receiving the time.perf_counter() value of the
+                last step that still moved the page
+
+        Returns:
+            True if scrolling stopped because the end of the page was reached
         """
         # Number of steps based on total scroll and step size
         steps = abs(total_scroll) // step_size
@@ -42,75 +83,71 @@ class ScrollingManager:
         # Direction (negative = down, positive = up)
         direction = -1 if total_scroll < 0 else 1
         
+        # Clear any stale abort request before we start; an event passed in belongs to the caller
+        if cancel_event is None:
+            cancel_event = self._get_abort_event()
+            cancel_event.clear()
+        
         print(f"Smoothly scrolling {total_scroll} over {duration} seconds... Press ESC to stop.")
         if status_callback:
             status_callback("Scrolling... Press ESC to stop.")
         
-        # Flag to track if ESC was pressed
-        esc_pressed = [False]  # Using list for mutable state in the callback
+        # Watch the region for movement if we should stop at the end of the page
+        end_detector = None
+        if stop_at_end and region:
+            end_detector = ScrollEndDetector(region, idle_steps=idle_steps)
         
-        # Try to use PyNput for keyboard detection
-        if PYNPUT_AVAILABLE:
-            self._scroll_with_esc_detection(steps, direction, step_size, delay, esc_pressed, status_callback)
-        else:
-            self._scroll_basic(steps, direction, step_size, delay, status_callback)
-    
-    def _scroll_with_esc_detection(self, steps, direction, step_size, delay, esc_pressed, status_callback=None):
-        """Perform scrolling with ESC key detection to stop"""
-        # Setup keyboard listener to detect ESC key
-        def on_press(key):
-            try:
-                if key == keyboard.Key.esc:
-                    print("ESC key detected, stopping scroll")
-                    esc_pressed[0] = True
-                    return False  # Stop listener
-            except:
-                pass
-            return True
-            
-        # Start keyboard listener
-        listener = keyboard.Listener(on_press=on_press)
-        listener.start()
-        
-        # Perform the scrolling in steps
-        for i in range(steps):
-            # Check if ESC was pressed
-            if esc_pressed[0]:
-                print("Stopping scroll due to ESC key")
-                if status_callback:
-                    status_callback("Scrolling stopped by ESC key")
-                break
+        # Steps are placed on a fixed timeline; waiting on the event makes abort immediate
+        scheduler = DeadlineScheduler(cancel_event=cancel_event)
+        scheduler.start()
+        
+        try:
+            for i in range(steps):
+                if not scheduler.wait_until(i * delay):
+                    print("Stopping scroll due to abort request")
+                    if status_callback:
+                        status_callback("Scrolling stopped by ESC key")
+                    return False
                 
-            # Perform scroll step
-            pyautogui.scroll(direction * step_size)
-            time.sleep(delay)
-            
-            # Update progress every 10 steps
-            if i % 10 == 0:
-                print(f"Scrolling progress: {i}/{steps} steps")
+                # Check whether the previous steps still moved the page
+                if end_detector and end_detector.update():
+                    print(f"End of page reached after {i} steps")
+                    if status_callback:
+                        status_callback("Scrolling stopped: end of page reached")
+                    if end_callback:
+                        end_callback(end_detector.last_motion_time)
+                    return True
                 
-        # Clean up listener
-        if listener.is_alive():
-            listener.stop()
-    
-    def _scroll_basic(self, steps, direction, step_size, delay, status_callback=None):
-        """Perform basic scrolling without ESC detection"""
-        print("WARNING: pynput not available. Install with 'pip install pynput' to enable ESC to stop scrolling.")
-        
-        # Perform the scrolling in steps without ESC detection
-        for i in range(steps):
-            # Perform scroll step
-            pyautogui.scroll(direction * step_size)
-            time.sleep(delay)
-            
-            # Update progress every 10 steps
-            if i % 10 == 0:
-                print(f"Scrolling progress: {i}/{steps} steps")
+                # Perform scroll step (without PyAutoGUI's built-in pause, which would stretch the timing)
+                pyautogui.scroll(direction * step_size, _pause=False)
                 
+                # Update progress every 10 steps
+                if i % 10 == 0:
+                    print(f"Scrolling progress: {i}/{steps} steps")
+        finally:
+            if end_detector:
+                end_detector.close()
+        
+        # Let the last step take its share of the duration
+        scheduler.wait_until(steps * delay)
+        print(f"Scroll timing: {scheduler.report().summary()}")
+        
         if status_callback:
             status_callback("Scrolling completed")
+        return False
     
-    def delayed_scroll(self, scroll_amount, scroll_duration, scroll_step, status_callback=None):
+    def _get_abort_event(self):
+        """Get the event set by the abort hotkey, starting the hotkey service if needed"""
+        if not PYNPUT_AVAILABLE:
+            print("WARNING: pynput not available. Install with 'pip install pynput' to enable ESC to stop scrolling.")
+            return threading.Event()
+        
+        service = get_hotkey_service()
+        service.start()
+        return service.abort_scroll_event
+    
+    def delayed_scroll(self, scroll_amount, scroll_duration, scroll_step, status_callback=None,
+                       stop_at_end=False, region=None, end_callback=None):
         """Perform scrolling after a short delay (useful during recording)"""
         # Give a moment for user to position mouse manually
         print("Waiting 3 seconds before scrolling...")
@@ -129,8 +166,11 @@ class ScrollingManager:
                 status_callback(f"Recording: Scrolling {abs(scroll_amount)} units... Press ESC to stop.")
             
             # Perform the scroll
-            self.smooth_scroll(scroll_amount, scroll_duration, scroll_step, status_callback)
-                
+            self.smooth_scroll(
+                scroll_amount, scroll_duration, scroll_step, status_callback,
+                stop_at_end=stop_at_end, region=region, end_callback=end_callback
+            )
+            
             self.is_scrolling = False
             print("Scrolling completed or stopped")
         
@@ -138,4 +178,83 @@ class ScrollingManager:
             self.is_scrolling = False
             print(f"Error during scrolling: {str(e)}")
             import traceback
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+
+
+class ScrollEndDetector:
+    """
+    Detects when scrolling no longer moves the content of a region
+
+    The whole width of the region is sampled with a stride and compared in
+    vertical bands, so text that only fills one side of a sparse page still
+    counts as movement. A check costs a fraction of a full-frame capture.
+    """
+    
+    def __init__(self, region, idle_steps=3, stride=4, threshold=1.0, bands=4):
+        """
+        Args:
+            region: Tuple (x, y, width, height) of the scrolled content
+            idle_steps: Consecutive checks without movement before the end is reported
+            stride: Sampling stride in both directions
+            threshold: Mean absolute difference (0-255) in the most changed band below
+                which nothing moved
+            bands: Number of vertical bands the difference is measured in
+        """
+        x, y, width, height = region
+        self.monitor = {"left": x, "top": y, "width": width, "height": height}
+        self.idle_steps = idle_steps
+        self.stride = stride
+        self.threshold = threshold
+        self.bands = bands
+        self.last_motion_time = time.perf_counter()
+        
+        self._previous = None
+        self._idle_count = 0
+        self._sct = None
+    
+    def update(self):
+        """
+        Sample the region and compare it with the previous sample
+
+        Returns:
+            True once the content has not moved for idle_steps consecutive checks
+        """
+        sample = self._sample()
+        if sample is None:
+            return False
+        
+        if self._previous is not None:
+            # The band that changed most decides, so blank margins don't dilute the movement
+            changes = np.abs(sample - self._previous)
+            difference = max(band.mean() for band in np.array_split(changes, self.bands, axis=1) if band.size)
+            if difference < self.threshold:
+                self._idle_count += 1
+            else:
+                self._idle_count = 0
+                self.last_motion_time = time.perf_counter()
+        self._previous = sample
+        
+        return self._idle_count >= self.idle_steps
+    
+    def close(self):
+        """Release the capture session"""
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+    
+    def _sample(self):
+        """Grab a strided, single-channel sample of the region"""
+        try:
+            # MSS sessions are per-thread, so create it on first use in the scrolling thread
+            if self._sct is None:
+                import mss
+                self._sct = mss.mss()
+            
+            sct_img = self._sct.grab(self.monitor)
+            pixels = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+            
+            # Green channel only; enough to see movement and the cheapest to copy
+            return pixels[::self.stride, ::self.stride, 1].astype(np.int16)
+        except Exception as e:
+            print(f"Scroll end detection sample failed: {str(e)}")
+            return None
@@ -0,0 +1,203 @@
+"""
+Startup benchmark for the CaptureKarma Screen Capture Tool
+
+Measures, each in a fresh interpreter, where the import time of the main
+window goes and how long it takes from process start to the first paint.
+Run "python -m CaptureKarma.utils.startup_benchmark" to print the
+breakdown; the command exits with status 1 when startup exceeds its
+budgets or a deferred library is imported before the window is painted,
+so it can be used as a CI check.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from CaptureKarma.utils.lazy_imports import HEAVY_MODULES
+
+
+# Default budgets in seconds
+FIRST_PAINT_BUDGET = 1.5
+IMPORT_BUDGET = 0.5
+
+# Prefix of the result line; the app prints its own messages to stdout while it starts
+RESULT_MARKER = "CAPTUREKARMA_FIRST_PAINT "
+
+# Runs in the child interpreter; prints one marked JSON line at the first paint of the main window
+_FIRST_PAINT_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+from PyQt5 import QtCore, QtWidgets
+app = QtWidgets.QApplication(sys.argv)
+from CaptureKarma.ui.main_window import MarketingScreenCaptureTool
+imported = time.perf_counter()
+window = MarketingScreenCaptureTool()
+constructed = time.perf_counter()
+
+class FirstPaint(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint:
+            obj.removeEventFilter(self)
+            print(%r + json.dumps({
+                "import": imported - start,
+                "construct": constructed - imported,
+                "first_paint": time.perf_counter() - start,
+                "loaded": [name for name in %r if name in sys.modules],
+            }), flush=True)
+            QtCore.QTimer.singleShot(0, app.quit)
+        return False
+
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+app.exec_()
+# Skip interpreter shutdown; background services are still running
+os._exit(0)
+"""
+
+
+def measure_import_times(module="CaptureKarma.ui.main_window"):
+    """
+    Break down the import time of a module with "python -X importtime"
+
+    Args:
+        module: Module to import in a fresh interpreter
+
+    Returns:
+        List of dicts with "module", "self" and "cumulative" (seconds), slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_child_env()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip()}")
+    
+    timings = []
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented name>"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append({
+            "module": name.strip(),
+            "self": int(self_us) / 1e6,
+            "cumulative": int(cumulative_us) / 1e6,
+        })
+    
+    timings.sort(key=lambda timing: timing["cumulative"], reverse=True)
+    return timings
+
+
+def measure_first_paint(repeat=3):
+    """
+    Time process start to first paint of the main window
+
+    Args:
+        repeat: Number of fresh processes to start; the fastest run is reported
+
+    Returns:
+        Dict with "process" (launch to first paint), "import", "construct" and
+        "first_paint" (seconds, measured inside the process) and "loaded" (deferred
+        modules that were already imported at the first paint)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-c", _FIRST_PAINT_SCRIPT % (RESULT_MARKER, HEAVY_MODULES)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=_child_env()
+        )
+        # Skip whatever the app prints before the result line
+        line = ""
+        for output in process.stdout:
+            if output.startswith(RESULT_MARKER):
+                line = output[len(RESULT_MARKER):]
+                break
+        elapsed = time.perf_counter() - start
+        _, stderr = process.communicate()
+        if not line:
+            raise RuntimeError(f"The main window was not painted:\n{stderr.strip()}")
+        
+        result = json.loads(line)
+        result["process"] = elapsed
+        if best is None or result["process"] < best["process"]:
+            best = result
+    return best
+
+
+def check_startup(import_times, first_paint, import_budget=IMPORT_BUDGET, first_paint_budget=FIRST_PAINT_BUDGET):
+    """
+    Check startup measurements against their budgets
+
+    Returns:
+        List of failure messages (empty if startup is within budget)
+    """
+    failures = []
+    
+    main_import = next((timing for timing in import_times if timing["module"] == "CaptureKarma.ui.main_window"), None)
+    if main_import and main_import["cumulative"] > import_budget:
+        failures.append(
+            f"Importing the main window took {main_import['cumulative'] * 1000:.0f} ms "
+            f"(budget {import_budget * 1000:.0f} ms)"
+        )
+    
+    if first_paint["process"] > first_paint_budget:
+        failures.append(
+            f"First paint after {first_paint['process'] * 1000:.0f} ms "
+            f"(budget {first_paint_budget * 1000:.0f} ms)"
+        )
+    
+    if first_paint["loaded"]:
+        failures.append(f"Imported before the first paint: {', '.join(first_paint['loaded'])}")
+    
+    return failures
+
+
+def format_startup_report(import_times, first_paint, top=15):
+    """Format the measurements as plain text"""
+    lines = [f"{'Module':<50}{'Self (ms)':>12}{'Cumulative (ms)':>18}"]
+    for timing in import_times[:top]:
+        lines.append(f"{timing['module']:<50}{timing['self'] * 1000:>12.1f}{timing['cumulative'] * 1000:>18.1f}")
+    
+    lines.append("")
+    lines.append(f"Import main window:   {first_paint['import'] * 1000:.0f} ms")
+    lines.append(f"Construct window:     {first_paint['construct'] * 1000:.0f} ms")
+    lines.append(f"First paint:          {first_paint['first_paint'] * 1000:.0f} ms")
+    lines.append(f"Process to paint:     {first_paint['process'] * 1000:.0f} ms")
+    return "\n".join(lines)
+
+
+def _child_env():
+    """Environment for the measured interpreters, with this checkout importable"""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return env
+
+
+def main():
+    """Run the benchmark and exit with status 1 if a budget is exceeded"""
+    parser = argparse.ArgumentParser(description="Measure CaptureKarma startup time")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET,
+                        help="Maximum main window import time in seconds")
+    parser.add_argument("--first-paint-budget", type=float, default=FIRST_PAINT_BUDGET,
+                        help="Maximum time from process start to first paint in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed launches")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+    
+    import_times = measure_import_times()
+    first_paint = measure_first_paint(repeat=args.repeat)
+    print(format_startup_report(import_times, first_paint, top=args.top))
+    
+    failures = check_startup(import_times, first_paint, args.import_budget, args.first_paint_budget)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Precise timing utilities for the CaptureKarma Screen Capture Tool
+"""
+import time
+
+
+class DeadlineScheduler:
+    """
+    Waits for absolute deadlines on a monotonic clock
+
+    Deadlines are offsets from a common start time, so a late wake-up never
+    pushes the following events back. The scheduler sleeps for most of the
+    remaining time and spins for the last couple of milliseconds, which keeps
+    wake-ups accurate even where the OS sleep granularity is coarse.
+    """
+    
+    def __init__(self, spin_threshold=0.002, cancel_event=None):
+        """
+        Args:
+            spin_threshold: Time (in seconds) before a deadline spent spinning instead of sleeping
+            cancel_event: Optional threading.Event that aborts any pending wait when set
+        """
+        self.spin_threshold = spin_threshold
+        self.cancel_event = cancel_event
+        self.start_time = None
+        self.planned = []
+        self.actual = []
+    
+    def start(self, start_time=None):
+        """
+        Start the clock
+
+        Args:
+            start_time: Optional time.perf_counter() value to use as the origin,
+                so several schedulers can share one clock
+
+        Returns:
+            The origin of the clock
+        """
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.planned = []
+        self.actual = []
+        return self.start_time
+    
+    def elapsed(self):
+        """Seconds since the clock was started"""
+        return time.perf_counter() - self.start_time
+    
+    def is_cancelled(self):
+        """Whether the cancel event has been set"""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def wait_until(self, offset):
+        """
+        Block until the given offset from the start time
+
+        Args:
+            offset: Deadline in seconds relative to the start time
+
+        Returns:
+            False if the wait was cancelled, True otherwise
+        """
+        if self.start_time is None:
+            self.start()
+        
+        deadline = self.start_time + offset
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            
+            if remaining > self.spin_threshold:
+                # Sleep through most of the wait; an Event wakes up immediately on cancel
+                sleep_time = remaining - self.spin_threshold
+                if self.cancel_event is not None:
+                    if self.cancel_event.wait(sleep_time):
+                        return False
+                else:
+                    time.sleep(sleep_time)
+            else:
+                # Spin for the last stretch, yielding so other threads keep running
+                time.sleep(0)
+        
+        if self.is_cancelled():
+            return False
+        
+        self.planned.append(offset)
+        self.actual.append(time.perf_counter() - self.start_time)
+        return True
+    
+    def report(self):
+        """Get a timing report for all deadlines waited on since start()"""
+        return TimingReport(self.planned, self.actual)
+
+
+class TimingReport:
+    """Summary of planned versus actual event times"""
+    
+    def __init__(self, planned, actual):
+        self.planned = list(planned)
+        self.actual = list(actual)
+        
+        # Lateness of every event, in seconds
+        self.errors = [actual_time - planned_time for planned_time, actual_time in zip(self.planned, self.actual)]
+        self.count = len(self.errors)
+        
+        if self.errors:
+            ordered = sorted(self.errors)
+            self.mean_error = sum(self.errors) / self.count
+            self.max_error = ordered[-1]
+            self.p95_error = ordered[min(self.count - 1, int(self.count * 0.95))]
+            self.final_error = self.errors[-1]
+        else:
+            self.mean_error = self.max_error = self.p95_error = self.final_error = 0.0
+    
+    def summary(self):
+        """Get a one-line human readable summary"""
+        return (
+            f"{self.count} events, lateness mean {self.mean_error * 1000:.2f} ms, "
+            f"p95 {self.p95_error * 1000:.2f} ms, max {self.max_error * 1000:.2f} ms, "
+            f"final {self.final_error * 1000:.2f} ms"
+        )
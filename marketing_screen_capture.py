@@ -8,6 +8,9 @@ import cv2
 import numpy as np
 import threading
 
+from CaptureKarma.utils.frame_analysis import is_frame_black, qimage_to_array
+from CaptureKarma.utils.qt_conversion import pil_to_qimage
+
 # Safety feature - move mouse to top-left corner to abort script
 pyautogui.FAILSAFE = True
 
@@ -380,26 +383,10 @@ class MarketingScreenCaptureTool(QtWidgets.QMainWindow):
         image = pixmap.toImage()
         if image.isNull():
             return True
-            
-        # Check a sample of pixels
-        sample_size = min(100, pixmap.width() * pixmap.height())
-        if sample_size == 0:
-            return True
-            
-        black_count = 0
-        step = max(1, pixmap.width() * pixmap.height() // sample_size)
-        
-        for i in range(0, pixmap.width() * pixmap.height(), step):
-            x = i % pixmap.width()
-            y = i // pixmap.width()
-            if y < pixmap.height():
-                pixel = image.pixel(x, y)
-                # Check if pixel is black or almost black
-                if QtGui.qRed(pixel) < 10 and QtGui.qGreen(pixel) < 10 and QtGui.qBlue(pixel) < 10:
-                    black_count += 1
-        
-        # If more than 95% of sampled pixels are black, consider it a black image
-        return black_count > (sample_size * 0.95)
+        
+        # Analyze a strided view of the image memory instead of reading pixels one by one
+        pixels, image = qimage_to_array(image)
+        return is_frame_black(pixels)
     
     def create_visual_preview(self, title, region):
         """Create a visual representation of the capture region"""
@@ -495,18 +482,12 @@ class MarketingScreenCaptureTool(QtWidgets.QMainWindow):
             width, height = pil_image.size
             print(f"Converting PIL image size {width}x{height} to QImage")
             
-            # Convert PIL image to QImage
-            buffer = pil_image.tobytes("raw", "RGB")
-            qimage = QtGui.QImage(buffer, width, height, width * 3, QtGui.QImage.Format_RGB888)
+            # Convert PIL image to QImage; the returned copy owns its pixels, so it
+            # stays valid after the temporary array is released
+            qimage = pil_to_qimage(pil_image).detached()
             
             if qimage.isNull():
                 print("QImage is null after conversion")
-                # Try alternative conversion method
-                bytearr = QtCore.QByteArray(buffer)
-                buffer = QtCore.QBuffer(bytearr)
-                buffer.open(QtCore.QIODevice.ReadOnly)
-                qimage = QtGui.QImage()
-                qimage.load(buffer, "PPM")
                 
             return qimage
         except Exception as e:
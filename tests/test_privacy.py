@@ -0,0 +1,45 @@
+"""Regression tests for anchored privacy masks on sparse pages"""
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from CaptureKarma.engine.privacy import MaskRegion, PrivacyMask, ScrollOffsetEstimator
+
+
+def make_page(align, height=4000, width=1280):
+    """White page with one short line of dark text every 26 pixels"""
+    page = np.full((height, width, 4), 255, np.uint8)
+    for y in range(30, height, 26):
+        text = f"Item {y}: the quick brown fox jumps"
+        x = 20
+        if align == "center":
+            x = (width - cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0][0]) // 2
+        cv2.putText(page, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (30, 30, 30, 255), 1, cv2.LINE_AA)
+    return page
+
+
+@pytest.mark.parametrize("align", ["left", "center"])
+@pytest.mark.parametrize("speed", [3, 9, 40])
+def test_sparse_page_offset(align, speed):
+    page = make_page(align)
+    estimator = ScrollOffsetEstimator()
+    for top in list(range(0, 3000, speed)) + [3000] * 3:
+        offset = estimator.update(np.ascontiguousarray(page[top:top + 720]))
+    assert offset == 3000
+    assert estimator.uncertainty == 0
+
+
+def test_page_change_widens_anchored_mask():
+    left_page, center_page = make_page("left"), make_page("center")
+    effect = PrivacyMask([MaskRegion(0, 300, 1280, 40, anchored=True)], margin=0)
+    effect.origin = (0, 0)
+    effect.prepare(1280, 720)
+    for top in range(0, 100, 10):
+        effect.apply(np.ascontiguousarray(left_page[top:top + 720]))
+    assert effect._estimator.offset == 90
+    
+    # Unrelated content can't be matched, so the mask is held and grows
+    effect.apply(np.ascontiguousarray(center_page[1000:1720]))
+    assert effect._estimator.offset == 90
+    assert effect._estimator.uncertainty > 0
@@ -0,0 +1,83 @@
+"""Benchmark and correctness tests for the NumPy / MSS to QImage conversions"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PyQt5")
+Image = pytest.importorskip("PIL.Image")
+
+from PyQt5 import QtGui
+
+from CaptureKarma.utils.qt_conversion import (
+    array_to_qimage, mss_to_qimage, pil_to_qimage, benchmark_conversions, format_conversion_benchmark
+)
+
+RESOLUTIONS = [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)]
+
+
+class FakeGrab:
+    """The parts of an MSS screenshot the conversions use"""
+    
+    def __init__(self, bgra):
+        self.height, self.width = bgra.shape[:2]
+        self.raw = bytearray(bgra.tobytes())
+
+
+def qimage_rgb(qimage):
+    """Read a QImage back as an (height, width, 3) RGB array"""
+    image = qimage.convertToFormat(QtGui.QImage.Format_RGB888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * 3].reshape(image.height(), image.width(), 3).copy()
+
+
+@pytest.fixture(params=RESOLUTIONS, ids=lambda size: f"{size[0]}x{size[1]}")
+def grab(request):
+    """Random BGRA screen grab at a common resolution"""
+    width, height = request.param
+    return np.random.default_rng(0).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+
+def test_bgra_paths_keep_pixels(grab):
+    expected = grab[:, :, 2::-1]
+    width = grab.shape[1]
+    view = grab[:, width // 4:width // 4 + width // 2]
+    
+    assert np.array_equal(qimage_rgb(array_to_qimage(grab).qimage), expected)
+    assert np.array_equal(qimage_rgb(array_to_qimage(view).qimage), view[:, :, 2::-1])
+    assert np.array_equal(qimage_rgb(array_to_qimage(grab).detached()), expected)
+    assert np.array_equal(qimage_rgb(mss_to_qimage(FakeGrab(grab)).qimage), expected)
+
+
+def test_rgb_and_bgr_paths_keep_pixels(grab):
+    rgb = np.ascontiguousarray(grab[:, :, 2::-1])
+    bgr = np.ascontiguousarray(grab[:, :, :3])
+    
+    assert np.array_equal(qimage_rgb(array_to_qimage(rgb, "RGB").qimage), rgb)
+    assert np.array_equal(qimage_rgb(array_to_qimage(bgr, "BGR").qimage), rgb)
+
+
+def test_pil_paths_keep_pixels(grab):
+    rgb = np.ascontiguousarray(grab[:, :, 2::-1])
+    rgba = np.ascontiguousarray(grab[:, :, [2, 1, 0, 3]])
+    
+    assert np.array_equal(qimage_rgb(pil_to_qimage(Image.fromarray(rgb, "RGB")).qimage), rgb)
+    owner = pil_to_qimage(Image.fromarray(rgba, "RGBA"))
+    assert np.array_equal(owner.array, rgba)
+    gray = Image.fromarray(rgb, "RGB").convert("L")
+    assert np.array_equal(qimage_rgb(pil_to_qimage(gray).qimage), np.asarray(gray.convert("RGB")))
+
+
+def test_benchmark_every_path():
+    results = benchmark_conversions(RESOLUTIONS, repeat=5)
+    print()
+    print(format_conversion_benchmark(results))
+    
+    timings = {(result["resolution"], result["path"]): result["seconds"] for result in results}
+    paths = {result["path"] for result in results}
+    assert len(timings) == len(RESOLUTIONS) * len(paths)
+    
+    # Wrapping a grab must beat the tobytes() round trip it replaced at every resolution
+    for width, height in RESOLUTIONS:
+        resolution = f"{width}x{height}"
+        assert timings[resolution, "mss BGRA -> QImage (zero-copy)"] < timings[resolution, "PIL -> tobytes -> QImage"]